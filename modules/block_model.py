@@ -0,0 +1,314 @@
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+import streamlit as st
+
+from modules.surface_model import SurfaceModel
+from utils.logs_manager import LogsManager
+from utils.session_state_manager import SessionStateManager
+
+
+class BlockModel:
+    """
+    Геологическая блочная модель (регулярная 3D-сетка ячеек) и свойства пород по скважинам.
+
+    Файл модели (.csv/.parquet) читается потоково пакетами и раскладывается по
+    столбцам в дисковый кэш .npy, открываемый отображением в память. Индекс —
+    плотный массив номеров строк по (i, j, k) ячеек, поэтому поиск ячейки для
+    точки — арифметика и одно обращение к массиву, без поиска по таблице.
+    Свойства скважины — среднее по точкам, равномерно расставленным вдоль
+    заряженного интервала.
+    """
+    CACHE_DIR = "cache/block_models"
+    COORDINATE_COLUMNS = ["X", "Y", "Z"]
+    PROPERTY_COLUMNS = ["rho", "sigma_c", "E", "RMD"]
+    COLUMN_ALIASES = {
+        "X": ["x", "xc", "x_centre", "x_center"],
+        "Y": ["y", "yc", "y_centre", "y_center"],
+        "Z": ["z", "zc", "z_centre", "z_center"],
+        "rho": ["rho", "density", "плотность"],
+        "sigma_c": ["sigma_c", "ucs"],
+        "E": ["e", "young", "e_modulus"],
+        "RMD": ["rmd"],
+    }
+    MAX_SAMPLES = 64
+    MAX_INDEX_RATIO = 20
+    COVERAGE_COLUMN = "Доля интервала в блочной модели"
+
+    def __init__(self, session_manager: SessionStateManager, logs_manager: LogsManager):
+        self.session_manager = session_manager
+        self.logs_manager = logs_manager
+        self.surface_model = SurfaceModel(session_manager, logs_manager)
+
+    def column_mapping(self, names):
+        """
+        Соответствие стандартных имен столбцов (X, Y, Z, rho, ...) столбцам файла.
+        """
+        lowered = {str(name).strip().lower(): name for name in names}
+        mapping = {}
+        for column, aliases in self.COLUMN_ALIASES.items():
+            found = next((lowered[alias] for alias in aliases if alias in lowered), None)
+            if found is not None:
+                mapping[column] = found
+        return mapping
+
+    def record_batches(self, source, file_extension):
+        """
+        Потоковое чтение файла модели пакетами Arrow.
+        """
+        if file_extension == "parquet":
+            parquet_file = pq.ParquetFile(source)
+            return parquet_file.schema_arrow.names, parquet_file.metadata.num_rows, parquet_file.iter_batches()
+        reader = pa_csv.open_csv(source)
+        return reader.schema.names, None, reader
+
+    def axis_index(self, values):
+        """
+        Привязка оси: центр первой ячейки, размер ячейки (наименьший шаг между центрами), число ячеек.
+        """
+        # Округление до миллиметра убирает погрешность записи координат в CSV
+        unique = np.unique(np.round(values, 3))
+        steps = np.diff(unique)
+        cell = float(steps.min()) if len(unique) > 1 else 1.0
+        return float(unique[0]), cell, int(round((unique[-1] - unique[0]) / cell)) + 1
+
+    def write_columns(self, source, file_extension, model_dir):
+        """
+        Раскладка модели по столбцам .npy (координаты float64, свойства float32). Возвращает число ячеек и свойства.
+        """
+        names, n_rows, batches = self.record_batches(source, file_extension)
+        mapping = self.column_mapping(names)
+        missing = [column for column in self.COORDINATE_COLUMNS if column not in mapping]
+        if missing:
+            raise ValueError(f"в модели нет столбцов координат {missing}")
+        properties = [column for column in self.PROPERTY_COLUMNS if column in mapping]
+        if not properties:
+            raise ValueError(f"в модели нет ни одного из свойств {self.PROPERTY_COLUMNS}")
+
+        # Для CSV число строк заранее неизвестно: пакеты дописываются в сырые файлы, затем оборачиваются в .npy
+        columns = self.COORDINATE_COLUMNS + properties
+        dtypes = {column: np.float64 if column in self.COORDINATE_COLUMNS else np.float32 for column in columns}
+        raw_files = {column: open(os.path.join(model_dir, f"{column}.raw"), "wb") for column in columns}
+        n_cells = 0
+        try:
+            for batch in batches:
+                for column in columns:
+                    values = pd.to_numeric(batch.column(mapping[column]).to_pandas(), errors="coerce")
+                    raw_files[column].write(values.to_numpy(dtype=dtypes[column]).tobytes())
+                n_cells += batch.num_rows
+        finally:
+            for file in raw_files.values():
+                file.close()
+
+        for column in columns:
+            raw_path = os.path.join(model_dir, f"{column}.raw")
+            raw = np.memmap(raw_path, dtype=dtypes[column], mode="r", shape=(n_cells,))
+            target = np.lib.format.open_memmap(os.path.join(model_dir, f"{column}.npy"), mode="w+",
+                                               dtype=dtypes[column], shape=(n_cells,))
+            for start in range(0, n_cells, 10_000_000):
+                target[start:start + 10_000_000] = raw[start:start + 10_000_000]
+            target.flush()
+            del raw, target
+            os.remove(raw_path)
+        return n_cells, properties
+
+    def build_index(self, model_dir, n_cells):
+        """
+        Плотный индекс (nx × ny × nz) номеров строк модели, -1 — пустая ячейка.
+        """
+        columns = {axis: np.load(os.path.join(model_dir, f"{axis}.npy"), mmap_mode="r") for axis in self.COORDINATE_COLUMNS}
+        axes = {axis: self.axis_index(columns[axis]) for axis in self.COORDINATE_COLUMNS}
+        shape = tuple(axes[axis][2] for axis in self.COORDINATE_COLUMNS)
+        if np.prod(shape, dtype=np.int64) > self.MAX_INDEX_RATIO * max(n_cells, 1):
+            raise ValueError(f"модель не является регулярной: сетка {shape} при {n_cells} ячейках")
+
+        index = np.lib.format.open_memmap(os.path.join(model_dir, "index.npy"), mode="w+", dtype=np.int32, shape=shape)
+        index[:] = -1
+        for start in range(0, n_cells, 5_000_000):
+            stop = min(start + 5_000_000, n_cells)
+            ijk = [np.rint((columns[axis][start:stop] - axes[axis][0]) / axes[axis][1]).astype(np.int64)
+                   for axis in self.COORDINATE_COLUMNS]
+            index[ijk[0], ijk[1], ijk[2]] = np.arange(start, stop, dtype=np.int32)
+        index.flush()
+        del index
+        return {axis: {"origin": origin, "cell": cell, "count": count} for axis, (origin, cell, count) in axes.items()}
+
+    def load_block_model(self, source, file_name):
+        """
+        Загрузка блочной модели (.csv/.parquet): центры ячеек X, Y, Z и свойства rho, sigma_c, E, RMD.
+        """
+        try:
+            started = time.perf_counter()
+            file_extension = file_name.split(".")[-1].lower()
+            if file_extension not in ["csv", "txt", "parquet"]:
+                st.sidebar.warning("Неподдерживаемый формат файла. Разрешены только .csv, .txt и .parquet")
+                return
+
+            key = self.surface_model.source_key(source, file_name)
+            model_dir = os.path.join(self.CACHE_DIR, key)
+            meta_path = os.path.join(model_dir, "meta.json")
+
+            if os.path.exists(meta_path):
+                with open(meta_path, "r", encoding="utf-8") as file:
+                    meta = json.load(file)
+            else:
+                os.makedirs(model_dir, exist_ok=True)
+                if not isinstance(source, str):
+                    source = pa.BufferReader(source.getvalue())
+                n_cells, properties = self.write_columns(source, file_extension, model_dir)
+                axes = self.build_index(model_dir, n_cells)
+                meta = {"n_cells": n_cells, "properties": properties, "axes": axes}
+                with open(meta_path, "w", encoding="utf-8") as file:
+                    json.dump(meta, file)
+
+            st.session_state["block_model"] = {**meta, "model_dir": model_dir, "file_name": os.path.basename(file_name)}
+            elapsed = time.perf_counter() - started
+            cells = " × ".join(f"{meta['axes'][axis]['cell']:g}" for axis in self.COORDINATE_COLUMNS)
+            self.logs_manager.add_log(
+                "block_model",
+                f"✅ Загружена блочная модель {file_name}: {meta['n_cells']} ячеек ({cells} м) за {elapsed:.2f} с.",
+                "успех"
+            )
+            st.sidebar.success(f"✅ Блочная модель загружена: {meta['n_cells']} ячеек, свойства: {', '.join(meta['properties'])}.")
+
+        except Exception as e:
+            st.sidebar.error(f"❌ Ошибка загрузки блочной модели: {e}")
+            self.logs_manager.add_log("block_model", f"Ошибка загрузки блочной модели: {e}", "ошибка")
+
+    def lookup_rows(self, model, x, y, z):
+        """
+        Номера строк модели для точек (x, y, z); -1 — точка вне модели или в пустой ячейке.
+        """
+        index = np.load(os.path.join(model["model_dir"], "index.npy"), mmap_mode="r")
+        ijk, inside = [], np.ones(len(x), dtype=bool)
+        for axis, values in zip(self.COORDINATE_COLUMNS, (x, y, z)):
+            axis_meta = model["axes"][axis]
+            position = np.rint((values - axis_meta["origin"]) / axis_meta["cell"])
+            inside &= (position >= 0) & (position < axis_meta["count"])
+            ijk.append(np.clip(np.nan_to_num(position), 0, axis_meta["count"] - 1).astype(np.int64))
+
+        # Сортировка по линейному адресу — последовательное чтение индекса с диска
+        linear = np.ravel_multi_index(ijk, index.shape)
+        order = np.argsort(linear, kind="stable")
+        rows = np.empty(len(x), dtype=np.int64)
+        rows[order] = index.reshape(-1)[linear[order]]
+        return np.where(inside, rows, -1)
+
+    def hole_values(self, grid_data, params, name):
+        if name in grid_data.columns:
+            return grid_data[name].to_numpy(dtype=float)
+        return np.full(len(grid_data), float(params[name]))
+
+    def charge_points(self, grid_data, params, step):
+        """
+        Точки вдоль заряженного интервала скважин: (индекс скважины, x, y, z).
+        Устье — Z из grid_data или floor_elevation + H; направление — до забоя
+        X_toe/Y_toe/Z_toe (траектории скважин), иначе вертикально.
+        """
+        H = self.hole_values(grid_data, params, "H")
+        x0, y0 = grid_data["X"].to_numpy(dtype=float), grid_data["Y"].to_numpy(dtype=float)
+        z0 = grid_data["Z"].to_numpy(dtype=float) if "Z" in grid_data.columns else float(params.get("floor_elevation", 0.0)) + H
+
+        design = SessionStateManager.get_grid_table("charge_design", grid_data)
+        if design is not None:
+            hole_length = design["Длина скважины, м"].to_numpy(dtype=float)
+            stemming = design["Забойка, м"].to_numpy(dtype=float)
+        else:
+            hole_length = H + self.hole_values(grid_data, params, "subdrill")
+            stemming = np.maximum(hole_length - float(params["L_tot"]), 0.0)
+
+        if {"X_toe", "Y_toe", "Z_toe"}.issubset(grid_data.columns):
+            toe = grid_data[["X_toe", "Y_toe", "Z_toe"]].to_numpy(dtype=float)
+            direction = (toe - np.column_stack([x0, y0, z0])) / np.maximum(hole_length, 1e-9)[:, None]
+        else:
+            direction = np.tile([0.0, 0.0, -1.0], (len(grid_data), 1))
+
+        # Равномерные точки в центрах отрезков интервала «низ забойки — забой»
+        charge_length = np.maximum(hole_length - stemming, 0.0)
+        n_samples = np.clip(np.ceil(charge_length / step).astype(int), 1, self.MAX_SAMPLES)
+        hole = np.repeat(np.arange(len(grid_data)), n_samples)
+        offsets = np.arange(len(hole)) - np.repeat(np.cumsum(n_samples) - n_samples, n_samples)
+        depth = stemming[hole] + (offsets + 0.5) / n_samples[hole] * charge_length[hole]
+
+        x = x0[hole] + direction[hole, 0] * depth
+        y = y0[hole] + direction[hole, 1] * depth
+        z = z0[hole] + direction[hole, 2] * depth
+        return hole, x, y, z
+
+    def hole_properties(self, grid_data, params):
+        """
+        Средние свойства пород по заряженным интервалам скважин и доля интервала, попавшая в модель.
+        """
+        model = st.session_state["block_model"]
+        step = min(axis["cell"] for axis in model["axes"].values()) / 2
+        hole, x, y, z = self.charge_points(grid_data, params, step)
+        rows = self.lookup_rows(model, x, y, z)
+        found = rows >= 0
+
+        n_holes = len(grid_data)
+        n_points = np.bincount(hole, minlength=n_holes)
+        n_found = np.bincount(hole[found], minlength=n_holes)
+        table = pd.DataFrame({"ID": grid_data["ID"].to_numpy() if "ID" in grid_data.columns else np.arange(1, n_holes + 1)})
+
+        order = np.argsort(rows[found], kind="stable")
+        found_rows, found_hole = rows[found][order], hole[found][order]
+        for name in model["properties"]:
+            column = np.load(os.path.join(model["model_dir"], f"{name}.npy"), mmap_mode="r")
+            values = column[found_rows].astype(float)
+            valid = np.isfinite(values)
+            total = np.bincount(found_hole[valid], weights=values[valid], minlength=n_holes)
+            count = np.bincount(found_hole[valid], minlength=n_holes)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                table[name] = total / count
+
+        table[self.COVERAGE_COLUMN] = n_found / np.maximum(n_points, 1)
+        return table
+
+    def run(self):
+        """
+        Свойства пород по скважинам: результат в session_state["block_model_lookup"],
+        значения записываются в grid_data (столбцы rho, sigma_c, E, RMD) для расчета по скважинам.
+        Скважины вне модели сохраняют параметры блока.
+        """
+        try:
+            started = time.perf_counter()
+            grid_data = st.session_state.get("grid_data")
+            if grid_data is None or grid_data.empty:
+                st.sidebar.warning("Сетка скважин не сгенерирована. Сначала выполните генерацию сетки.")
+                self.logs_manager.add_log("block_model", "Ошибка: сетка скважин отсутствует.", "ошибка")
+                return
+            if "block_model" not in st.session_state:
+                st.sidebar.warning("Загрузите блочную модель.")
+                self.logs_manager.add_log("block_model", "Ошибка: блочная модель отсутствует.", "ошибка")
+                return
+
+            params = st.session_state.get("user_parameters", {})
+            table = self.hole_properties(grid_data, params)
+            st.session_state["block_model_lookup"] = table
+
+            grid_data = grid_data.copy()
+            for name in st.session_state["block_model"]["properties"]:
+                fallback = grid_data[name].to_numpy(dtype=float) if name in grid_data.columns else float(params.get(name, np.nan))
+                grid_data[name] = np.where(np.isfinite(table[name]), table[name], fallback)
+            st.session_state["grid_data"] = grid_data
+
+            covered = int((table[self.COVERAGE_COLUMN] > 0).sum())
+            elapsed = time.perf_counter() - started
+            self.logs_manager.add_log(
+                "block_model",
+                f"✅ Свойства пород из блочной модели: {covered} из {len(table)} скважин за {elapsed:.2f} с.",
+                "успех"
+            )
+            st.sidebar.success(f"✅ Свойства пород назначены скважинам по блочной модели: {covered} из {len(table)}.")
+            if covered < len(table):
+                st.sidebar.warning(f"⚠ Скважин вне блочной модели: {len(table) - covered}; для них оставлены параметры блока.")
+
+        except Exception as e:
+            st.sidebar.error(f"❌ Ошибка выборки свойств из блочной модели: {e}")
+            self.logs_manager.add_log("block_model", f"Ошибка выборки свойств из блочной модели: {e}", "ошибка")
@@ -0,0 +1,165 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import shapely
+import streamlit as st
+from shapely.geometry import Polygon
+
+from modules.surface_model import sample_surface
+from utils.logs_manager import LogsManager
+from utils.session_state_manager import SessionStateManager
+
+
+class BlockVolume:
+    """
+    Объем и масса горной массы блока по поверхностям кровли и подошвы уступа.
+
+    Контур блока покрывается ячейками расчетной сетки (шаг — ячейка ЦМР кровли
+    или CELL_SIZE для TIN), в центрах ячеек внутри контура берутся отметки обеих
+    поверхностей, объем — сумма мощностей × площадь ячейки. Большие блоки
+    обрабатываются полосами строк, блоки уступа — параллельно в пуле потоков
+    (NumPy и shapely освобождают GIL).
+    """
+    CELL_SIZE = 1.0
+    ROWS_PER_STRIP = 512
+    MAX_WORKERS = 4
+    BLOCK_COLUMNS = ["Блок", "block", "block_name"]
+
+    def __init__(self, session_manager: SessionStateManager, logs_manager: LogsManager):
+        self.session_manager = session_manager
+        self.logs_manager = logs_manager
+
+    def load_bench_contours(self, uploaded_file):
+        """
+        Контуры блоков уступа: .csv (Блок, X, Y) или .str с несколькими стрингами
+        (разделитель — строка с нулевыми координатами).
+        """
+        try:
+            file_extension = uploaded_file.name.split(".")[-1].lower()
+            if file_extension in ["csv", "txt"]:
+                df = pd.read_csv(uploaded_file)
+                block_column = next((col for col in self.BLOCK_COLUMNS if col in df.columns), df.columns[0])
+                coordinates = [col for col in df.columns if col != block_column][:2]
+                df = df[[block_column] + coordinates]
+                df.columns = ["Блок", "X", "Y"]
+
+            elif file_extension == "str":
+                rows, string_index = [], 0
+                for line in uploaded_file.getvalue().decode("utf-8").splitlines()[1:]:
+                    values = line.strip().split(",")
+                    if len(values) < 3 or "END" in line or all(v.strip() in ["0", "0.000", ""] for v in values[1:3]):
+                        string_index += 1
+                        continue
+                    try:
+                        rows.append([f"{values[0].strip()}-{string_index}", float(values[1]), float(values[2])])
+                    except ValueError:
+                        continue
+                df = pd.DataFrame(rows, columns=["Блок", "X", "Y"])
+
+            else:
+                st.sidebar.warning("Неподдерживаемый формат файла. Разрешены только .csv, .txt и .str")
+                return
+
+            df[["X", "Y"]] = df[["X", "Y"]].apply(pd.to_numeric, errors="coerce")
+            df = df.dropna().astype({"Блок": str})
+            counts = df.groupby("Блок")["X"].transform("size")
+            df = df[counts >= 3].reset_index(drop=True)
+
+            st.session_state["bench_contours"] = df
+            st.sidebar.success(f"Загружено контуров блоков: {df['Блок'].nunique()}.")
+            self.logs_manager.add_log("block_volume", f"Загружены контуры блоков уступа: {df['Блок'].nunique()}.", "успех")
+
+        except Exception as e:
+            st.sidebar.error(f"❌ Ошибка загрузки контуров блоков: {e}")
+            self.logs_manager.add_log("block_volume", f"Ошибка загрузки контуров блоков: {e}", "ошибка")
+
+    def cell_size(self, top):
+        return float(top["cell"]) if top["type"] == "grid" else self.CELL_SIZE
+
+    def integrate(self, polygon, cell, top_surface, floor_surface, floor_elevation):
+        """
+        Объем между кровлей и подошвой внутри полигона, м³, и площадь покрытия поверхностями, м².
+        Поверхности передаются описаниями, т.к. расчет идет в рабочих потоках без доступа к session_state.
+        """
+        shapely.prepare(polygon)
+        min_x, min_y, max_x, max_y = polygon.bounds
+        # Узлы выравниваются по сетке ЦМР, чтобы центры ячеек совпадали с узлами растра
+        x_axis = np.arange(np.floor(min_x / cell) * cell + cell / 2, max_x + cell, cell)
+        y_axis = np.arange(np.floor(min_y / cell) * cell + cell / 2, max_y + cell, cell)
+
+        volume, covered = 0.0, 0
+        for start in range(0, len(y_axis), self.ROWS_PER_STRIP):
+            grid_x, grid_y = np.meshgrid(x_axis, y_axis[start:start + self.ROWS_PER_STRIP])
+            inside = shapely.contains_xy(polygon, grid_x, grid_y)
+            x, y = grid_x[inside], grid_y[inside]
+            if len(x) == 0:
+                continue
+
+            top = sample_surface(top_surface, x, y)
+            floor = sample_surface(floor_surface, x, y) if floor_surface else np.full(len(x), floor_elevation)
+
+            thickness = top - floor
+            valid = np.isfinite(thickness)
+            volume += float(np.sum(np.maximum(thickness[valid], 0.0))) * cell ** 2
+            covered += int(valid.sum())
+        return volume, covered * cell ** 2
+
+    def block_row(self, name, contour, surfaces, cell, params):
+        polygon = Polygon(contour)
+        volume, covered_area = self.integrate(polygon, cell, surfaces["top"], surfaces.get("floor"),
+                                              float(params.get("floor_elevation", 0.0)))
+        flat_volume = polygon.area * float(params.get("H", np.nan))
+        return {
+            "Блок": name,
+            "Площадь контура, м²": polygon.area,
+            "Площадь, покрытая поверхностями, м²": covered_area,
+            "Объем по поверхностям, м³": volume,
+            "Объем (площадь × H), м³": flat_volume,
+            "Расхождение, %": (volume - flat_volume) / flat_volume * 100 if flat_volume else np.nan,
+            "Масса горной массы, т": volume * float(params.get("rho", np.nan)) / 1000,
+        }
+
+    def run(self, include_bench=True):
+        """
+        Объемы текущего блока и (при наличии) всех блоков уступа.
+        """
+        try:
+            started = time.perf_counter()
+            if "top" not in st.session_state.get("surfaces", {}):
+                st.sidebar.warning("Загрузите поверхность кровли уступа.")
+                self.logs_manager.add_log("block_volume", "Ошибка: поверхность кровли отсутствует.", "ошибка")
+                return
+
+            blocks = []
+            contour = st.session_state.get("block_contour")
+            if isinstance(contour, pd.DataFrame) and len(contour) >= 3:
+                blocks.append((st.session_state.get("block_name") or "Текущий блок", contour[["X", "Y"]].to_numpy(dtype=float)))
+            bench = st.session_state.get("bench_contours")
+            if include_bench and isinstance(bench, pd.DataFrame) and not bench.empty:
+                blocks += [(name, group[["X", "Y"]].to_numpy(dtype=float)) for name, group in bench.groupby("Блок", sort=False)]
+            if not blocks:
+                st.sidebar.warning("Нет контуров блоков для расчета объема.")
+                return
+
+            params = dict(st.session_state.get("user_parameters", {}))
+            surfaces = dict(st.session_state["surfaces"])
+            cell = self.cell_size(surfaces["top"])
+            with ThreadPoolExecutor(max_workers=self.MAX_WORKERS) as executor:
+                rows = list(executor.map(lambda block: self.block_row(block[0], block[1], surfaces, cell, params), blocks))
+
+            results = pd.DataFrame(rows)
+            st.session_state["block_volume_results"] = results
+
+            elapsed = time.perf_counter() - started
+            self.logs_manager.add_log(
+                "block_volume",
+                f"✅ Объемы по поверхностям: {len(results)} блоков, {results['Объем по поверхностям, м³'].sum():.0f} м³ за {elapsed:.2f} с.",
+                "успех"
+            )
+            st.sidebar.success(f"✅ Объем и масса рассчитаны для блоков: {len(results)} ({elapsed:.2f} с).")
+
+        except Exception as e:
+            st.sidebar.error(f"❌ Ошибка расчета объема по поверхностям: {e}")
+            self.logs_manager.add_log("block_volume", f"Ошибка расчета объема по поверхностям: {e}", "ошибка")
@@ -0,0 +1,188 @@
+import time
+
+import pandas as pd
+import streamlit as st
+
+from modules.rock_factor_calibration import RockFactorCalibration
+from utils.hashing import canonical_hash
+from utils.result_cache import ResultCache
+
+
+class CalculationNode:
+    """
+    Узел графа расчетов: метод Calculations с объявленными входами и выходами.
+
+    params — параметры из user_parameters, reference — из reference_parameters,
+    results — выходы других узлов, calibration — калибровочные коэффициенты домена породы,
+    outputs — ключи, которые узел записывает в results.
+    """
+    def __init__(self, name, outputs, params=(), reference=(), results=(), calibration=()):
+        self.name = name
+        self.outputs = list(outputs)
+        self.params = list(params)
+        self.reference = list(reference)
+        self.results = list(results)
+        self.calibration = list(calibration)
+
+
+# Граф расчетов БВР: узлы перечислены в порядке объявления, зависимости — через results
+CALCULATION_NODES = [
+    CalculationNode("calculate_rdi", outputs=["RDI"], params=["rho"]),
+    CalculationNode("calculate_hf", outputs=["HF"], params=["E", "sigma_c"]),
+    CalculationNode("calculate_a", outputs=["A"], params=["RMD"], results=["RDI", "HF"], calibration=["k_A"]),
+    CalculationNode("calculate_s_anfo", outputs=["s_ANFO"], params=["energy_vv"]),
+    CalculationNode("calculate_q", outputs=["q"], params=["Q", "H", "S", "B"]),
+    CalculationNode("calculate_x_max", outputs=["x_max"], params=["in_situ_block_size", "S", "B"]),
+    CalculationNode(
+        "calculate_n_iterative",
+        outputs=["n", "x_50", "g_n"],
+        params=["S", "B", "Ø_h", "SD", "L_b", "L_c", "L_tot", "H", "Q"],
+        reference=["target_x_50"],
+        results=["x_max", "A", "s_ANFO", "q"],
+        calibration=["k_n"],
+    ),
+    CalculationNode("calculate_g_n", outputs=["g_n"], results=["n"]),
+    CalculationNode("calculate_b", outputs=["b"], results=["x_max", "x_50", "n"]),
+]
+
+
+class CalculationGraph:
+    """
+    Граф расчетов с мемоизацией: каждый узел кэширует выходы по хэшу своих входов,
+    поэтому при изменении параметра пересчитываются только зависящие от него узлы.
+
+    Кэш двухуровневый: в session_state (текущая сессия) и на диске (ResultCache),
+    общий для всех сессий и сохраняющийся после перезапуска сервера.
+    """
+    MAX_ENTRIES_PER_NODE = 32
+
+    def __init__(self, calculator, nodes=None):
+        self.calculator = calculator
+        self.nodes = self.topological_order(nodes or CALCULATION_NODES)
+        self.result_cache = ResultCache(calculator.logs_manager)
+
+        st.session_state.setdefault("calculation_graph_cache", {})
+
+    @staticmethod
+    def topological_order(nodes):
+        """
+        Упорядочивание узлов по зависимостям (алгоритм Кана).
+
+        Вход узла связывается с последним узлом, объявившим этот выход раньше по списку
+        (или с первым после него, если выше производителя нет). Узел, повторно
+        объявляющий выход (например, g_n), выполняется после предыдущего производителя.
+        """
+        producers = {}
+        for index, node in enumerate(nodes):
+            for key in node.outputs:
+                producers.setdefault(key, []).append(index)
+
+        def producer_for(key, consumer):
+            candidates = producers.get(key, [])
+            before = [index for index in candidates if index < consumer]
+            after = [index for index in candidates if index > consumer]
+            return before[-1] if before else (after[0] if after else None)
+
+        dependencies = {}
+        for index, node in enumerate(nodes):
+            deps = {producer_for(key, index) for key in node.results}
+            deps |= {producer for key in node.outputs
+                     for producer in producers[key] if producer < index}
+            deps.discard(None)
+            deps.discard(index)
+            dependencies[index] = deps
+
+        ordered = []
+        while dependencies:
+            ready = sorted(index for index, deps in dependencies.items() if not deps)
+            if not ready:
+                raise ValueError(f"Граф расчетов содержит цикл: {[nodes[i].name for i in dependencies]}")
+            current = ready[0]
+            ordered.append(nodes[current])
+            del dependencies[current]
+            for deps in dependencies.values():
+                deps.discard(current)
+        return ordered
+
+    def node_inputs(self, node):
+        """
+        Значения входов узла: параметры, эталонные параметры, выходы предыдущих узлов
+        и калибровочные коэффициенты (их изменение также вызывает пересчет узла).
+        """
+        params = st.session_state.get("user_parameters", {})
+        reference = st.session_state.get("reference_parameters", {})
+        inputs = {
+            "params": {name: params.get(name) for name in node.params},
+            "reference": {name: reference.get(name) for name in node.reference},
+            "results": {name: self.calculator.results.get(name) for name in node.results},
+        }
+        if node.calibration:
+            factors = RockFactorCalibration.get_factors(params.get("rock_domain"))
+            inputs["calibration"] = {name: factors[name] for name in node.calibration}
+        return inputs
+
+    def run(self, progress_callback=None):
+        """
+        Выполнение графа. Возвращает отчет: статус каждого узла
+        (пересчитан / из кэша / из дискового кэша).
+        """
+        cache = st.session_state["calculation_graph_cache"]
+        session_results = st.session_state.setdefault("calculation_results", {})
+        report = []
+
+        for i, node in enumerate(self.nodes, 1):
+            started = time.perf_counter()
+            inputs = self.node_inputs(node)
+            key = canonical_hash(inputs)
+            node_cache = cache.setdefault(node.name, {})
+
+            entry = node_cache.pop(key, None)
+            status = "из кэша"
+            if entry is None:
+                entry = self.result_cache.get(f"calculations.{node.name}", inputs)
+                status = "из дискового кэша"
+
+            if entry is not None:
+                node_cache[key] = entry  # Обновляем порядок для вытеснения
+                self.calculator.results.update(entry["results"])
+                session_results.update(entry["session"])
+            else:
+                for output in node.outputs:
+                    self.calculator.results.pop(output, None)
+
+                self.calculator.logs_manager.add_log("calculations", f"Выполняется: {node.name}", "информация")
+                getattr(self.calculator, node.name)()
+
+                if all(output in self.calculator.results for output in node.outputs):
+                    entry = {
+                        "results": {output: self.calculator.results[output] for output in node.outputs},
+                        "session": {output: session_results.get(output) for output in node.outputs},
+                    }
+                    node_cache[key] = entry
+                    self.result_cache.set(f"calculations.{node.name}", inputs, entry)
+                    status = "пересчитан"
+                else:
+                    status = "ошибка"
+
+            while len(node_cache) > self.MAX_ENTRIES_PER_NODE:
+                node_cache.pop(next(iter(node_cache)))
+
+            report.append({
+                "Узел": node.name,
+                "Выходы": ", ".join(node.outputs),
+                "Статус": status,
+                "Время, мс": round((time.perf_counter() - started) * 1000, 2),
+            })
+
+            if progress_callback is not None:
+                progress_callback(i / len(self.nodes))
+
+        report_df = pd.DataFrame(report)
+        st.session_state["calculation_graph_report"] = report_df
+        return report_df
+
+    def clear_cache(self):
+        """
+        Очистка кэша всех узлов графа.
+        """
+        st.session_state["calculation_graph_cache"] = {}
@@ -7,6 +7,8 @@ import pandas as pd
 import streamlit as st
 from scipy.special import gamma
 
+from modules.calculation_graph import CalculationGraph
+from modules.rock_factor_calibration import RockFactorCalibration
 from utils.logs_manager import LogsManager
 from utils.session_state_manager import SessionStateManager
 
@@ -34,6 +36,8 @@ class Calculations:
         if "calculation_results" not in st.session_state:
             st.session_state["calculation_results"] = {}
 
+        self.graph = CalculationGraph(self)
+
     
     @error_handler
     def calculate_rdi(self):
@@ -75,7 +79,7 @@ class Calculations:
     @error_handler
     def calculate_a(self):
         """
-        Расчет A (фактор породы).
+        Расчет A (фактор породы) с калибровочным коэффициентом k_A домена породы.
         """
         RMD = self.params.get("RMD")
         RDI = self.results.get("RDI")
@@ -86,7 +90,8 @@ class Calculations:
             self.logs_manager.add_log(module="calculations", event="Ошибка: некорректные значения RMD, RDI или HF.", log_type="ошибка")
             return
 
-        self.results["A"] = 0.06 * (RMD + RDI + HF)
+        k_A = RockFactorCalibration.get_factors(self.params.get("rock_domain"))["k_A"]
+        self.results["A"] = 0.06 * (RMD + RDI + HF) * k_A
         st.session_state["calculation_results"]["A"] = self.results["A"]
         self.logs_manager.add_log(module="calculations", event=f"✅ Успешный расчет A: {self.results['A']:.2f}", log_type="успех")
         st.sidebar.success(f"✅ A успешно рассчитан: {self.results['A']:.2f}")
@@ -368,6 +373,7 @@ class Calculations:
     
         n = None
         x_50_current = x_50_ref
+        k_n = RockFactorCalibration.get_factors(self.params.get("rock_domain"))["k_n"]
     
         for iteration in range(1, max_iterations + 1):
             n = (
@@ -376,7 +382,7 @@ class Calculations:
                 (1 - SD / B) *
                 math.sqrt((1 + S / B) / 2) *
                 ((L_b - L_c) / L_tot + 0.1) ** 0.1 *
-                (L_tot / H)
+                (L_tot / H) * k_n
             )
     
             self.results["n"] = n
@@ -415,36 +421,26 @@ class Calculations:
     @error_handler
     def run_all_calculations(self):
         """
-        Запуск всех расчетов БВР последовательно с учетом итерационного подхода для n и x_50.
+        Запуск всех расчетов БВР с учетом итерационного подхода для n и x_50.
+
+        Расчеты выполняются через граф зависимостей (CalculationGraph): пересчитываются
+        только узлы, входы которых изменились с предыдущего запуска.
         """
     
         try:
             progress_bar = st.progress(0)
-            calculation_steps = [
-                self.calculate_rdi,
-                self.calculate_hf,
-                self.calculate_a,
-                self.calculate_s_anfo,
-                self.calculate_q,
-                self.calculate_x_max,
-                self.calculate_n_iterative,  # Итерационный расчёт n и x_50
-                self.calculate_g_n,           # Перерасчёт g_n после итераций
-                self.calculate_b,
-            ]
-    
-            for i, step in enumerate(calculation_steps, 1):
-                step_name = step.__name__
-                self.logs_manager.add_log("calculations", f"Выполняется: {step_name}", "информация")
-                step()
-                progress_bar.progress(i / len(calculation_steps))
-    
-            self.logs_manager.add_log("calculations", "✅ Все расчеты БВР успешно выполнены.", "успех")
-            st.sidebar.success("✅ Все расчеты БВР успешно выполнены и сохранены.")
-        # except Exception as e:
-        #     self.logs_manager.add_log("calculations", f"Ошибка при расчетах БВР: {str(e)}", "ошибка")
-        #     st.sidebar.error(f"❌ Ошибка при выполнении расчетов БВР: {e}")
 
+            # Граф расчетов: узлы с неизменившимися входами берутся из кэша
+            report = self.graph.run(progress_callback=progress_bar.progress)
 
+            recalculated = int((report["Статус"] == "пересчитан").sum())
+            cached = int(report["Статус"].isin(["из кэша", "из дискового кэша"]).sum())
+            self.logs_manager.add_log(
+                "calculations",
+                f"✅ Все расчеты БВР успешно выполнены (пересчитано узлов: {recalculated}, из кэша: {cached}).",
+                "успех"
+            )
+            st.sidebar.success(f"✅ Все расчеты БВР выполнены: пересчитано узлов — {recalculated}, из кэша — {cached}.")
 
             # 1. Итоговые параметры БВР
             block_name = st.session_state.get("block_name", "Без названия")
@@ -476,6 +472,10 @@ class Calculations:
             # Преобразуем в DataFrame и сортируем
             df = pd.DataFrame(results_data, columns=["Параметр", "Значение", "Ед. изм.", "Порядок"]).sort_values("Порядок")
             st.markdown(df[["Параметр", "Значение", "Ед. изм."]].to_html(index=False), unsafe_allow_html=True)
+
+            # Отчет графа расчетов: какие узлы пересчитаны, какие взяты из кэша
+            st.subheader("Граф расчетов: пересчитанные и кэшированные узлы")
+            st.dataframe(report, use_container_width=True)
             
             
             # 2. Исходные параметры
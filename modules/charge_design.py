@@ -0,0 +1,152 @@
+import io
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import streamlit as st
+
+from utils.logs_manager import LogsManager
+from utils.session_state_manager import SessionStateManager
+
+
+CHARGE_PARAMETERS = ["H", "subdrill", "L_tot", "Ø_h", "rho_vv", "Q"]
+
+
+def hole_charges(grid_data, params):
+    """
+    Заряд по скважинам: длина скважины, длина заряда, забойка, м, линейная плотность, кг/м,
+    и масса ВВ, кг. Колонка заряда — L_tot (не длиннее скважины), забойка — остаток
+    длины скважины; масса — вместимость колонки, но не более Q. Столбцы grid_data
+    с именами параметров имеют приоритет над параметрами блока.
+    """
+    def column(name):
+        if name in grid_data.columns:
+            return grid_data[name].to_numpy(dtype=float)
+        return np.full(len(grid_data), float(params[name]))
+
+    hole_length = column("H") + column("subdrill")
+    charge_length = np.clip(column("L_tot"), 0.0, np.maximum(hole_length, 0.0))
+    linear_density = column("rho_vv") * np.pi * (column("Ø_h") / 1000) ** 2 / 4
+    return {
+        "hole_length": hole_length,
+        "charge_length": charge_length,
+        "stemming": hole_length - charge_length,
+        "linear_density": linear_density,
+        "mass": np.minimum(linear_density * charge_length, column("Q")),
+    }
+
+
+class ChargeDesign:
+    """
+    Паспорт заряжания по скважинам сетки.
+
+    Длина скважины — H скважины плюс перебур; колонка заряда — L_tot, забойка —
+    остаток длины скважины, поэтому при отклонении H от проектного меняется
+    забойка. Масса ВВ — линейная плотность заряда ρ_ВВ·π·Ø_h²/4 на длину заряда,
+    но не более Q. Все величины считаются столбцами NumPy (hole_charges).
+    """
+    REQUIRED_PARAMETERS = ["H", "S", "B", "subdrill", "L_b", "L_tot", "Ø_h", "rho_vv", "Q", "energy_vv"]
+    MASS_COLUMN = "Масса ВВ, кг"
+
+    def __init__(self, session_manager: SessionStateManager, logs_manager: LogsManager):
+        self.session_manager = session_manager
+        self.logs_manager = logs_manager
+
+    def hole_values(self, grid_data, params, name):
+        """
+        Значение параметра по скважинам: столбец grid_data или параметр блока.
+        """
+        if name in grid_data.columns:
+            return grid_data[name].to_numpy(dtype=float)
+        return np.full(len(grid_data), float(params[name]))
+
+    def design_table(self, grid_data, params):
+        """
+        Таблица заряжания (скважина — строка) и итоги по блоку.
+        """
+        H = self.hole_values(grid_data, params, "H")
+        charges = hole_charges(grid_data, params)
+        hole_length, charge_length, mass = charges["hole_length"], charges["charge_length"], charges["mass"]
+        bottom_charge = np.minimum(self.hole_values(grid_data, params, "L_b"), charge_length)
+        column_charge = charge_length - bottom_charge
+        rock_volume = float(params["S"]) * float(params["B"]) * H
+        with np.errstate(divide="ignore", invalid="ignore"):
+            specific_charge = np.where(rock_volume > 0, mass / rock_volume, np.nan)
+
+        table = pd.DataFrame({
+            "ID": grid_data["ID"].to_numpy(),
+            "X": grid_data["X"].to_numpy(dtype=float),
+            "Y": grid_data["Y"].to_numpy(dtype=float),
+            "Высота уступа H, м": H,
+            "Перебур, м": self.hole_values(grid_data, params, "subdrill"),
+            "Длина скважины, м": hole_length,
+            "Забойка, м": charges["stemming"],
+            "Нижний заряд, м": bottom_charge,
+            "Колонковый заряд, м": column_charge,
+            "Длина заряда, м": charge_length,
+            "Линейная плотность заряда, кг/м": charges["linear_density"],
+            self.MASS_COLUMN: mass,
+            "Энергия, МДж": mass * float(params["energy_vv"]),
+            "Удельный расход, кг/м³": specific_charge,
+        })
+
+        totals = {
+            "Количество скважин": len(table),
+            "Объем бурения, м": float(hole_length.sum()),
+            "Масса ВВ, кг": float(mass.sum()),
+            "Энергия, МДж": float(mass.sum() * float(params["energy_vv"])),
+            "Средний удельный расход, кг/м³": float(mass.sum() / rock_volume.sum()) if rock_volume.sum() > 0 else np.nan,
+            "Скважин без заряда": int((charge_length <= 0).sum()),
+        }
+        return table, totals
+
+    def run(self):
+        """
+        Расчет паспорта заряжания по grid_data.
+        """
+        try:
+            started = time.perf_counter()
+            grid_data = st.session_state.get("grid_data")
+            if grid_data is None or grid_data.empty:
+                st.sidebar.warning("Сетка скважин не сгенерирована. Сначала выполните генерацию сетки.")
+                self.logs_manager.add_log("charge_design", "Ошибка: сетка скважин отсутствует.", "ошибка")
+                return
+
+            params = st.session_state.get("user_parameters", {})
+            missing = [name for name in self.REQUIRED_PARAMETERS if not isinstance(params.get(name), (int, float))]
+            if missing:
+                st.sidebar.error(f"❌ Ошибка: отсутствуют параметры: {', '.join(missing)}.")
+                self.logs_manager.add_log("charge_design", f"Ошибка: отсутствуют параметры {missing}.", "ошибка")
+                return
+
+            table, totals = self.design_table(grid_data, params)
+            SessionStateManager.set_grid_table("charge_design", table, grid_data)
+            st.session_state["charge_design_totals"] = totals
+
+            elapsed = time.perf_counter() - started
+            self.logs_manager.add_log(
+                "charge_design",
+                f"✅ Паспорт заряжания: {len(table)} скважин, {totals['Масса ВВ, кг']:.0f} кг ВВ за {elapsed:.3f} с.",
+                "успех"
+            )
+            st.sidebar.success(f"✅ Паспорт заряжания рассчитан: {len(table)} скважин.")
+            if totals["Скважин без заряда"]:
+                st.sidebar.warning(f"⚠ Скважин без заряда (нулевая длина скважины или заряда): {totals['Скважин без заряда']}.")
+
+        except Exception as e:
+            st.sidebar.error(f"❌ Ошибка расчета паспорта заряжания: {e}")
+            self.logs_manager.add_log("charge_design", f"Ошибка расчета паспорта заряжания: {e}", "ошибка")
+
+    def export_table(self, table, file_format):
+        """
+        Таблица заряжания в байтах (.csv — UTF-8 с BOM для Excel, .parquet); запись через pyarrow.
+        """
+        buffer = io.BytesIO()
+        if file_format == "parquet":
+            table.to_parquet(buffer, index=False)
+        else:
+            buffer.write("\ufeff".encode("utf-8"))
+            pa_csv.write_csv(pa.Table.from_pandas(table, preserve_index=False), buffer)
+        return buffer.getvalue()
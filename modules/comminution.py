@@ -0,0 +1,193 @@
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+
+from modules import psd_engine
+from utils.logs_manager import LogsManager
+from utils.session_state_manager import SessionStateManager
+
+
+PROCESSING_PARAMETERS = ["crusher_gap", "crusher_power", "Wi_crusher", "mill_power", "Wi_mill", "mill_product_p80"]
+
+
+def bond_energy(work_index, f_80, p_80):
+    """
+    Удельная энергия по закону Бонда, кВт·ч/т: W = 10·Wi·(1/√P80 − 1/√F80), размеры в мм (переводятся в мкм).
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        energy = 10 * work_index * (1 / np.sqrt(np.asarray(p_80) * 1000) - 1 / np.sqrt(np.asarray(f_80) * 1000))
+    return np.maximum(energy, 0.0)
+
+
+class Comminution:
+    """
+    Оценка производительности цепочки «взрыв — дробление — измельчение» по прогнозной PSD.
+
+    F80 питания и P80 продукта дробилки вычисляются в замкнутой форме по кривой Swebrec
+    (векторно для любого числа вариантов), далее по закону Бонда рассчитываются удельная
+    энергия и производительность первичной дробилки и мельницы; производительность
+    цепочки — по узкому месту. Частицы разыгрываются только для гистограмм крупности.
+    """
+    N_PARTICLES = 2_000_000
+    CHUNK_PARTICLES = 500_000
+    OUTPUT_COLUMNS = {
+        "f_80": "F80 питания дробилки, мм",
+        "oversize": "Доля крупнее щели дробилки, %",
+        "crusher_p_80": "P80 продукта дробилки, мм",
+        "crusher_energy": "Удельная энергия дробления, кВт·ч/т",
+        "crusher_throughput": "Производительность дробилки, т/ч",
+        "mill_energy": "Удельная энергия измельчения, кВт·ч/т",
+        "mill_throughput": "Производительность мельницы, т/ч",
+        "throughput": "Производительность цепочки, т/ч",
+    }
+
+    def __init__(self, session_manager: SessionStateManager, logs_manager: LogsManager):
+        self.session_manager = session_manager
+        self.logs_manager = logs_manager
+
+    def sample_swebrec(self, u, x_50, x_max, b):
+        """
+        Обратное преобразование кривой Swebrec в замкнутой форме: u ~ U(0, 100) → x = P⁻¹(u).
+        """
+        return np.concatenate([
+            psd_engine.swebrec_inverse(u[start:start + self.CHUNK_PARTICLES], x_50, x_max, b)[0]
+            for start in range(0, len(u), self.CHUNK_PARTICLES)
+        ])
+
+    def performance(self, x_50, x_max, b, params):
+        """
+        Показатели дробления и измельчения для вариантов с параметрами Swebrec (массивы): {столбец: массив}.
+
+        F80 = P⁻¹(80 %). Дробилка пропускает частицы мельче щели и дробит крупные до размера
+        щели, поэтому P80 продукта = min(F80, щель), доля крупнее щели = 100 − P(щель);
+        производительность узла — установленная мощность / удельная энергия Бонда.
+        """
+        gap = params["crusher_gap"]
+        f_80 = psd_engine.swebrec_inverse([80.0], x_50, x_max, b)[:, 0]
+        oversize = 100 - psd_engine.psd_matrix([gap], x_50, x_max, b)[:, 0]
+        crusher_p_80 = np.minimum(f_80, gap)
+
+        crusher_energy = bond_energy(params["Wi_crusher"], f_80, crusher_p_80)
+        mill_energy = bond_energy(params["Wi_mill"], crusher_p_80, params["mill_product_p80"])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            crusher_throughput = np.where(crusher_energy > 0, params["crusher_power"] / crusher_energy, np.inf)
+            mill_throughput = params["mill_power"] / mill_energy
+
+        # Некорректные наборы параметров (F80 = NaN) не дают показателей
+        valid = np.isfinite(f_80)
+        outputs = {
+            "f_80": f_80,
+            "oversize": oversize,
+            "crusher_p_80": crusher_p_80,
+            "crusher_energy": crusher_energy,
+            "crusher_throughput": crusher_throughput,
+            "mill_energy": mill_energy,
+            "mill_throughput": mill_throughput,
+            "throughput": np.minimum(crusher_throughput, mill_throughput),
+        }
+        return {self.OUTPUT_COLUMNS[name]: np.where(valid, value, np.nan) for name, value in outputs.items()}
+
+    def get_processing_parameters(self):
+        params = st.session_state.get("user_parameters", {})
+        missing = [name for name in PROCESSING_PARAMETERS if not isinstance(params.get(name), (int, float))]
+        return {name: float(params[name]) for name in PROCESSING_PARAMETERS if name not in missing}, missing
+
+    def run(self, n_particles=None, seed=None):
+        """
+        Расчет по рассчитанным параметрам кривой Swebrec (x_50, x_max, b из calculation_results).
+        """
+        try:
+            started = time.perf_counter()
+            results = st.session_state.get("calculation_results", {})
+            if not all(isinstance(results.get(name), (int, float)) for name in ("x_50", "x_max", "b")):
+                st.sidebar.warning("Нет рассчитанных параметров кривой (x_50, x_max, b). Сначала выполните расчеты.")
+                self.logs_manager.add_log("comminution", "Ошибка: x_50, x_max, b отсутствуют в calculation_results.", "ошибка")
+                return
+
+            params, missing = self.get_processing_parameters()
+            if missing:
+                st.sidebar.error(f"❌ Ошибка: отсутствуют параметры переработки: {', '.join(missing)}.")
+                self.logs_manager.add_log("comminution", f"Ошибка: отсутствуют параметры {missing}.", "ошибка")
+                return
+
+            x_50, x_max, b = results["x_50"], results["x_max"], results["b"]
+            summary = {name: float(value[0]) for name, value in self.performance(x_50, x_max, b, params).items()}
+            if not np.isfinite(summary[self.OUTPUT_COLUMNS["f_80"]]):
+                raise ValueError("некорректные параметры кривой Swebrec")
+
+            # Выборка частиц — только для гистограмм крупности
+            sampling_started = time.perf_counter()
+            rng = np.random.default_rng(seed)
+            particles = self.sample_swebrec(rng.random(n_particles or self.N_PARTICLES) * 100, x_50, x_max, b)
+            sampling_time = time.perf_counter() - sampling_started
+
+            bins = np.geomspace(max(particles.min(), psd_engine.FINE_SCALE_MIN), particles.max() * 1.001, 80)
+            st.session_state["comminution_results"] = {
+                "summary": pd.DataFrame({"Показатель": list(summary), "Значение": list(summary.values())}),
+                "bins": bins,
+                "feed_histogram": np.histogram(particles, bins)[0] / len(particles) * 100,
+                "product_histogram": np.histogram(np.minimum(particles, params["crusher_gap"]), bins)[0] / len(particles) * 100,
+                "n_particles": len(particles),
+                "sampling_time": sampling_time,
+            }
+
+            throughput = summary[self.OUTPUT_COLUMNS["throughput"]]
+            elapsed = time.perf_counter() - started
+            self.logs_manager.add_log(
+                "comminution",
+                f"✅ Производительность рассчитана: {throughput:.0f} т/ч "
+                f"(гистограммы по {len(particles)} частицам, розыгрыш {sampling_time:.2f} с, всего {elapsed:.2f} с).",
+                "успех"
+            )
+            st.sidebar.success(f"✅ Производительность цепочки: {throughput:.0f} т/ч.")
+
+        except Exception as e:
+            st.sidebar.error(f"❌ Ошибка расчета производительности: {e}")
+            self.logs_manager.add_log("comminution", f"Ошибка расчета производительности: {e}", "ошибка")
+
+    def evaluate_designs(self, designs):
+        """
+        Производительность для вариантов с параметрами Swebrec (столбцы "x_50, мм", "x_max, мм", "b"),
+        одним векторным расчетом по всем вариантам.
+        """
+        params, missing = self.get_processing_parameters()
+        if missing:
+            raise ValueError(f"отсутствуют параметры переработки: {', '.join(missing)}")
+
+        x_50, x_max, b = designs[["x_50, мм", "x_max, мм", "b"]].to_numpy(dtype=float).T
+        performance = pd.DataFrame(self.performance(x_50, x_max, b, params))
+        return pd.concat([designs.reset_index(drop=True), performance], axis=1)
+
+    def visualize(self):
+        """
+        Таблица показателей и распределение массы частиц до и после дробилки.
+        """
+        try:
+            results = st.session_state.get("comminution_results")
+            if not results:
+                st.sidebar.warning("Нет результатов расчета производительности.")
+                return
+
+            st.subheader("Производительность дробления и измельчения (модель Бонда)")
+            st.caption(f"Частиц в выборке для гистограмм: {results['n_particles']:,}, время розыгрыша: {results['sampling_time']:.2f} с.")
+            summary = results["summary"].copy()
+            summary["Значение"] = summary["Значение"].map(lambda v: "не ограничивает" if np.isinf(v) else f"{v:.3f}")
+            st.table(summary)
+
+            centers = np.sqrt(results["bins"][1:] * results["bins"][:-1])
+            fig = go.Figure()
+            fig.add_trace(go.Bar(x=centers, y=results["feed_histogram"], name="Взорванная горная масса", opacity=0.6))
+            fig.add_trace(go.Bar(x=centers, y=results["product_histogram"], name="Продукт дробилки", opacity=0.6))
+            fig.update_layout(title="Распределение массы по крупности",
+                              xaxis_title="Размер фрагмента (мм)",
+                              yaxis_title="Доля массы, %",
+                              xaxis_type="log",
+                              barmode="overlay")
+            st.plotly_chart(fig)
+
+        except Exception as e:
+            st.sidebar.error(f"Ошибка визуализации производительности: {e}")
+            self.logs_manager.add_log("comminution", f"Ошибка визуализации производительности: {e}", "ошибка")
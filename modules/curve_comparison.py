@@ -0,0 +1,204 @@
+import time
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from modules import kuzram_model, psd_engine
+from modules.rock_factor_calibration import RockFactorCalibration
+from utils.logs_manager import LogsManager
+from utils.session_state_manager import SessionStateManager
+
+
+METRICS = {
+    "rmse": "RMSE, %",
+    "ks": "Макс. отклонение (KS), %",
+    "area": "Площадь между кривыми, %·декада",
+    "p80_error": "Ошибка P80, %",
+}
+
+
+def comparison_metrics(reference, candidates, scale, reference_p80, candidate_p80):
+    """
+    Метрики отклонения кандидатов от эталона на общей шкале.
+
+    reference — (M,), candidates — (K, M) P(x), %; scale — (M,) размеры, мм.
+    Возвращает словарь массивов длины K: RMSE, максимум |ΔP| (статистика
+    Колмогорова–Смирнова), площадь между кривыми по lg(x) и относительная ошибка P80.
+    """
+    difference = np.abs(candidates - reference)
+    log_scale = np.log10(scale)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return {
+            "rmse": np.sqrt(np.mean(difference ** 2, axis=1)),
+            "ks": np.max(difference, axis=1),
+            "area": np.sum((difference[:, 1:] + difference[:, :-1]) / 2 * np.diff(log_scale), axis=1),
+            "p80_error": (candidate_p80 - reference_p80) / reference_p80 * 100,
+        }
+
+
+class CurveComparison:
+    """
+    Количественное сравнение кривых PSD с эталонной и ранжирование вариантов
+    (вариантов параметров БВР или кривых из истории) по метрикам отклонения.
+    """
+    N_SCALE_POINTS = 400
+    CHUNK_SIZE = 4096
+    MAX_CANDIDATES = 1_000_000
+
+    def __init__(self, session_manager: SessionStateManager, logs_manager: LogsManager):
+        self.session_manager = session_manager
+        self.logs_manager = logs_manager
+
+    def reference_curve(self):
+        """
+        Параметры эталонной кривой (target_x_50, target_x_max, target_b) или None.
+        """
+        params = st.session_state.get("reference_parameters", {})
+        values = [params.get(key) for key in ("target_x_50", "target_x_max", "target_b")]
+        if any(not isinstance(value, (int, float)) for value in values):
+            return None
+        return tuple(float(value) for value in values)
+
+    def score_candidates(self, x_50, x_max, b, reference=None):
+        """
+        Метрики для K кандидатов Swebrec (массивы x_50, x_max, b) против эталона.
+
+        Общая шкала — логарифмическая от 0.07 мм до наибольшего x_max; кандидаты
+        обрабатываются блоками по CHUNK_SIZE, поэтому память не зависит от K.
+        """
+        reference = reference or self.reference_curve()
+        x_50, x_max, b = (np.atleast_1d(np.asarray(v, dtype=float)) for v in (x_50, x_max, b))
+        ref_x_50, ref_x_max, ref_b = reference
+
+        top = np.nanmax(np.append(x_max[np.isfinite(x_max)], ref_x_max))
+        scale = np.geomspace(psd_engine.FINE_SCALE_MIN, top, self.N_SCALE_POINTS)
+        reference_p = psd_engine.psd_matrix(scale, ref_x_50, ref_x_max, ref_b)[0]
+        reference_p80 = psd_engine.swebrec_inverse([80], ref_x_50, ref_x_max, ref_b)[0, 0]
+        candidate_p80 = psd_engine.swebrec_inverse([80], x_50, x_max, b)[:, 0]
+
+        metrics = {key: np.empty(len(x_50)) for key in METRICS}
+        for start in range(0, len(x_50), self.CHUNK_SIZE):
+            stop = start + self.CHUNK_SIZE
+            candidates = psd_engine.psd_matrix(scale, x_50[start:stop], x_max[start:stop], b[start:stop])
+            chunk = comparison_metrics(reference_p, candidates, scale, reference_p80, candidate_p80[start:stop])
+            for key in METRICS:
+                metrics[key][start:stop] = chunk[key]
+        return metrics
+
+    def rank(self, candidates, metrics, sort_by="rmse"):
+        """
+        Таблица кандидатов с метриками и рангами; общий ранг — средний ранг по всем метрикам.
+        """
+        table = candidates.reset_index(drop=True).copy()
+        for key, label in METRICS.items():
+            table[label] = metrics[key]
+
+        ranks = pd.DataFrame({key: pd.Series(np.abs(metrics[key])).rank(method="min") for key in METRICS})
+        table["Средний ранг"] = ranks.mean(axis=1)
+        table["Ранг"] = ranks[sort_by] if sort_by in ranks else table["Средний ранг"].rank(method="min")
+        return table.sort_values(["Ранг", "Средний ранг"], na_position="last").reset_index(drop=True)
+
+    def sweep_candidates(self, sweep):
+        """
+        Варианты параметров БВР: декартово произведение значений из sweep
+        ({параметр: массив значений}) при остальных параметрах проекта.
+        """
+        params = st.session_state.get("user_parameters", {})
+        names = list(sweep)
+        n_candidates = int(np.prod([len(np.atleast_1d(sweep[name])) for name in names], dtype=np.int64))
+        if n_candidates > self.MAX_CANDIDATES:
+            raise ValueError(f"слишком много вариантов: {n_candidates} (допускается не более {self.MAX_CANDIDATES}); "
+                             f"уменьшите число значений параметров")
+        grids = np.meshgrid(*[np.asarray(sweep[name], dtype=float) for name in names], indexing="ij")
+        inputs = {name: float(params[name]) for name in kuzram_model.CHAIN_INPUTS}
+        inputs.update({name: grid.ravel() for name, grid in zip(names, grids)})
+        return pd.DataFrame({name: grid.ravel() for name, grid in zip(names, grids)}), inputs
+
+    def run_chain_chunked(self, inputs, x_50_ref, factors=None):
+        """
+        Цепочка расчетов для вариантов блоками по CHUNK_SIZE: x_50, x_max, b.
+        factors — калибровочные коэффициенты домена {"k_A", "k_n"}.
+        """
+        n_candidates = max(np.size(value) for value in inputs.values())
+        outputs = {key: np.empty(n_candidates) for key in ("x_50", "x_max", "b")}
+        for start in range(0, n_candidates, self.CHUNK_SIZE):
+            stop = start + self.CHUNK_SIZE
+            chunk = {name: value[start:stop] if np.ndim(value) else value for name, value in inputs.items()}
+            results = kuzram_model.run_chain(chunk, x_50_ref, **(factors or {}))
+            for key in outputs:
+                outputs[key][start:stop] = np.broadcast_to(results[key], (min(stop, n_candidates) - start,))
+        return outputs
+
+    def run_sweep_comparison(self, sweep, sort_by="rmse"):
+        """
+        Расчет вариантов по цепочке Кузнецова–Рамлера и ранжирование по близости к эталону.
+        """
+        try:
+            started = time.perf_counter()
+            reference = self.reference_curve()
+            if reference is None:
+                st.sidebar.error("❌ Ошибка: эталонные параметры кривой не заданы.")
+                self.logs_manager.add_log("curve_comparison", "Ошибка: отсутствуют эталонные параметры.", "ошибка")
+                return
+
+            params = st.session_state.get("user_parameters", {})
+            missing = [name for name in kuzram_model.CHAIN_INPUTS if not isinstance(params.get(name), (int, float))]
+            if missing:
+                st.sidebar.error(f"❌ Ошибка: отсутствуют параметры: {', '.join(missing)}.")
+                self.logs_manager.add_log("curve_comparison", f"Ошибка: отсутствуют параметры {missing}.", "ошибка")
+                return
+
+            candidates, inputs = self.sweep_candidates(sweep)
+            factors = RockFactorCalibration.get_factors(params.get("rock_domain"))
+            results = self.run_chain_chunked(inputs, reference[0], factors)
+            candidates["x_50, мм"] = results["x_50"]
+            candidates["x_max, мм"] = results["x_max"]
+            candidates["b"] = results["b"]
+
+            metrics = self.score_candidates(results["x_50"], results["x_max"], results["b"], reference)
+            st.session_state["curve_comparison_results"] = self.rank(candidates, metrics, sort_by)
+
+            elapsed = time.perf_counter() - started
+            self.logs_manager.add_log(
+                "curve_comparison", f"✅ Сравнено с эталоном вариантов: {len(candidates)} за {elapsed:.2f} с.", "успех"
+            )
+            st.sidebar.success(f"✅ Сравнено вариантов: {len(candidates)} за {elapsed:.2f} с.")
+
+        except Exception as e:
+            st.sidebar.error(f"❌ Ошибка сравнения кривых: {e}")
+            self.logs_manager.add_log("curve_comparison", f"Ошибка сравнения кривых: {e}", "ошибка")
+
+    def run_measured_comparison(self, sort_by="rmse"):
+        """
+        Ранжирование измеренных взрывов (подобранные кривые Swebrec) по близости к эталону.
+        """
+        try:
+            reference = self.reference_curve()
+            fits = st.session_state.get("psd_fit_results")
+            if reference is None or not isinstance(fits, pd.DataFrame) or fits.empty:
+                st.sidebar.warning("Нет эталонных параметров или подобранных измеренных кривых.")
+                return
+
+            metrics = self.score_candidates(
+                fits["Swebrec x_50, мм"], fits["Swebrec x_max, мм"], fits["Swebrec b"], reference
+            )
+            candidates = fits[["Взрыв", "Swebrec x_50, мм", "Swebrec x_max, мм", "Swebrec b"]]
+            st.session_state["curve_comparison_results"] = self.rank(candidates, metrics, sort_by)
+            self.logs_manager.add_log("curve_comparison", f"✅ Сравнено с эталоном взрывов: {len(fits)}.", "успех")
+
+        except Exception as e:
+            st.sidebar.error(f"❌ Ошибка сравнения кривых: {e}")
+            self.logs_manager.add_log("curve_comparison", f"Ошибка сравнения кривых: {e}", "ошибка")
+
+    def calculated_vs_reference(self):
+        """
+        Метрики для текущей рассчитанной кривой (calculation_results) против эталонной.
+        """
+        reference = self.reference_curve()
+        results = st.session_state.get("calculation_results", {})
+        if reference is None or any(not isinstance(results.get(key), (int, float)) for key in ("x_50", "x_max", "b")):
+            return None
+
+        metrics = self.score_candidates(results["x_50"], results["x_max"], results["b"], reference)
+        return pd.DataFrame({"Метрика": list(METRICS.values()), "Значение": [float(metrics[key][0]) for key in METRICS]})
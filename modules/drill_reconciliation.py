@@ -0,0 +1,203 @@
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+from scipy.spatial import cKDTree
+
+from utils.logs_manager import LogsManager
+from utils.session_state_manager import SessionStateManager
+
+
+class DrillReconciliation:
+    """
+    Сверка фактически пробуренных скважин (маркшейдерская съемка устьев) с проектной сеткой.
+
+    Каждая фактическая скважина сопоставляется с ближайшей проектной по k-d дереву
+    в пределах допуска; если на одну проектную скважину приходится несколько
+    фактических, сопоставляется ближайшая, остальные считаются лишними.
+    """
+    COORDINATE_COLUMNS = ["X", "Y"]
+    BLOCK_COLUMNS = ["Блок", "block", "block_name"]
+    STATUS_COLUMN = "Статус"
+
+    def __init__(self, session_manager: SessionStateManager, logs_manager: LogsManager):
+        self.session_manager = session_manager
+        self.logs_manager = logs_manager
+
+    def load_as_drilled(self, source, file_name):
+        """
+        Загрузка съемки (.csv/.txt/.parquet): столбцы X, Y, необязательные ID, Z и блок.
+        """
+        try:
+            file_extension = file_name.split(".")[-1].lower()
+            if file_extension == "parquet":
+                df = pd.read_parquet(source)
+            elif file_extension in ["csv", "txt"]:
+                df = pd.read_csv(source, engine="pyarrow")
+            else:
+                st.sidebar.warning("Неподдерживаемый формат файла. Разрешены только .csv, .txt и .parquet")
+                return
+
+            df.columns = [str(col).strip() for col in df.columns]
+            if not set(self.COORDINATE_COLUMNS).issubset(df.columns):
+                st.sidebar.error("❌ Ошибка: в файле съемки нет столбцов X и Y.")
+                self.logs_manager.add_log("drill_reconciliation", f"Ошибка: нет столбцов X, Y в {file_name}.", "ошибка")
+                return
+
+            df[self.COORDINATE_COLUMNS] = df[self.COORDINATE_COLUMNS].apply(pd.to_numeric, errors="coerce")
+            df = df.dropna(subset=self.COORDINATE_COLUMNS).reset_index(drop=True)
+            if "ID" not in df.columns:
+                df.insert(0, "ID", np.arange(1, len(df) + 1))
+
+            st.session_state["as_drilled"] = df
+            st.sidebar.success(f"Загружено фактических скважин: {len(df)}.")
+            self.logs_manager.add_log("drill_reconciliation", f"Загружена съемка скважин {file_name}: {len(df)}.", "успех")
+
+        except Exception as e:
+            st.sidebar.error(f"❌ Ошибка загрузки съемки скважин: {e}")
+            self.logs_manager.add_log("drill_reconciliation", f"Ошибка загрузки съемки скважин: {e}", "ошибка")
+
+    def block_holes(self, as_drilled):
+        """
+        Фактические скважины текущего блока (если в съемке есть столбец блока).
+        """
+        block_column = next((col for col in self.BLOCK_COLUMNS if col in as_drilled.columns), None)
+        block_name = st.session_state.get("block_name")
+        if block_column is None or not block_name:
+            return as_drilled
+        return as_drilled[as_drilled[block_column].astype(str) == str(block_name)].reset_index(drop=True)
+
+    def match(self, design_xy, drilled_xy, max_distance):
+        """
+        Индекс сопоставленной проектной скважины для каждой фактической (-1 — лишняя) и расстояние.
+        """
+        distance, nearest = cKDTree(design_xy).query(drilled_xy, distance_upper_bound=max_distance)
+        matched = np.isfinite(distance)
+
+        # Из нескольких фактических скважин на одну проектную оставляется ближайшая
+        candidates = np.flatnonzero(matched)
+        order = candidates[np.argsort(distance[candidates], kind="stable")]
+        _, first = np.unique(nearest[order], return_index=True)
+        keep = np.zeros(len(drilled_xy), dtype=bool)
+        keep[order[first]] = True
+
+        return np.where(keep, nearest, -1), np.where(keep, distance, np.nan)
+
+    def reconcile(self, grid_data, drilled, max_distance):
+        """
+        Таблица проектных скважин с отклонениями, таблица лишних скважин и сводка.
+        """
+        design_xy = grid_data[self.COORDINATE_COLUMNS].to_numpy(dtype=float)
+        drilled_xy = drilled[self.COORDINATE_COLUMNS].to_numpy(dtype=float)
+        design_index, distance = self.match(design_xy, drilled_xy, max_distance)
+
+        matched = design_index >= 0
+        actual = np.full((len(grid_data), 2), np.nan)
+        actual[design_index[matched]] = drilled_xy[matched]
+        actual_id = pd.Series(pd.NA, index=range(len(grid_data)), dtype="object")
+        actual_id.iloc[design_index[matched]] = drilled["ID"].to_numpy()[matched]
+
+        table = grid_data[["ID"] + self.COORDINATE_COLUMNS].reset_index(drop=True).copy()
+        table["ID факт."] = actual_id.to_numpy()
+        table["X факт."] = actual[:, 0]
+        table["Y факт."] = actual[:, 1]
+        table["ΔX, м"] = actual[:, 0] - design_xy[:, 0]
+        table["ΔY, м"] = actual[:, 1] - design_xy[:, 1]
+        table["Отклонение, м"] = np.hypot(table["ΔX, м"], table["ΔY, м"])
+        table[self.STATUS_COLUMN] = np.where(np.isfinite(actual[:, 0]), "пробурена", "не пробурена")
+        extra = drilled[~matched].reset_index(drop=True)
+
+        errors = table["Отклонение, м"].dropna()
+        summary = {
+            "Блок": st.session_state.get("block_name") or "—",
+            "Проектных скважин": len(grid_data),
+            "Фактических скважин": len(drilled),
+            "Сопоставлено": int(matched.sum()),
+            "Не пробурено": int((~np.isfinite(actual[:, 0])).sum()),
+            "Лишних скважин": len(extra),
+            "Среднее отклонение, м": float(errors.mean()) if len(errors) else np.nan,
+            "P95 отклонения, м": float(errors.quantile(0.95)) if len(errors) else np.nan,
+            "Макс. отклонение, м": float(errors.max()) if len(errors) else np.nan,
+        }
+        return table, extra, summary
+
+    def run(self, max_distance):
+        """
+        Сверка загруженной съемки с grid_data.
+        """
+        try:
+            started = time.perf_counter()
+            grid_data = st.session_state.get("grid_data")
+            as_drilled = st.session_state.get("as_drilled")
+            if grid_data is None or grid_data.empty:
+                st.sidebar.warning("Сетка скважин не сгенерирована. Сначала выполните генерацию сетки.")
+                self.logs_manager.add_log("drill_reconciliation", "Ошибка: сетка скважин отсутствует.", "ошибка")
+                return
+            if not isinstance(as_drilled, pd.DataFrame) or as_drilled.empty:
+                st.sidebar.warning("Загрузите съемку фактически пробуренных скважин.")
+                self.logs_manager.add_log("drill_reconciliation", "Ошибка: съемка скважин отсутствует.", "ошибка")
+                return
+
+            drilled = self.block_holes(as_drilled)
+            table, extra, summary = self.reconcile(grid_data, drilled, max_distance)
+            st.session_state["drill_reconciliation"] = {"table": table, "extra": extra, "summary": summary}
+
+            elapsed = time.perf_counter() - started
+            self.logs_manager.add_log(
+                "drill_reconciliation",
+                f"✅ Сверка бурения: сопоставлено {summary['Сопоставлено']}, не пробурено {summary['Не пробурено']}, "
+                f"лишних {summary['Лишних скважин']} ({elapsed:.2f} с).",
+                "успех"
+            )
+            st.sidebar.success(f"✅ Сверка бурения выполнена за {elapsed:.2f} с.")
+            if summary["Не пробурено"] or summary["Лишних скважин"]:
+                st.sidebar.warning(f"⚠ Не пробурено: {summary['Не пробурено']}, лишних скважин: {summary['Лишних скважин']}.")
+
+        except Exception as e:
+            st.sidebar.error(f"❌ Ошибка сверки бурения: {e}")
+            self.logs_manager.add_log("drill_reconciliation", f"Ошибка сверки бурения: {e}", "ошибка")
+
+    def visualize(self, scale=1.0):
+        """
+        Векторы отклонений «проект → факт» (с масштабным множителем), непробуренные и лишние скважины.
+        """
+        try:
+            results = st.session_state.get("drill_reconciliation")
+            if not results:
+                st.sidebar.warning("Нет результатов сверки бурения.")
+                return
+
+            table, extra = results["table"], results["extra"]
+            drilled = table[table[self.STATUS_COLUMN] == "пробурена"]
+            missing = table[table[self.STATUS_COLUMN] == "не пробурена"]
+
+            # Отрезки векторов в одном следе, разделенные None
+            x0, y0 = drilled["X"].to_numpy(), drilled["Y"].to_numpy()
+            x1 = x0 + drilled["ΔX, м"].to_numpy() * scale
+            y1 = y0 + drilled["ΔY, м"].to_numpy() * scale
+            gaps = np.full(len(x0), np.nan)
+            vectors_x = np.column_stack([x0, x1, gaps]).ravel()
+            vectors_y = np.column_stack([y0, y1, gaps]).ravel()
+
+            fig = go.Figure()
+            fig.add_trace(go.Scattergl(x=table["X"], y=table["Y"], mode="markers", name="Проектные скважины",
+                                       marker=dict(symbol="circle-open", color="gray", size=7)))
+            fig.add_trace(go.Scattergl(x=vectors_x, y=vectors_y, mode="lines", name=f"Отклонение (×{scale:g})",
+                                       line=dict(color="blue", width=1.5)))
+            fig.add_trace(go.Scattergl(x=x1, y=y1, mode="markers", name="Фактические скважины",
+                                       marker=dict(color="blue", size=4),
+                                       text=drilled["Отклонение, м"].round(2),
+                                       hovertemplate="%{text} м<extra></extra>"))
+            fig.add_trace(go.Scattergl(x=missing["X"], y=missing["Y"], mode="markers", name="Не пробурены",
+                                       marker=dict(symbol="x", color="red", size=9)))
+            fig.add_trace(go.Scattergl(x=extra["X"], y=extra["Y"], mode="markers", name="Лишние скважины",
+                                       marker=dict(symbol="diamond", color="orange", size=8)))
+            fig.update_layout(title="Сверка фактического бурения с проектом", xaxis_title="X координата",
+                              yaxis_title="Y координата", yaxis=dict(scaleanchor="x"), height=650)
+            st.plotly_chart(fig)
+
+        except Exception as e:
+            st.sidebar.error(f"Ошибка визуализации сверки бурения: {e}")
+            self.logs_manager.add_log("drill_reconciliation", f"Ошибка визуализации сверки бурения: {e}", "ошибка")
@@ -0,0 +1,159 @@
+import time
+
+import numpy as np
+import plotly.graph_objects as go
+import shapely
+import streamlit as st
+from scipy.signal import fftconvolve
+from shapely.geometry import Polygon
+
+from modules.charge_design import CHARGE_PARAMETERS, ChargeDesign, hole_charges
+from utils.logs_manager import LogsManager
+from utils.session_state_manager import SessionStateManager
+
+
+class EnergyRaster:
+    """
+    Растр плотности энергии ВВ по блоку.
+
+    Энергия заряда каждой скважины (масса × energy_vv) распределяется по ячейкам
+    гауссовым ядром и делится на высоту уступа скважины, МДж/м³. Заряды
+    раскладываются в ячейки (bincount), ядро применяется одной свёрткой через БПФ,
+    поэтому время не зависит от числа скважин.
+    """
+    N_CELLS = 1000
+    UNDERCHARGE_RATIO = 0.7
+    KERNEL_SIGMAS = 3
+    DISPLAY_CELLS = 400
+    REQUIRED_PARAMETERS = CHARGE_PARAMETERS + ["energy_vv", "S", "B"]
+
+    def __init__(self, session_manager: SessionStateManager, logs_manager: LogsManager):
+        self.session_manager = session_manager
+        self.logs_manager = logs_manager
+
+    def build_raster(self, polygon, x, y, energy, n_cells, sigma):
+        """
+        Растр n_cells по большей стороне полигона. energy — МДж/м (энергия, отнесенная к высоте скважины).
+        Возвращает оси ячеек, растр МДж/м³ (NaN вне полигона).
+        """
+        min_x, min_y, max_x, max_y = polygon.bounds
+        cell = max(max_x - min_x, max_y - min_y) / n_cells
+        x_axis = min_x + (np.arange(int(np.ceil((max_x - min_x) / cell)) + 1) + 0.5) * cell
+        y_axis = min_y + (np.arange(int(np.ceil((max_y - min_y) / cell)) + 1) + 0.5) * cell
+
+        columns = np.clip(((x - min_x) / cell).astype(int), 0, len(x_axis) - 1)
+        rows = np.clip(((y - min_y) / cell).astype(int), 0, len(y_axis) - 1)
+        charges = np.bincount(rows * len(x_axis) + columns, weights=energy, minlength=len(x_axis) * len(y_axis))
+        charges = charges.reshape(len(y_axis), len(x_axis))
+
+        offsets = np.arange(-int(np.ceil(self.KERNEL_SIGMAS * sigma / cell)), int(np.ceil(self.KERNEL_SIGMAS * sigma / cell)) + 1) * cell
+        kernel_1d = np.exp(-offsets ** 2 / (2 * sigma ** 2))
+        kernel = np.outer(kernel_1d, kernel_1d)
+        kernel /= kernel.sum() * cell ** 2
+
+        density = fftconvolve(charges, kernel, mode="same")
+        grid_x, grid_y = np.meshgrid(x_axis, y_axis)
+        inside = shapely.contains_xy(polygon, grid_x, grid_y)
+        return x_axis, y_axis, np.where(inside, np.maximum(density, 0.0), np.nan)
+
+    def run(self, n_cells=None):
+        """
+        Расчет растра по grid_data и контуру блока.
+        """
+        try:
+            started = time.perf_counter()
+            grid_data = st.session_state.get("grid_data")
+            contour = st.session_state.get("block_contour")
+            if grid_data is None or grid_data.empty or contour is None or contour.empty:
+                st.sidebar.warning("Загрузите контур и сгенерируйте сетку скважин.")
+                self.logs_manager.add_log("energy_raster", "Ошибка: нет контура или сетки скважин.", "ошибка")
+                return
+
+            params = st.session_state.get("user_parameters", {})
+            missing = [name for name in self.REQUIRED_PARAMETERS
+                       if name not in grid_data.columns and not isinstance(params.get(name), (int, float))]
+            if missing:
+                st.sidebar.error(f"❌ Ошибка: отсутствуют параметры: {', '.join(missing)}.")
+                self.logs_manager.add_log("energy_raster", f"Ошибка: отсутствуют параметры {missing}.", "ошибка")
+                return
+
+            heights = grid_data["H"].to_numpy(dtype=float) if "H" in grid_data.columns else np.full(len(grid_data), float(params["H"]))
+            S, B = float(params["S"]), float(params["B"])
+
+            # Массы из паспорта заряжания, если он рассчитан для текущей сетки, иначе по той же модели заряда;
+            # плотность проекта — энергия зарядов на объем ячеек S×B×H скважин
+            design = SessionStateManager.get_grid_table("charge_design", grid_data)
+            if design is not None:
+                mass = design[ChargeDesign.MASS_COLUMN].to_numpy(dtype=float)
+            else:
+                mass = hole_charges(grid_data, params)["mass"]
+            design_density = float(mass.sum() * float(params["energy_vv"]) / (S * B * heights.sum()))
+            energy = mass * float(params["energy_vv"]) / heights
+
+            # Ширина ядра — половина стороны ячейки сетки S×B
+            sigma = np.sqrt(S * B) / 2
+
+            polygon = Polygon(contour[["X", "Y"]].values)
+            shapely.prepare(polygon)
+            x_axis, y_axis, density = self.build_raster(
+                polygon, grid_data["X"].to_numpy(dtype=float), grid_data["Y"].to_numpy(dtype=float),
+                energy, n_cells or self.N_CELLS, sigma
+            )
+
+            inside = np.isfinite(density)
+            undercharged = inside & (density < self.UNDERCHARGE_RATIO * design_density)
+            st.session_state["energy_raster"] = {
+                "x": x_axis,
+                "y": y_axis,
+                "density": density,
+                "design_density": design_density,
+                "undercharged_share": float(undercharged.sum() / max(inside.sum(), 1) * 100),
+            }
+
+            elapsed = time.perf_counter() - started
+            self.logs_manager.add_log(
+                "energy_raster",
+                f"✅ Растр энергии {density.shape[1]}×{density.shape[0]} по {len(grid_data)} скважинам за {elapsed:.2f} с.",
+                "успех"
+            )
+            st.sidebar.success(f"✅ Растр плотности энергии рассчитан за {elapsed:.2f} с.")
+
+        except Exception as e:
+            st.sidebar.error(f"❌ Ошибка расчета растра энергии: {e}")
+            self.logs_manager.add_log("energy_raster", f"Ошибка расчета растра энергии: {e}", "ошибка")
+
+    def visualize(self):
+        """
+        Тепловая карта плотности энергии; зоны недозаряда (ниже UNDERCHARGE_RATIO от проектной) выделены контуром.
+        """
+        try:
+            raster = st.session_state.get("energy_raster")
+            if not raster:
+                st.sidebar.warning("Нет рассчитанного растра энергии.")
+                return
+
+            step = max(1, int(np.ceil(max(raster["density"].shape) / self.DISPLAY_CELLS)))
+            density = raster["density"][::step, ::step]
+            x_axis, y_axis = raster["x"][::step], raster["y"][::step]
+            threshold = self.UNDERCHARGE_RATIO * raster["design_density"]
+
+            st.subheader("Плотность энергии ВВ по блоку")
+            st.caption(
+                f"Проектная плотность: {raster['design_density']:.3f} МДж/м³; "
+                f"зона недозаряда (< {threshold:.3f} МДж/м³): {raster['undercharged_share']:.1f} % площади блока."
+            )
+
+            fig = go.Figure()
+            fig.add_trace(go.Heatmap(x=x_axis, y=y_axis, z=density, colorscale="Viridis",
+                                     colorbar=dict(title="МДж/м³"), name="Плотность энергии"))
+            fig.add_trace(go.Contour(x=x_axis, y=y_axis, z=np.where(np.isfinite(density), density, threshold * 2),
+                                     contours=dict(type="constraint", operation="<", value=threshold),
+                                     line=dict(color="red", width=2), fillcolor="rgba(255, 0, 0, 0.35)",
+                                     showscale=False, name="Недозаряд"))
+            fig.update_layout(xaxis_title="X координата", yaxis_title="Y координата",
+                              yaxis=dict(scaleanchor="x"), height=650)
+            st.plotly_chart(fig)
+
+        except Exception as e:
+            st.sidebar.error(f"Ошибка визуализации растра энергии: {e}")
+            self.logs_manager.add_log("energy_raster", f"Ошибка визуализации растра энергии: {e}", "ошибка")
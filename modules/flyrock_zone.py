@@ -0,0 +1,136 @@
+import time
+
+import numpy as np
+import shapely
+import streamlit as st
+from shapely.ops import unary_union
+
+from modules.charge_design import CHARGE_PARAMETERS, hole_charges
+from utils.hashing import canonical_hash
+from utils.logs_manager import LogsManager
+from utils.result_cache import ResultCache
+from utils.session_state_manager import SessionStateManager
+
+
+GRAVITY = 9.81  # м/с²
+
+
+def throw_distance(linear_density, burden, stemming, k):
+    """
+    Дальность разлета, м (Ричардс и Мур): наибольшая из дальностей при прорыве
+    через откос (по линии сопротивления B) и через забойку (кратерообразование),
+    L = k²/g·(√m / B или SH)^2.6, m — линейная плотность заряда, кг/м.
+    """
+    with np.errstate(divide="ignore"):
+        face_burst = k ** 2 / GRAVITY * (np.sqrt(linear_density) / burden) ** 2.6
+        cratering = k ** 2 / GRAVITY * (np.sqrt(linear_density) / np.maximum(stemming, 0.1)) ** 2.6
+    return np.maximum(face_burst, cratering)
+
+
+class FlyrockZone:
+    """
+    Опасная зона разлета кусков породы: объединение кругов радиусом
+    (дальность разлета × коэффициент запаса) вокруг каждой скважины.
+
+    Круги строятся векторно (shapely.buffer) и объединяются одним каскадным
+    unary_union. Результат кэшируется по хэшу сетки и параметров (сессия + диск).
+    """
+    REQUIRED_PARAMETERS = ["B", "flyrock_k", "flyrock_safety_factor"] + CHARGE_PARAMETERS
+    QUAD_SEGMENTS = 8
+
+    def __init__(self, session_manager: SessionStateManager, logs_manager: LogsManager):
+        self.session_manager = session_manager
+        self.logs_manager = logs_manager
+        self.result_cache = ResultCache(logs_manager)
+
+        st.session_state.setdefault("flyrock_zone_cache", {})
+
+    def hole_radii(self, grid_data, params):
+        """
+        Радиус опасной зоны по скважинам, м. Забойка и линейная плотность — из паспорта
+        заряжания, если он рассчитан для текущей сетки, иначе по той же модели заряда (hole_charges).
+        """
+        design = SessionStateManager.get_grid_table("charge_design", grid_data)
+        if design is not None:
+            stemming = design["Забойка, м"].to_numpy(dtype=float)
+            linear_density = design["Линейная плотность заряда, кг/м"].to_numpy(dtype=float)
+        else:
+            charges = hole_charges(grid_data, params)
+            stemming, linear_density = charges["stemming"], charges["linear_density"]
+
+        distance = throw_distance(linear_density, float(params["B"]), stemming, float(params["flyrock_k"]))
+        return distance * float(params["flyrock_safety_factor"])
+
+    def build_zone(self, x, y, radii):
+        """
+        Объединение кругов вокруг скважин в одну опасную зону.
+        """
+        circles = shapely.buffer(shapely.points(x, y), radii, quad_segs=self.QUAD_SEGMENTS)
+        return unary_union(circles)
+
+    def get_zone(self):
+        """
+        Опасная зона для текущей сетки и параметров: {"zone", "max_radius", "area"} или None.
+        """
+        grid_data = st.session_state.get("grid_data")
+        params = st.session_state.get("user_parameters", {})
+        if grid_data is None or grid_data.empty:
+            return None
+        if any(not isinstance(params.get(name), (int, float)) for name in self.REQUIRED_PARAMETERS):
+            return None
+
+        radii = self.hole_radii(grid_data, params)
+        cache_params = {
+            "x": grid_data["X"].to_numpy(dtype=float),
+            "y": grid_data["Y"].to_numpy(dtype=float),
+            "radii": radii,
+            "quad_segs": self.QUAD_SEGMENTS,
+        }
+        key = canonical_hash(cache_params)
+        session_cache = st.session_state["flyrock_zone_cache"]
+        if key in session_cache:
+            return session_cache[key]
+
+        cached = self.result_cache.get("flyrock_zone", cache_params)
+        if cached is None:
+            zone = self.build_zone(cache_params["x"], cache_params["y"], radii)
+            cached = {"zone": shapely.to_wkb(zone), "max_radius": float(radii.max()), "area": float(zone.area)}
+            self.result_cache.set("flyrock_zone", cache_params, cached)
+
+        result = {**cached, "zone": shapely.from_wkb(cached["zone"])}
+        session_cache.clear()
+        session_cache[key] = result
+        return result
+
+    def run(self):
+        """
+        Расчет опасной зоны и сохранение в session_state["flyrock_zone"].
+        """
+        try:
+            started = time.perf_counter()
+            grid_data = st.session_state.get("grid_data")
+            if grid_data is None or grid_data.empty:
+                st.sidebar.warning("Сетка скважин не сгенерирована. Сначала выполните генерацию сетки.")
+                self.logs_manager.add_log("flyrock_zone", "Ошибка: сетка скважин отсутствует.", "ошибка")
+                return
+
+            result = self.get_zone()
+            if result is None:
+                params = st.session_state.get("user_parameters", {})
+                missing = [name for name in self.REQUIRED_PARAMETERS if not isinstance(params.get(name), (int, float))]
+                st.sidebar.error(f"❌ Ошибка: отсутствуют параметры: {', '.join(missing)}.")
+                self.logs_manager.add_log("flyrock_zone", f"Ошибка: отсутствуют параметры {missing}.", "ошибка")
+                return
+
+            st.session_state["flyrock_zone"] = result
+            elapsed = time.perf_counter() - started
+            self.logs_manager.add_log(
+                "flyrock_zone",
+                f"✅ Опасная зона разлета: радиус до {result['max_radius']:.1f} м, площадь {result['area']:.0f} м² ({elapsed:.2f} с).",
+                "успех"
+            )
+            st.sidebar.success(f"✅ Опасная зона разлета рассчитана: радиус до {result['max_radius']:.1f} м.")
+
+        except Exception as e:
+            st.sidebar.error(f"❌ Ошибка расчета опасной зоны разлета: {e}")
+            self.logs_manager.add_log("flyrock_zone", f"Ошибка расчета опасной зоны разлета: {e}", "ошибка")
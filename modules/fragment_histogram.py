@@ -0,0 +1,146 @@
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+import streamlit as st
+
+from modules import psd_engine
+from modules.psd_fitting import BLAST_COLUMN, MEASURED_COLUMN
+from modules.reference_calculations import ReferenceCalculations
+from utils.logs_manager import LogsManager
+from utils.session_state_manager import SessionStateManager
+
+
+class FragmentHistogram:
+    """
+    Потоковое построение PSD по спискам размеров отдельных фрагментов
+    (выгрузки анализа изображений, десятки миллионов строк).
+
+    Файл читается пакетами (Arrow для .csv/.parquet, отображение в память для .npy),
+    массы накапливаются в классах крупности STANDARD_X_VALUES, поэтому расход памяти
+    не зависит от размера файла.
+    """
+    BATCH_ROWS = 1_000_000
+    SIZE_COLUMNS = ["size", "Размер", "Размер фрагмента (x), мм", "x"]
+    MASS_COLUMNS = ["mass", "Масса", "weight"]
+
+    def __init__(self, session_manager: SessionStateManager, logs_manager: LogsManager):
+        self.session_manager = session_manager
+        self.logs_manager = logs_manager
+        self.class_edges = np.asarray(ReferenceCalculations.STANDARD_X_VALUES, dtype=float)
+
+    def _pick_column(self, names, candidates, default_index):
+        for candidate in candidates:
+            if candidate in names:
+                return candidate
+        return names[default_index] if default_index is not None and len(names) > default_index else None
+
+    def iter_batches(self, source, file_extension):
+        """
+        Пакеты (размеры, массы или None) из файла. source — путь или файловый объект.
+        """
+        if file_extension == "npy":
+            # Одномерный массив размеров или двумерный (размер, масса) — отображение в память
+            array = np.load(source, mmap_mode="r")
+            for start in range(0, len(array), self.BATCH_ROWS):
+                chunk = np.asarray(array[start:start + self.BATCH_ROWS], dtype=float)
+                yield (chunk, None) if chunk.ndim == 1 else (chunk[:, 0], chunk[:, 1] if chunk.shape[1] > 1 else None)
+            return
+
+        if file_extension == "parquet":
+            parquet_file = pq.ParquetFile(source)
+            names = parquet_file.schema_arrow.names
+            size_column = self._pick_column(names, self.SIZE_COLUMNS, 0)
+            mass_column = self._pick_column(names, self.MASS_COLUMNS, None)
+            columns = [size_column] + ([mass_column] if mass_column else [])
+            batches = parquet_file.iter_batches(batch_size=self.BATCH_ROWS, columns=columns)
+        else:
+            reader = pa_csv.open_csv(
+                source, read_options=pa_csv.ReadOptions(block_size=64 * 1024 * 1024)
+            )
+            names = reader.schema.names
+            size_column = self._pick_column(names, self.SIZE_COLUMNS, 0)
+            mass_column = self._pick_column(names, self.MASS_COLUMNS, None)
+            batches = reader
+
+        for batch in batches:
+            sizes = batch.column(size_column).cast(pa.float64()).to_numpy(zero_copy_only=False)
+            masses = None
+            if mass_column:
+                masses = batch.column(mass_column).cast(pa.float64()).to_numpy(zero_copy_only=False)
+            yield sizes, masses
+
+    def accumulate(self, batches):
+        """
+        Накопление масс по классам крупности. Класс i содержит фрагменты
+        с размером в (edge[i-1], edge[i]]; последний элемент — фрагменты крупнее edge[-1].
+        Без столбца массы масса фрагмента принимается пропорциональной x³.
+        """
+        class_mass = np.zeros(len(self.class_edges) + 1)
+        n_fragments = 0
+        for sizes, masses in batches:
+            valid = np.isfinite(sizes) & (sizes > 0)
+            if masses is None:
+                weights = sizes[valid] ** 3
+            else:
+                valid &= np.isfinite(masses) & (masses >= 0)
+                weights = masses[valid]
+            classes = np.searchsorted(self.class_edges, sizes[valid], side="left")
+            class_mass += np.bincount(classes, weights=weights, minlength=class_mass.size)
+            n_fragments += int(valid.sum())
+        return class_mass, n_fragments
+
+    def build_psd_table(self, class_mass):
+        """
+        Кумулятивная таблица прохода в формате psd_table.
+        """
+        passing = np.cumsum(class_mass[:-1]) / class_mass.sum() * 100
+        return pd.DataFrame({psd_engine.SIZE_COLUMN: self.class_edges, MEASURED_COLUMN: passing})
+
+    def run(self, source, file_name):
+        """
+        Построение PSD из файла фрагментов и добавление кривой к измеренным PSD.
+        """
+        try:
+            started = time.perf_counter()
+            file_extension = file_name.split(".")[-1].lower()
+            if file_extension not in ["csv", "txt", "parquet", "npy"]:
+                st.sidebar.warning("Неподдерживаемый формат файла. Разрешены только .csv, .txt, .parquet и .npy")
+                return
+
+            class_mass, n_fragments = self.accumulate(self.iter_batches(source, file_extension))
+            if n_fragments == 0 or class_mass.sum() <= 0:
+                st.sidebar.error("Ошибка: файл не содержит корректных размеров фрагментов.")
+                self.logs_manager.add_log("fragment_histogram", f"Ошибка: нет корректных фрагментов в {file_name}.", "ошибка")
+                return
+
+            table = self.build_psd_table(class_mass)
+            st.session_state["psd_table_measured"] = table
+
+            # Кривая добавляется к измеренным PSD как отдельный взрыв (для подбора параметров)
+            blast = os.path.basename(file_name)
+            measured = st.session_state.get("measured_psd")
+            curve = table.assign(**{BLAST_COLUMN: blast})[[BLAST_COLUMN, psd_engine.SIZE_COLUMN, MEASURED_COLUMN]]
+            if isinstance(measured, pd.DataFrame) and not measured.empty:
+                curve = pd.concat([measured[measured[BLAST_COLUMN] != blast], curve], ignore_index=True)
+            st.session_state["measured_psd"] = curve.sort_values([BLAST_COLUMN, psd_engine.SIZE_COLUMN]).reset_index(drop=True)
+            st.session_state.pop("psd_fit_results", None)
+
+            elapsed = time.perf_counter() - started
+            oversize = class_mass[-1] / class_mass.sum() * 100
+            self.logs_manager.add_log(
+                "fragment_histogram",
+                f"✅ PSD построена по {n_fragments} фрагментам ({blast}) за {elapsed:.2f} с.",
+                "успех"
+            )
+            st.sidebar.success(f"✅ PSD построена по {n_fragments} фрагментам за {elapsed:.2f} с.")
+            if oversize > 0:
+                st.sidebar.warning(f"⚠ Масса фрагментов крупнее {self.class_edges[-1]:g} мм: {oversize:.2f} %.")
+
+        except Exception as e:
+            st.sidebar.error(f"❌ Ошибка построения PSD по фрагментам: {e}")
+            self.logs_manager.add_log("fragment_histogram", f"Ошибка построения PSD по фрагментам: {e}", "ошибка")
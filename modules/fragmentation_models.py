@@ -0,0 +1,254 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from modules import kuzram_model, psd_engine
+from modules.rock_factor_calibration import RockFactorCalibration
+from utils.hashing import canonical_hash
+from utils.logs_manager import LogsManager
+from utils.result_cache import ResultCache
+from utils.session_state_manager import SessionStateManager
+
+
+MODEL_REGISTRY = {}
+
+
+def register_model(cls):
+    """
+    Декоратор регистрации модели фрагментации в MODEL_REGISTRY.
+    """
+    MODEL_REGISTRY[cls.name] = cls()
+    return cls
+
+
+class FragmentationModel:
+    """
+    Базовый класс модели фрагментации с векторизованным интерфейсом.
+
+    predict() принимает словарь массивов входных параметров (CHAIN_INPUTS) и
+    калибровочные коэффициенты домена k_A, k_n и возвращает массивы x_50, x_max
+    и параметр формы кривой; passing() строит матрицу P(x), % (наборы параметров × размеры).
+    """
+    name = ""
+    label = ""
+    shape_parameter = ""
+
+    def predict(self, inputs, x_50_ref, k_A=1.0, k_n=1.0):
+        raise NotImplementedError
+
+    def passing(self, x_values, prediction):
+        raise NotImplementedError
+
+
+def rosin_rammler_passing(x_values, x_50, n):
+    """
+    Распределение Розина–Раммлера через x_50: P(x) = 100·(1 − exp(−ln2·(x/x_50)^n)).
+    """
+    x_values = np.asarray(x_values, dtype=float)
+    x_50 = np.asarray(x_50, dtype=float)[..., None]
+    n = np.asarray(n, dtype=float)[..., None]
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        p_x = 100 * (1 - np.exp(-kuzram_model.LN2 * (x_values / x_50) ** n))
+    return np.where((x_50 > 0) & (n > 0), p_x, np.nan)
+
+
+def cunningham_n(inputs):
+    """
+    Коэффициент равномерности Каннингема (классическая модель Кузнецова–Рамлера).
+    """
+    B, S, H = inputs["B"], inputs["S"], inputs["H"]
+    d_h = inputs["Ø_h"] / 1000
+    L_b, L_c, L_tot = inputs["L_b"], inputs["L_c"], inputs["L_tot"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (
+            (2.2 - 0.014 * (B / d_h)) *
+            (1 - inputs["SD"] / B) *
+            np.sqrt((1 + S / B) / 2) *
+            (np.abs(L_b - L_c) / L_tot + 0.1) ** 0.1 *
+            (L_tot / H)
+        )
+
+
+@register_model
+class KuzRamModel(FragmentationModel):
+    """
+    Классическая модель Кузнецова–Рамлера (Cunningham, 1987): x_50 по Кузнецову,
+    n по Каннингему, кривая Розина–Раммлера. Калибровка домена (подобрана по цепочке
+    KCO) не применяется.
+    """
+    name = "kuz_ram"
+    label = "Кузнецов–Рамлер (Розин–Раммлер)"
+    shape_parameter = "n"
+
+    def predict(self, inputs, x_50_ref, k_A=1.0, k_n=1.0):
+        rdi = kuzram_model.calculate_rdi(inputs["rho"])
+        hf = kuzram_model.calculate_hf(inputs["E"], inputs["sigma_c"])
+        a = kuzram_model.calculate_a(inputs["RMD"], rdi, hf)
+        s_anfo = kuzram_model.calculate_s_anfo(inputs["energy_vv"])
+        q = kuzram_model.calculate_q(inputs["Q"], inputs["H"], inputs["S"], inputs["B"])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            x_50 = a * inputs["Q"] ** (1 / 6) * (115 / s_anfo) ** (19 / 30) / q ** 0.8
+        return {
+            "x_50": x_50,
+            "x_max": kuzram_model.calculate_x_max(inputs["in_situ_block_size"], inputs["S"], inputs["B"]),
+            "shape": cunningham_n(inputs),
+        }
+
+    def passing(self, x_values, prediction):
+        return rosin_rammler_passing(x_values, prediction["x_50"], prediction["shape"])
+
+
+@register_model
+class KCOModel(FragmentationModel):
+    """
+    Модель KCO (Ouchterlony, 2005): x_50 с поправкой g(n), кривая Swebrec.
+    Совпадает с цепочкой расчетов Calculations, включая калибровочные k_A, k_n домена.
+    """
+    name = "kco"
+    label = "KCO / Swebrec (расчет приложения)"
+    shape_parameter = "b"
+
+    def predict(self, inputs, x_50_ref, k_A=1.0, k_n=1.0):
+        results = kuzram_model.run_chain(inputs, x_50_ref, k_A=k_A, k_n=k_n)
+        return {"x_50": results["x_50"], "x_max": results["x_max"], "shape": results["b"]}
+
+    def passing(self, x_values, prediction):
+        return psd_engine.psd_matrix(x_values, prediction["x_50"], prediction["x_max"], prediction["shape"])
+
+
+@register_model
+class CrushZoneModel(FragmentationModel):
+    """
+    Двухкомпонентная модель зоны дробления (CZM, Kanchibotla et al., 1999).
+
+    Крупная фракция (x >= x_50) — кривая Кузнецова–Рамлера; мелкая (x < x_50) —
+    Розин–Раммлер с тем же x_50, проходящий через долю мелочи F_c при x_c = 1 мм.
+    F_c — доля объема зоны дробления вокруг заряда: радиус по Esen et al. (2003),
+    r_c = 0.812·r_0·CZI^0.219, CZI = P_b³ / (K·σ_c²), K = E / (1 + ν) — жесткость породы.
+    """
+    name = "crush_zone"
+    label = "Зона дробления (двухкомпонентная CZM)"
+    shape_parameter = "n"
+
+    FINES_SIZE = 1.0            # мм, граница мелкой фракции
+    EXPLOSIVE_DENSITY = 1100.0  # кг/м³
+    DETONATION_VELOCITY = 4500.0  # м/с
+    POISSON_RATIO = 0.25
+
+    def predict(self, inputs, x_50_ref, k_A=1.0, k_n=1.0):
+        coarse = MODEL_REGISTRY[KuzRamModel.name].predict(inputs, x_50_ref)
+
+        r_0 = inputs["Ø_h"] / 2000  # радиус скважины, м
+        borehole_pressure = self.EXPLOSIVE_DENSITY * self.DETONATION_VELOCITY ** 2 / 8  # Па
+        stiffness = inputs["E"] * 1e9 / (1 + self.POISSON_RATIO)  # Па
+        with np.errstate(divide="ignore", invalid="ignore"):
+            czi = borehole_pressure ** 3 / (stiffness * (inputs["sigma_c"] * 1e6) ** 2)
+            r_c = 0.812 * r_0 * czi ** 0.219
+            fines_fraction = np.pi * r_c ** 2 * inputs["L_tot"] / (inputs["S"] * inputs["B"] * inputs["H"])
+        fines_fraction = np.clip(fines_fraction, 1e-4, 0.45)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            n_fines = (np.log(-np.log(1 - fines_fraction) / kuzram_model.LN2)
+                       / np.log(self.FINES_SIZE / coarse["x_50"]))
+
+        return {**coarse, "n_fines": n_fines, "fines_fraction": fines_fraction * 100}
+
+    def passing(self, x_values, prediction):
+        coarse = rosin_rammler_passing(x_values, prediction["x_50"], prediction["shape"])
+        fines = rosin_rammler_passing(x_values, prediction["x_50"], prediction["n_fines"])
+        x_50 = np.asarray(prediction["x_50"], dtype=float)[..., None]
+        return np.where(np.asarray(x_values, dtype=float) < x_50, fines, coarse)
+
+
+class ModelComparison:
+    """
+    Пакетный расчет всех зарегистрированных моделей фрагментации для текущего проекта.
+    """
+    N_SIZE_POINTS = 300
+    MAX_CACHE_ENTRIES = 32
+
+    def __init__(self, session_manager: SessionStateManager, logs_manager: LogsManager):
+        self.session_manager = session_manager
+        self.logs_manager = logs_manager
+        self.result_cache = ResultCache(logs_manager)
+
+        st.session_state.setdefault("model_comparison_cache", {})
+
+    def evaluate_model(self, model, inputs, x_50_ref, x_values, factors=None):
+        """
+        Расчет одной модели с независимым кэшированием (сессия + диск).
+        factors — калибровочные коэффициенты домена {"k_A", "k_n"}, входят в ключ кэша.
+        """
+        factors = factors or {"k_A": 1.0, "k_n": 1.0}
+        cache_params = {"inputs": inputs, "x_50_ref": x_50_ref, "x_values": x_values, "factors": factors}
+        key = canonical_hash({"model": model.name, **cache_params})
+        session_cache = st.session_state["model_comparison_cache"]
+
+        if key in session_cache:
+            return session_cache[key]
+
+        output = self.result_cache.get(f"fragmentation_models.{model.name}", cache_params)
+        if output is None:
+            batch = {name: np.atleast_1d(np.asarray(value, dtype=float)) for name, value in inputs.items()}
+            prediction = model.predict(batch, x_50_ref, **factors)
+            output = {
+                "prediction": {name: np.asarray(value, dtype=float) for name, value in prediction.items()},
+                "passing": model.passing(x_values, prediction),
+            }
+            self.result_cache.set(f"fragmentation_models.{model.name}", cache_params, output)
+
+        session_cache[key] = output
+        while len(session_cache) > self.MAX_CACHE_ENTRIES:
+            session_cache.pop(next(iter(session_cache)))
+        return output
+
+    def run_comparison(self):
+        """
+        Расчет всех моделей из MODEL_REGISTRY по параметрам проекта.
+        """
+        try:
+            params = st.session_state.get("user_parameters", {})
+            x_50_ref = st.session_state.get("reference_parameters", {}).get("target_x_50")
+
+            if x_50_ref is None or not isinstance(x_50_ref, (int, float)):
+                st.sidebar.error("❌ Ошибка: отсутствует эталонное значение x_50. Утвердите эталонные параметры.")
+                self.logs_manager.add_log("fragmentation_models", "Ошибка: отсутствует эталонное значение x_50.", "ошибка")
+                return
+
+            missing = [name for name in kuzram_model.CHAIN_INPUTS if not isinstance(params.get(name), (int, float))]
+            if missing:
+                st.sidebar.error(f"❌ Ошибка: отсутствуют параметры: {', '.join(missing)}.")
+                self.logs_manager.add_log("fragmentation_models", f"Ошибка: отсутствуют параметры {missing}.", "ошибка")
+                return
+
+            inputs = {name: float(params[name]) for name in kuzram_model.CHAIN_INPUTS}
+            x_max = float(kuzram_model.calculate_x_max(inputs["in_situ_block_size"], inputs["S"], inputs["B"]))
+            x_values = np.geomspace(0.07, x_max, self.N_SIZE_POINTS)
+
+            factors = RockFactorCalibration.get_factors(params.get("rock_domain"))
+            curves = {}
+            summary = []
+            for model in MODEL_REGISTRY.values():
+                output = self.evaluate_model(model, inputs, float(x_50_ref), x_values, factors)
+                prediction = output["prediction"]
+                curves[model.label] = output["passing"][0]
+                summary.append({
+                    "Модель": model.label,
+                    "x_50, мм": float(prediction["x_50"][0]),
+                    "x_max, мм": float(prediction["x_max"][0]),
+                    "Параметр формы": f"{model.shape_parameter} = {float(prediction['shape'][0]):.4f}",
+                })
+
+            st.session_state["model_comparison"] = {
+                "x_values": x_values,
+                "curves": curves,
+                "summary": pd.DataFrame(summary),
+            }
+            self.logs_manager.add_log(
+                "fragmentation_models", f"✅ Рассчитано моделей фрагментации: {len(curves)}.", "успех"
+            )
+            st.sidebar.success(f"✅ Рассчитано моделей фрагментации: {len(curves)}.")
+
+        except Exception as e:
+            st.sidebar.error(f"❌ Ошибка сравнения моделей фрагментации: {e}")
+            self.logs_manager.add_log("fragmentation_models", f"Ошибка сравнения моделей фрагментации: {e}", "ошибка")
@@ -3,7 +3,6 @@ import pandas as pd
 import numpy as np
 import plotly.express as px
 from shapely.geometry import Polygon, Point
-from shapely.ops import unary_union
 from utils.logs_manager import LogsManager
 from utils.session_state_manager import SessionStateManager
 
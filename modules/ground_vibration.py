@@ -0,0 +1,242 @@
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+
+from modules.charge_design import ChargeDesign, hole_charges
+from modules.initiation_timing import TIME_COLUMN, window_charge
+from utils.logs_manager import LogsManager
+from utils.session_state_manager import SessionStateManager
+
+
+class GroundVibration:
+    """
+    Прогноз пиковой скорости колебаний грунта (PPV) по приведенному расстоянию:
+    PPV = K·(R/√W)^(−β), W — масса ВВ в окне одновременного взрывания.
+
+    PPV в точке определяет скважина с наименьшим R²/W. Растр приемников обходится
+    плитками TILE_CELLS×TILE_CELLS; для плитки отбрасываются скважины, которые по
+    оценке расстояния до центра плитки не могут дать минимум, для остальных R²/W
+    вычисляется матричным произведением (скважины × приемники), поэтому память
+    ограничена размером плитки.
+    """
+    N_CELLS = 1000
+    TILE_CELLS = 16
+    MIN_DISTANCE = 1.0  # м, ограничение расстояния у самой скважины
+    REQUIRED_PARAMETERS = ["ppv_K", "ppv_beta", "ppv_limit", "ppv_radius", "delay_window"]
+    POINT_COLUMNS = ["Название", "X", "Y"]
+
+    def __init__(self, session_manager: SessionStateManager, logs_manager: LogsManager):
+        self.session_manager = session_manager
+        self.logs_manager = logs_manager
+
+    def hole_charges(self, grid_data, params):
+        """
+        Масса заряда скважины и масса ВВ в ее окне замедления (без схемы замедлений — скважины взрываются раздельно).
+        """
+        design = SessionStateManager.get_grid_table("charge_design", grid_data)
+        if design is not None:
+            mass = design[ChargeDesign.MASS_COLUMN].to_numpy(dtype=float)
+        else:
+            mass = hole_charges(grid_data, params)["mass"]
+
+        times = np.full(len(grid_data), np.nan)
+        timing = SessionStateManager.get_grid_table("initiation_timing", grid_data)
+        if timing is not None:
+            times = timing[TIME_COLUMN].to_numpy(dtype=float)
+
+        charge = mass.copy()
+        timed = np.isfinite(times)
+        if timed.any():
+            charge[timed] = window_charge(times[timed], mass[timed], float(params["delay_window"]))
+        return mass, charge, times
+
+    def governing_holes(self, rx, ry, hx, hy, charge):
+        """
+        Индекс скважины с наименьшим R²/W для каждого приемника плитки (rx, ry).
+        Координаты центрируются на плитке, чтобы точности float32 хватало при больших координатах.
+        """
+        cx, cy = rx.mean(), ry.mean()
+        half_diagonal = np.sqrt(np.max((rx - cx) ** 2 + (ry - cy) ** 2))
+        to_center = np.hypot(hx - cx, hy - cy)
+        upper = np.min((to_center + half_diagonal) ** 2 / charge)
+        candidates = np.flatnonzero(np.maximum(to_center - half_diagonal, 0.0) ** 2 / charge <= upper)
+
+        qx, qy, w = hx[candidates] - cx, hy[candidates] - cy, charge[candidates]
+        px, py = rx - cx, ry - cy
+        receptors = np.column_stack([px ** 2 + py ** 2, px, py, np.ones(len(px))]).astype(np.float32)
+        holes = np.vstack([1 / w, -2 * qx / w, -2 * qy / w, (qx ** 2 + qy ** 2) / w]).astype(np.float32)
+        return candidates[np.argmin(receptors @ holes, axis=1)]
+
+    def ppv(self, distance, charge, params):
+        scaled_distance = np.maximum(distance, self.MIN_DISTANCE) / np.sqrt(charge)
+        return float(params["ppv_K"]) * scaled_distance ** (-float(params["ppv_beta"]))
+
+    def ppv_raster(self, hx, hy, charge, params, n_cells):
+        """
+        Растр PPV, мм/с, и индексы определяющих скважин на области блока, расширенной на ppv_radius.
+        """
+        radius = float(params["ppv_radius"])
+        min_x, max_x = hx.min() - radius, hx.max() + radius
+        min_y, max_y = hy.min() - radius, hy.max() + radius
+        cell = max(max_x - min_x, max_y - min_y) / n_cells
+        x_axis = min_x + (np.arange(int(np.ceil((max_x - min_x) / cell))) + 0.5) * cell
+        y_axis = min_y + (np.arange(int(np.ceil((max_y - min_y) / cell))) + 0.5) * cell
+
+        governing = np.empty((len(y_axis), len(x_axis)), dtype=np.int64)
+        tile = self.TILE_CELLS
+        for row in range(0, len(y_axis), tile):
+            for column in range(0, len(x_axis), tile):
+                tile_x, tile_y = np.meshgrid(x_axis[column:column + tile], y_axis[row:row + tile])
+                governing[row:row + tile, column:column + tile] = self.governing_holes(
+                    tile_x.ravel(), tile_y.ravel(), hx, hy, charge
+                ).reshape(tile_x.shape)
+
+        grid_x, grid_y = np.meshgrid(x_axis, y_axis)
+        distance = np.hypot(grid_x - hx[governing], grid_y - hy[governing])
+        return x_axis, y_axis, self.ppv(distance, charge[governing], params), governing
+
+    def point_report(self, points, grid_data, mass, charge, times, params):
+        """
+        PPV и определяющее замедление в точках наблюдения (прямой перебор по всем скважинам).
+        """
+        hx = grid_data["X"].to_numpy(dtype=float)
+        hy = grid_data["Y"].to_numpy(dtype=float)
+        rows = []
+        for name, x, y in points[self.POINT_COLUMNS].itertuples(index=False):
+            distance = np.hypot(hx - float(x), hy - float(y))
+            values = self.ppv(distance, charge, params)
+            i = int(np.argmax(values))
+            rows.append({
+                "Точка": name,
+                "PPV, мм/с": values[i],
+                "Превышение допустимого": values[i] > float(params["ppv_limit"]),
+                "Определяющая скважина (ID)": grid_data["ID"].iloc[i],
+                "Определяющее замедление, мс": times[i],
+                "Масса ВВ в окне, кг": charge[i],
+                "Масса заряда скважины, кг": mass[i],
+                "Расстояние, м": distance[i],
+            })
+        return pd.DataFrame(rows)
+
+    def load_points(self, uploaded_file):
+        """
+        Точки наблюдения из .csv: Название, X, Y (при отсутствии заголовка — первые три столбца).
+        """
+        try:
+            points = pd.read_csv(uploaded_file)
+            if not set(self.POINT_COLUMNS).issubset(points.columns):
+                points = points.iloc[:, :3]
+                points.columns = self.POINT_COLUMNS
+            points[["X", "Y"]] = points[["X", "Y"]].apply(pd.to_numeric, errors="coerce")
+            points = points.dropna(subset=["X", "Y"]).reset_index(drop=True)
+            st.session_state["monitoring_points"] = points[self.POINT_COLUMNS]
+            st.sidebar.success(f"Загружено точек наблюдения: {len(points)}.")
+            self.logs_manager.add_log("ground_vibration", f"Загружены точки наблюдения: {len(points)}.", "успех")
+
+        except Exception as e:
+            st.sidebar.error(f"❌ Ошибка загрузки точек наблюдения: {e}")
+            self.logs_manager.add_log("ground_vibration", f"Ошибка загрузки точек наблюдения: {e}", "ошибка")
+
+    def run(self, n_cells=None):
+        """
+        Растр PPV вокруг блока и отчет по точкам наблюдения.
+        """
+        try:
+            started = time.perf_counter()
+            grid_data = st.session_state.get("grid_data")
+            if grid_data is None or grid_data.empty:
+                st.sidebar.warning("Сетка скважин не сгенерирована. Сначала выполните генерацию сетки.")
+                self.logs_manager.add_log("ground_vibration", "Ошибка: сетка скважин отсутствует.", "ошибка")
+                return
+
+            params = st.session_state.get("user_parameters", {})
+            missing = [name for name in self.REQUIRED_PARAMETERS if not isinstance(params.get(name), (int, float))]
+            if missing:
+                st.sidebar.error(f"❌ Ошибка: отсутствуют параметры: {', '.join(missing)}.")
+                self.logs_manager.add_log("ground_vibration", f"Ошибка: отсутствуют параметры {missing}.", "ошибка")
+                return
+
+            mass, charge, times = self.hole_charges(grid_data, params)
+            if not np.isfinite(times).any():
+                st.sidebar.warning("⚠ Схема замедлений не рассчитана: скважины считаются взрываемыми раздельно.")
+
+            hx = grid_data["X"].to_numpy(dtype=float)
+            hy = grid_data["Y"].to_numpy(dtype=float)
+            x_axis, y_axis, ppv, governing = self.ppv_raster(hx, hy, charge, params, n_cells or self.N_CELLS)
+
+            points = st.session_state.get("monitoring_points")
+            report = None
+            if isinstance(points, pd.DataFrame) and not points.empty:
+                report = self.point_report(points, grid_data, mass, charge, times, params)
+
+            st.session_state["ground_vibration"] = {
+                "x": x_axis,
+                "y": y_axis,
+                "ppv": ppv,
+                "limit": float(params["ppv_limit"]),
+                "max_charge_per_delay": float(charge.max()),
+                "points": report,
+            }
+
+            elapsed = time.perf_counter() - started
+            self.logs_manager.add_log(
+                "ground_vibration",
+                f"✅ Растр PPV {ppv.shape[1]}×{ppv.shape[0]} по {len(grid_data)} скважинам за {elapsed:.2f} с; "
+                f"макс. масса ВВ в окне {charge.max():.0f} кг.",
+                "успех"
+            )
+            st.sidebar.success(f"✅ Прогноз сейсмического действия рассчитан за {elapsed:.2f} с.")
+            if report is not None and report["Превышение допустимого"].any():
+                st.sidebar.warning(f"⚠ Превышение допустимой PPV в точках: {', '.join(map(str, report.loc[report['Превышение допустимого'], 'Точка']))}.")
+
+        except Exception as e:
+            st.sidebar.error(f"❌ Ошибка прогноза сейсмического действия: {e}")
+            self.logs_manager.add_log("ground_vibration", f"Ошибка прогноза сейсмического действия: {e}", "ошибка")
+
+    def visualize(self, display_cells=400):
+        """
+        Карта PPV (логарифмическая шкала) с изолинией допустимого значения и точками наблюдения.
+        """
+        try:
+            results = st.session_state.get("ground_vibration")
+            if not results:
+                st.sidebar.warning("Нет результатов прогноза сейсмического действия.")
+                return
+
+            step = max(1, int(np.ceil(max(results["ppv"].shape) / display_cells)))
+            ppv = results["ppv"][::step, ::step]
+            x_axis, y_axis = results["x"][::step], results["y"][::step]
+
+            st.caption(f"Максимальная масса ВВ в окне замедления: {results['max_charge_per_delay']:.0f} кг; "
+                       f"допустимая PPV: {results['limit']:g} мм/с.")
+            fig = go.Figure()
+            fig.add_trace(go.Heatmap(x=x_axis, y=y_axis, z=np.log10(ppv), colorscale="YlOrRd",
+                                     colorbar=dict(title="lg PPV, мм/с"), name="PPV"))
+            fig.add_trace(go.Contour(x=x_axis, y=y_axis, z=ppv, showscale=False, name="Допустимая PPV",
+                                     contours=dict(type="constraint", operation="=", value=results["limit"]),
+                                     line=dict(color="black", width=2, dash="dash")))
+
+            grid_data = st.session_state.get("grid_data")
+            if isinstance(grid_data, pd.DataFrame) and not grid_data.empty:
+                fig.add_trace(go.Scattergl(x=grid_data["X"], y=grid_data["Y"], mode="markers", name="Скважины",
+                                           marker=dict(color="black", size=3)))
+
+            points = st.session_state.get("monitoring_points")
+            if isinstance(points, pd.DataFrame) and not points.empty:
+                fig.add_trace(go.Scatter(x=points["X"], y=points["Y"], mode="markers+text", text=points["Название"],
+                                         textposition="top center", name="Точки наблюдения",
+                                         marker=dict(symbol="triangle-up", color="blue", size=12)))
+
+            fig.update_layout(title="Прогноз пиковой скорости колебаний грунта (PPV)", xaxis_title="X координата",
+                              yaxis_title="Y координата", yaxis=dict(scaleanchor="x"), height=650)
+            st.plotly_chart(fig)
+
+            if results["points"] is not None:
+                st.dataframe(results["points"].round(2), use_container_width=True)
+
+        except Exception as e:
+            st.sidebar.error(f"Ошибка визуализации сейсмического действия: {e}")
+            self.logs_manager.add_log("ground_vibration", f"Ошибка визуализации сейсмического действия: {e}", "ошибка")
@@ -0,0 +1,301 @@
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+from scipy.spatial import cKDTree
+
+from utils.logs_manager import LogsManager
+from utils.session_state_manager import SessionStateManager
+
+
+def direction_vectors(dip, azimuth):
+    """
+    Единичные векторы направления скважины вниз по стволу; dip — угол к горизонту,
+    azimuth — по часовой стрелке от оси Y, градусы.
+    """
+    dip, azimuth = np.radians(dip), np.radians(azimuth)
+    return np.column_stack([np.cos(dip) * np.sin(azimuth), np.cos(dip) * np.cos(azimuth), -np.sin(dip)])
+
+
+def segment_distances(p1, q1, p2, q2):
+    """
+    Кратчайшие расстояния между отрезками [p1, q1] и [p2, q2] (массивы N×3) и параметры
+    ближайших точек s, t ∈ [0, 1] на каждом отрезке.
+    """
+    eps = 1e-12
+    d1, d2, r = q1 - p1, q2 - p2, p1 - p2
+    a = np.einsum("ij,ij->i", d1, d1)
+    e = np.einsum("ij,ij->i", d2, d2)
+    f = np.einsum("ij,ij->i", d2, r)
+    c = np.einsum("ij,ij->i", d1, r)
+    b = np.einsum("ij,ij->i", d1, d2)
+    denominator = a * e - b * b
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Непараллельные отрезки — точка минимума прямых, зажатая в [0, 1]; параллельные — s = 0
+        s = np.where(denominator > eps, np.clip((b * f - c * e) / denominator, 0.0, 1.0), 0.0)
+        t = np.where(e > eps, (b * s + f) / e, 0.0)
+
+        below, above = t < 0.0, t > 1.0
+        t = np.clip(t, 0.0, 1.0)
+        s = np.where(below, np.where(a > eps, np.clip(-c / a, 0.0, 1.0), 0.0), s)
+        s = np.where(above, np.where(a > eps, np.clip((b - c) / a, 0.0, 1.0), 0.0), s)
+
+    closest_1 = p1 + d1 * s[:, None]
+    closest_2 = p2 + d2 * t[:, None]
+    return np.linalg.norm(closest_1 - closest_2, axis=1), s, t
+
+
+class HoleTrajectories:
+    """
+    Пространственные траектории скважин и фактическое расстояние между зарядами на глубине.
+
+    Траектория — ломаная от устья (X, Y, Z) по станциям инклинометрии (глубина по
+    стволу, угол наклона, азимут; приращения — по среднему направлению соседних
+    станций) или прямая с проектными hole_dip/hole_azimuth. Колонка заряда — участок
+    ствола от забойки до забоя. Пары отрезков-кандидатов отбираются по k-d дереву
+    середин, расстояния между ними считаются векторно (отрезок — отрезок).
+    """
+    REQUIRED_PARAMETERS = ["S", "B", "H", "subdrill", "L_tot", "hole_dip", "hole_azimuth"]
+    SURVEY_COLUMNS = ["ID", "depth", "dip", "azimuth"]
+    BURDEN_COLUMN = "Расстояние до соседнего заряда, м"
+
+    def __init__(self, session_manager: SessionStateManager, logs_manager: LogsManager):
+        self.session_manager = session_manager
+        self.logs_manager = logs_manager
+
+    def load_survey(self, uploaded_file):
+        """
+        Инклинометрия (.csv): ID скважины, depth (глубина по стволу, м), dip, azimuth (градусы).
+        """
+        try:
+            survey = pd.read_csv(uploaded_file)
+            survey.columns = [str(col).strip() for col in survey.columns]
+            if not set(self.SURVEY_COLUMNS).issubset(survey.columns):
+                st.sidebar.error(f"❌ Ошибка: в файле инклинометрии нужны столбцы {', '.join(self.SURVEY_COLUMNS)}.")
+                return
+
+            survey = survey[self.SURVEY_COLUMNS].apply(pd.to_numeric, errors="coerce").dropna()
+            survey = survey.sort_values(["ID", "depth"]).reset_index(drop=True)
+            st.session_state["deviation_survey"] = survey
+            st.sidebar.success(f"Загружена инклинометрия: {survey['ID'].nunique()} скважин, {len(survey)} станций.")
+            self.logs_manager.add_log("hole_trajectories", f"Загружена инклинометрия: {len(survey)} станций.", "успех")
+
+        except Exception as e:
+            st.sidebar.error(f"❌ Ошибка загрузки инклинометрии: {e}")
+            self.logs_manager.add_log("hole_trajectories", f"Ошибка загрузки инклинометрии: {e}", "ошибка")
+
+    def hole_values(self, grid_data, params, name):
+        if name in grid_data.columns:
+            return grid_data[name].to_numpy(dtype=float)
+        return np.full(len(grid_data), float(params[name]))
+
+    def charge_intervals(self, grid_data, params, dip):
+        """
+        Длина ствола и глубина начала заряда по стволу для каждой скважины, м
+        (длина скважины и забойка паспорта — по вертикали, пересчитываются на ствол через sin(dip)).
+        """
+        design = SessionStateManager.get_grid_table("charge_design", grid_data)
+        if design is not None:
+            vertical_length = design["Длина скважины, м"].to_numpy(dtype=float)
+            stemming = design["Забойка, м"].to_numpy(dtype=float)
+        else:
+            vertical_length = self.hole_values(grid_data, params, "H") + self.hole_values(grid_data, params, "subdrill")
+            stemming = np.maximum(vertical_length - float(params["L_tot"]), 0.0)
+        sin_dip = np.sin(np.radians(dip))
+        return vertical_length / sin_dip, stemming / sin_dip
+
+    def stations(self, grid_data, collar, dip, azimuth, hole_length, survey):
+        """
+        Станции траекторий: индекс скважины, глубина по стволу, координаты (N×3).
+        Для скважин без инклинометрии — устье и забой по проектному направлению;
+        инклинометрия продлевается до забоя по направлению последней станции.
+        """
+        index = np.arange(len(grid_data))
+        surveyed = np.zeros(len(grid_data), dtype=bool)
+        hole_index, depth, directions = [index, index], [np.zeros(len(index)), hole_length], None
+
+        if isinstance(survey, pd.DataFrame) and not survey.empty:
+            position = pd.Series(index, index=grid_data["ID"].to_numpy())
+            survey = survey[survey["ID"].isin(position.index)]
+            survey_hole = position.loc[survey["ID"]].to_numpy()
+            surveyed[survey_hole] = True
+
+            # Устье и конец ствола с направлением первой/последней станции
+            first = survey.groupby("ID", sort=False).head(1)
+            last = survey.groupby("ID", sort=False).tail(1)
+            frames = [
+                pd.DataFrame({"hole": position.loc[first["ID"]].to_numpy(), "depth": 0.0,
+                              "dip": first["dip"].to_numpy(), "azimuth": first["azimuth"].to_numpy()}),
+                pd.DataFrame({"hole": survey_hole, "depth": survey["depth"].to_numpy(),
+                              "dip": survey["dip"].to_numpy(), "azimuth": survey["azimuth"].to_numpy()}),
+            ]
+            end_hole = position.loc[last["ID"]].to_numpy()
+            frames.append(pd.DataFrame({"hole": end_hole, "depth": np.maximum(hole_length[end_hole], last["depth"].to_numpy()),
+                                        "dip": last["dip"].to_numpy(), "azimuth": last["azimuth"].to_numpy()}))
+            surveyed_stations = pd.concat(frames).drop_duplicates(["hole", "depth"]).sort_values(["hole", "depth"], kind="stable")
+
+            hole_index = [index[~surveyed], index[~surveyed], surveyed_stations["hole"].to_numpy()]
+            depth = [np.zeros((~surveyed).sum()), hole_length[~surveyed], surveyed_stations["depth"].to_numpy()]
+            directions = direction_vectors(surveyed_stations["dip"].to_numpy(), surveyed_stations["azimuth"].to_numpy())
+
+        straight = direction_vectors(dip[~surveyed], azimuth[~surveyed])
+        points = [collar[~surveyed], collar[~surveyed] + straight * hole_length[~surveyed, None]]
+
+        if directions is not None:
+            hole = hole_index[2]
+            increments = np.zeros_like(directions)
+            same_hole = hole[1:] == hole[:-1]
+            step = np.diff(depth[2])[:, None] * (directions[1:] + directions[:-1]) / 2
+            increments[1:] = np.where(same_hole[:, None], step, 0.0)
+            cumulative = np.cumsum(increments, axis=0)
+            starts = np.flatnonzero(np.r_[True, ~same_hole])
+            offsets = np.repeat(cumulative[starts], np.diff(np.r_[starts, len(hole)]), axis=0)
+            points.append(collar[hole] + cumulative - offsets)
+
+        order = np.lexsort((np.concatenate(depth), np.concatenate(hole_index)))
+        return np.concatenate(hole_index)[order], np.concatenate(depth)[order], np.concatenate(points)[order]
+
+    def charge_segments(self, hole, depth, points, top, bottom):
+        """
+        Отрезки ствола, обрезанные по интервалу заряда [top, bottom] своей скважины.
+        """
+        same = hole[1:] == hole[:-1]
+        h, m0, m1 = hole[:-1][same], depth[:-1][same], depth[1:][same]
+        p0, p1 = points[:-1][same], points[1:][same]
+        keep = (m1 > top[h]) & (m0 < bottom[h]) & (m1 > m0)
+        h, m0, m1, p0, p1 = h[keep], m0[keep], m1[keep], p0[keep], p1[keep]
+
+        start = np.maximum(m0, top[h])
+        end = np.minimum(m1, bottom[h])
+        fraction_start = ((start - m0) / (m1 - m0))[:, None]
+        fraction_end = ((end - m0) / (m1 - m0))[:, None]
+        return h, start, end, p0 + (p1 - p0) * fraction_start, p0 + (p1 - p0) * fraction_end
+
+    def nearest_charges(self, hole, start, end, p, q, n_holes, search_radius):
+        """
+        Для каждой скважины: наименьшее расстояние до заряда другой скважины, эта скважина
+        и глубина по стволу ближайшей точки.
+        """
+        midpoints = (p + q) / 2
+        half_lengths = np.linalg.norm(q - p, axis=1) / 2
+        pairs = cKDTree(midpoints).query_pairs(search_radius + 2 * half_lengths.max(), output_type="ndarray")
+        pairs = pairs[hole[pairs[:, 0]] != hole[pairs[:, 1]]]
+        i, j = pairs[:, 0], pairs[:, 1]
+        distance, s, t = segment_distances(p[i], q[i], p[j], q[j])
+
+        # Пары учитываются в обе стороны: (i → j) и (j → i)
+        source = np.concatenate([i, j])
+        target = np.concatenate([j, i])
+        distance = np.concatenate([distance, distance])
+        fraction = np.concatenate([s, t])
+
+        best = np.full(n_holes, np.inf)
+        np.minimum.at(best, hole[source], distance)
+        winner = np.flatnonzero(distance <= best[hole[source]])
+        neighbour = np.full(n_holes, -1)
+        at_depth = np.full(n_holes, np.nan)
+        neighbour[hole[source[winner]]] = hole[target[winner]]
+        at_depth[hole[source[winner]]] = (start[source] + (end[source] - start[source]) * fraction)[winner]
+        best[~np.isfinite(best)] = np.nan
+        return best, neighbour, at_depth
+
+    def run(self):
+        """
+        Траектории скважин (устье, забой, наклон, азимут в grid_data) и расстояния между зарядами.
+        """
+        try:
+            started = time.perf_counter()
+            grid_data = st.session_state.get("grid_data")
+            if grid_data is None or grid_data.empty:
+                st.sidebar.warning("Сетка скважин не сгенерирована. Сначала выполните генерацию сетки.")
+                self.logs_manager.add_log("hole_trajectories", "Ошибка: сетка скважин отсутствует.", "ошибка")
+                return
+
+            params = st.session_state.get("user_parameters", {})
+            missing = [name for name in self.REQUIRED_PARAMETERS if not isinstance(params.get(name), (int, float))]
+            if missing:
+                st.sidebar.error(f"❌ Ошибка: отсутствуют параметры: {', '.join(missing)}.")
+                self.logs_manager.add_log("hole_trajectories", f"Ошибка: отсутствуют параметры {missing}.", "ошибка")
+                return
+
+            dip = self.hole_values(grid_data, params, "hole_dip")
+            azimuth = self.hole_values(grid_data, params, "hole_azimuth")
+            collar_z = grid_data["Z"].to_numpy(dtype=float) if "Z" in grid_data.columns \
+                else float(params.get("floor_elevation", 0.0)) + self.hole_values(grid_data, params, "H")
+            collar = np.column_stack([grid_data["X"].to_numpy(dtype=float), grid_data["Y"].to_numpy(dtype=float), collar_z])
+            hole_length, stemming = self.charge_intervals(grid_data, params, dip)
+
+            hole, depth, points = self.stations(grid_data, collar, dip, azimuth, hole_length,
+                                                st.session_state.get("deviation_survey"))
+            toe = points[np.r_[np.flatnonzero(hole[1:] != hole[:-1]), len(hole) - 1]]
+
+            segments = self.charge_segments(hole, depth, points, stemming, hole_length)
+            search_radius = 2 * max(float(params["S"]), float(params["B"]))
+            distance, neighbour, at_depth = self.nearest_charges(*segments, len(grid_data), search_radius)
+
+            grid_data = grid_data.copy()
+            grid_data["Z"] = collar_z
+            grid_data["hole_dip"] = dip
+            grid_data["hole_azimuth"] = azimuth
+            grid_data["X_toe"], grid_data["Y_toe"], grid_data["Z_toe"] = toe[:, 0], toe[:, 1], toe[:, 2]
+            st.session_state["grid_data"] = grid_data
+
+            design_burden = min(float(params["S"]), float(params["B"]))
+            table = grid_data[["ID", "X", "Y"]].copy()
+            table[self.BURDEN_COLUMN] = distance
+            table["Соседняя скважина (ID)"] = np.where(neighbour >= 0, grid_data["ID"].to_numpy()[np.maximum(neighbour, 0)], -1)
+            table["Глубина по стволу, м"] = at_depth
+            table["Доля проектного расстояния"] = distance / design_burden
+            st.session_state["hole_trajectories"] = {
+                "table": table,
+                "design_burden": design_burden,
+                "segments": segments,
+            }
+
+            elapsed = time.perf_counter() - started
+            self.logs_manager.add_log(
+                "hole_trajectories",
+                f"✅ Траектории {len(grid_data)} скважин, {len(segments[0])} отрезков заряда; "
+                f"мин. расстояние между зарядами {np.nanmin(distance):.2f} м ({elapsed:.2f} с).",
+                "успех"
+            )
+            st.sidebar.success(f"✅ Фактические расстояния между зарядами рассчитаны за {elapsed:.2f} с.")
+
+        except Exception as e:
+            st.sidebar.error(f"❌ Ошибка расчета траекторий скважин: {e}")
+            self.logs_manager.add_log("hole_trajectories", f"Ошибка расчета траекторий скважин: {e}", "ошибка")
+
+    def visualize(self, threshold=0.8):
+        """
+        План скважин по фактическому расстоянию до соседнего заряда; скважины ниже
+        threshold от проектного расстояния выделены.
+        """
+        try:
+            results = st.session_state.get("hole_trajectories")
+            if not results:
+                st.sidebar.warning("Нет рассчитанных траекторий скважин.")
+                return
+
+            table = results["table"]
+            close = table[table["Доля проектного расстояния"] < threshold]
+            st.caption(f"Проектное расстояние min(S, B): {results['design_burden']:g} м; "
+                       f"скважин ближе {threshold:.0%} от проектного: {len(close)}.")
+
+            fig = go.Figure()
+            fig.add_trace(go.Scattergl(
+                x=table["X"], y=table["Y"], mode="markers", name="Скважины",
+                marker=dict(color=table[self.BURDEN_COLUMN], colorscale="RdYlGn", size=7, colorbar=dict(title="м")),
+                text=table["ID"], hovertemplate="ID %{text}<br>%{marker.color:.2f} м<extra></extra>"
+            ))
+            fig.add_trace(go.Scattergl(x=close["X"], y=close["Y"], mode="markers", name="Сближение зарядов",
+                                       marker=dict(symbol="circle-open", color="red", size=12, line=dict(width=2))))
+            fig.update_layout(title="Фактическое расстояние между зарядами на глубине", xaxis_title="X координата",
+                              yaxis_title="Y координата", yaxis=dict(scaleanchor="x"), height=650)
+            st.plotly_chart(fig)
+
+        except Exception as e:
+            st.sidebar.error(f"Ошибка визуализации траекторий скважин: {e}")
+            self.logs_manager.add_log("hole_trajectories", f"Ошибка визуализации траекторий скважин: {e}", "ошибка")
@@ -0,0 +1,179 @@
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+from scipy.spatial import cKDTree
+
+from utils.logs_manager import LogsManager
+from utils.session_state_manager import SessionStateManager
+
+
+TIME_COLUMN = "Время инициирования, мс"
+OVERLAP_COLUMN = "Скважин в окне замедления"
+
+
+def holes_in_window(times, window):
+    """
+    Число других скважин, взрывающихся в пределах ±window от каждой скважины.
+    """
+    order = np.argsort(times)
+    sorted_times = times[order]
+    counts = np.empty(len(times), dtype=int)
+    counts[order] = (np.searchsorted(sorted_times, sorted_times + window, side="left")
+                     - np.searchsorted(sorted_times, sorted_times - window, side="right") - 1)
+    return counts
+
+
+def window_charge(times, mass, window):
+    """
+    Масса ВВ, взрываемая в пределах ±window от каждой скважины (включая саму скважину), кг.
+    """
+    order = np.argsort(times)
+    sorted_times = times[order]
+    cumulative = np.concatenate([[0.0], np.cumsum(mass[order])])
+    charge = np.empty(len(times))
+    charge[order] = (cumulative[np.searchsorted(sorted_times, sorted_times + window, side="left")]
+                     - cumulative[np.searchsorted(sorted_times, sorted_times - window, side="right")])
+    return charge
+
+
+class InitiationTiming:
+    """
+    Проект схемы коммутации и замедлений.
+
+    Граф соседства скважин строится один раз по k-d дереву: соседи в ряду
+    (|ΔY| < B/4, |ΔX| < 5S/4) получают замедление между скважинами, соседи в смежном
+    ряду (|ΔY − B| < B/4, |ΔX| < 3S/4) — замедление между рядами. Время
+    инициирования каждой скважины — кратчайший путь от точки инициирования (Дейкстра).
+    """
+    REQUIRED_PARAMETERS = ["S", "B", "delay_hole", "delay_row", "delay_window"]
+    ROW_TOLERANCE = 0.25
+
+    def __init__(self, session_manager: SessionStateManager, logs_manager: LogsManager):
+        self.session_manager = session_manager
+        self.logs_manager = logs_manager
+
+    def neighbour_graph(self, x, y, S, B, delay_hole, delay_row):
+        """
+        Разреженная матрица смежности с замедлениями на ребрах, мс.
+        """
+        tree = cKDTree(np.column_stack([x, y]))
+        tolerance = self.ROW_TOLERANCE
+        radius = max((1 + tolerance) * S, np.hypot((0.5 + tolerance) * S, (1 + tolerance) * B))
+        pairs = tree.query_pairs(radius, output_type="ndarray")
+        dx = np.abs(x[pairs[:, 0]] - x[pairs[:, 1]])
+        dy = np.abs(y[pairs[:, 0]] - y[pairs[:, 1]])
+
+        same_row = (dy < tolerance * B) & (dx < (1 + tolerance) * S)
+        next_row = (np.abs(dy - B) < tolerance * B) & (dx < (0.5 + tolerance) * S)
+        weights = np.where(same_row, delay_hole, delay_row)
+        keep = same_row | next_row
+
+        # Нулевое замедление хранится как малое положительное, чтобы ребро не пропало из матрицы
+        weights = np.maximum(weights[keep], 1e-9)
+        pairs = pairs[keep]
+        return csr_matrix((weights, (pairs[:, 0], pairs[:, 1])), shape=(len(x), len(x)))
+
+    def firing_times(self, grid_data, start_index, params):
+        """
+        Времена инициирования скважин, мс (inf — скважина не связана с точкой инициирования).
+        """
+        x = grid_data["X"].to_numpy(dtype=float)
+        y = grid_data["Y"].to_numpy(dtype=float)
+        graph = self.neighbour_graph(x, y, float(params["S"]), float(params["B"]),
+                                     float(params["delay_hole"]), float(params["delay_row"]))
+        return dijkstra(graph, directed=False, indices=start_index)
+
+    def run(self, start_id):
+        """
+        Расчет времен инициирования от скважины start_id и проверка окна одновременного взрывания.
+        """
+        try:
+            started = time.perf_counter()
+            grid_data = st.session_state.get("grid_data")
+            if grid_data is None or grid_data.empty:
+                st.sidebar.warning("Сетка скважин не сгенерирована. Сначала выполните генерацию сетки.")
+                self.logs_manager.add_log("initiation_timing", "Ошибка: сетка скважин отсутствует.", "ошибка")
+                return
+
+            params = st.session_state.get("user_parameters", {})
+            missing = [name for name in self.REQUIRED_PARAMETERS if not isinstance(params.get(name), (int, float))]
+            if missing:
+                st.sidebar.error(f"❌ Ошибка: отсутствуют параметры: {', '.join(missing)}.")
+                self.logs_manager.add_log("initiation_timing", f"Ошибка: отсутствуют параметры {missing}.", "ошибка")
+                return
+
+            matches = np.flatnonzero(grid_data["ID"].to_numpy() == start_id)
+            if len(matches) == 0:
+                st.sidebar.error(f"❌ Ошибка: скважина {start_id} не найдена в сетке.")
+                return
+
+            times = self.firing_times(grid_data, int(matches[0]), params)
+            connected = np.isfinite(times)
+            window = float(params["delay_window"])
+            overlaps = np.zeros(len(times), dtype=int)
+            overlaps[connected] = holes_in_window(times[connected], window)
+
+            timing = grid_data[["ID", "X", "Y"]].copy()
+            timing[TIME_COLUMN] = np.where(connected, times, np.nan)
+            timing[OVERLAP_COLUMN] = overlaps
+            SessionStateManager.set_grid_table("initiation_timing", timing, grid_data)
+            st.session_state["initiation_start_id"] = start_id
+
+            elapsed = time.perf_counter() - started
+            n_conflicts = int((overlaps > 0).sum())
+            self.logs_manager.add_log(
+                "initiation_timing",
+                f"✅ Схема замедлений: {len(timing)} скважин, длительность {np.nanmax(timing[TIME_COLUMN]):.0f} мс, "
+                f"скважин с перекрытием в окне {window:g} мс: {n_conflicts}; {elapsed:.3f} с.",
+                "успех"
+            )
+            st.sidebar.success(f"✅ Времена инициирования рассчитаны за {elapsed:.3f} с.")
+            if n_conflicts:
+                st.sidebar.warning(f"⚠ Скважин, взрывающихся в пределах {window:g} мс от другой скважины: {n_conflicts}.")
+            if not connected.all():
+                st.sidebar.warning(f"⚠ Скважин, не связанных с точкой инициирования: {int((~connected).sum())}.")
+
+        except Exception as e:
+            st.sidebar.error(f"❌ Ошибка расчета схемы замедлений: {e}")
+            self.logs_manager.add_log("initiation_timing", f"Ошибка расчета схемы замедлений: {e}", "ошибка")
+
+    def visualize(self):
+        """
+        План скважин с временами инициирования; скважины с перекрытием в окне выделены.
+        """
+        try:
+            timing = st.session_state.get("initiation_timing")
+            if not isinstance(timing, pd.DataFrame) or timing.empty:
+                st.sidebar.warning("Нет рассчитанной схемы замедлений.")
+                return
+
+            conflicts = timing[timing[OVERLAP_COLUMN] > 0]
+            start = timing[timing["ID"] == st.session_state.get("initiation_start_id")]
+
+            fig = go.Figure()
+            fig.add_trace(go.Scattergl(
+                x=timing["X"], y=timing["Y"], mode="markers", name="Скважины",
+                marker=dict(color=timing[TIME_COLUMN], colorscale="Turbo", size=7,
+                            colorbar=dict(title="мс")),
+                text=timing["ID"], hovertemplate="ID %{text}<br>%{marker.color:.0f} мс<extra></extra>"
+            ))
+            fig.add_trace(go.Scattergl(
+                x=conflicts["X"], y=conflicts["Y"], mode="markers", name="Перекрытие в окне замедления",
+                marker=dict(symbol="circle-open", color="red", size=12, line=dict(width=2))
+            ))
+            fig.add_trace(go.Scattergl(
+                x=start["X"], y=start["Y"], mode="markers", name="Точка инициирования",
+                marker=dict(symbol="star", color="black", size=16)
+            ))
+            fig.update_layout(title="Схема инициирования", xaxis_title="X координата",
+                              yaxis_title="Y координата", yaxis=dict(scaleanchor="x"), height=650)
+            st.plotly_chart(fig)
+
+        except Exception as e:
+            st.sidebar.error(f"Ошибка визуализации схемы замедлений: {e}")
+            self.logs_manager.add_log("initiation_timing", f"Ошибка визуализации схемы замедлений: {e}", "ошибка")
@@ -0,0 +1,164 @@
+"""
+Векторизованные формулы цепочки расчетов Кузнецова–Рамлера / Swebrec.
+
+Функции повторяют шаги класса Calculations, но принимают скаляры или массивы NumPy
+одинаковой (или транслируемой) формы, поэтому подходят для пакетных расчетов
+(Монте-Карло, анализ чувствительности, расчет по скважинам).
+"""
+
+import numpy as np
+from scipy.special import gamma
+
+ENERGY_ANFO = 4.2  # МДж/кг, энергия АНФО (как в Calculations.calculate_s_anfo)
+LN2 = np.log(2)
+
+# Входные параметры полной цепочки расчетов
+CHAIN_INPUTS = [
+    "rho", "sigma_c", "E", "RMD", "Q", "energy_vv", "H", "S", "B",
+    "SD", "in_situ_block_size", "Ø_h", "L_b", "L_c", "L_tot",
+]
+
+
+def calculate_rdi(rho):
+    """
+    RDI — влияние плотности породы.
+    """
+    return 0.025 * np.asarray(rho, dtype=float) - 50
+
+
+def calculate_hf(E, sigma_c):
+    """
+    HF — фактор твердости породы.
+    """
+    E = np.asarray(E, dtype=float)
+    sigma_c = np.asarray(sigma_c, dtype=float)
+    return np.where(E < 50, E / 3, sigma_c / 5)
+
+
+def calculate_a(RMD, RDI, HF, k_A=1.0):
+    """
+    A — фактор породы. k_A — калибровочный коэффициент домена породы.
+    """
+    return 0.06 * (np.asarray(RMD, dtype=float) + RDI + HF) * k_A
+
+
+def calculate_s_anfo(energy_vv):
+    """
+    s_ANFO — относительная энергия ВВ, %.
+    """
+    return np.asarray(energy_vv, dtype=float) / ENERGY_ANFO * 100
+
+
+def calculate_q(Q, H, S, B):
+    """
+    q — удельный расход ВВ, кг/м³.
+    """
+    return np.asarray(Q, dtype=float) / (np.asarray(H, dtype=float) * S * B)
+
+
+def calculate_x_max(in_situ_block_size, S, B):
+    """
+    x_max — максимальный размер фрагмента, мм (S и B задаются в метрах).
+    """
+    S_mm = np.asarray(S, dtype=float) * 1000
+    B_mm = np.asarray(B, dtype=float) * 1000
+    return np.minimum(np.minimum(np.asarray(in_situ_block_size, dtype=float), S_mm), B_mm)
+
+
+def calculate_n(x_max, x_50, S, B, d_h, SD, L_b, L_c, L_tot, H, k_n=1.0):
+    """
+    n — коэффициент равномерности распределения. Диаметр скважины d_h задается в мм,
+    k_n — калибровочный коэффициент домена породы.
+    """
+    d_h = np.asarray(d_h, dtype=float) / 1000
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (
+            2 * LN2 * np.log(x_max / x_50) *
+            (2.2 - 0.014 * (B / d_h)) *
+            (1 - SD / B) *
+            np.sqrt((1 + S / B) / 2) *
+            ((L_b - L_c) / L_tot + 0.1) ** 0.1 *
+            (L_tot / H) * k_n
+        )
+
+
+def calculate_g_n(n):
+    """
+    g(n) — поправочный коэффициент Swebrec.
+    """
+    n = np.asarray(n, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return LN2 ** (1 / n) / gamma(1 + 1 / n)
+
+
+def calculate_x_50(A, Q, s_anfo, q, n):
+    """
+    x_50 — медианный размер фрагмента с поправкой Swebrec, мм.
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return A * np.asarray(Q, dtype=float) ** (1 / 6) * (115 / s_anfo) ** 0.633 / q ** 0.8 * calculate_g_n(n)
+
+
+def calculate_b(x_max, x_50, n):
+    """
+    b — параметр формы кривой Swebrec.
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return 2 * LN2 * np.log(x_max / x_50) * n
+
+
+def run_chain(params, x_50_ref, tolerance=0.05, max_iterations=5, k_A=1.0, k_n=1.0):
+    """
+    Полная цепочка расчетов БВР для массивов входных параметров.
+
+    Повторяет Calculations.run_all_calculations, включая итерационный расчет n и x_50
+    от эталонного x_50: каждая реализация прекращает итерации независимо, как только
+    относительное изменение x_50 не превышает tolerance.
+
+    :param params: словарь {имя параметра: скаляр или массив}, ключи из CHAIN_INPUTS.
+    :param x_50_ref: эталонное значение x_50 (скаляр или массив).
+    :param k_A, k_n: калибровочные коэффициенты A и n (скаляры или массивы).
+    :return: словарь массивов RDI, HF, A, s_ANFO, q, x_max, n, g_n, x_50, b.
+    """
+    p = {name: np.asarray(params[name], dtype=float) for name in CHAIN_INPUTS}
+    shape = np.broadcast(*p.values(), np.asarray(x_50_ref, dtype=float), np.asarray(k_A), np.asarray(k_n)).shape
+
+    rdi = calculate_rdi(p["rho"])
+    hf = calculate_hf(p["E"], p["sigma_c"])
+    a = calculate_a(p["RMD"], rdi, hf, k_A)
+    s_anfo = calculate_s_anfo(p["energy_vv"])
+    q = calculate_q(p["Q"], p["H"], p["S"], p["B"])
+    x_max = calculate_x_max(p["in_situ_block_size"], p["S"], p["B"])
+
+    x_50_current = np.broadcast_to(np.asarray(x_50_ref, dtype=float), shape).copy()
+    n = np.full(shape, np.nan)
+    x_50 = np.full(shape, np.nan)
+    active = np.ones(shape, dtype=bool)
+
+    for _ in range(max_iterations):
+        n_iter = calculate_n(x_max, x_50_current, p["S"], p["B"], p["Ø_h"], p["SD"],
+                             p["L_b"], p["L_c"], p["L_tot"], p["H"], k_n)
+        x_50_new = calculate_x_50(a, p["Q"], s_anfo, q, n_iter)
+
+        n = np.where(active, n_iter, n)
+        x_50 = np.where(active, x_50_new, x_50)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            converged = np.abs(x_50_new - x_50_current) / x_50_current <= tolerance
+        x_50_current = np.where(active, x_50_new, x_50_current)
+        active &= ~converged
+        if not active.any():
+            break
+
+    return {
+        "RDI": np.broadcast_to(rdi, shape),
+        "HF": np.broadcast_to(hf, shape),
+        "A": np.broadcast_to(a, shape),
+        "s_ANFO": np.broadcast_to(s_anfo, shape),
+        "q": np.broadcast_to(q, shape),
+        "x_max": np.broadcast_to(x_max, shape),
+        "n": n,
+        "g_n": calculate_g_n(n),
+        "x_50": x_50,
+        "b": calculate_b(x_max, x_50, n),
+    }
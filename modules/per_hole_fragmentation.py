@@ -0,0 +1,166 @@
+import time
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+import plotly.express as px
+
+from modules import kuzram_model, psd_engine
+from modules.reference_calculations import ReferenceCalculations
+from modules.rock_factor_calibration import RockFactorCalibration
+from utils.logs_manager import LogsManager
+from utils.session_state_manager import SessionStateManager
+
+
+class PerHoleFragmentation:
+    """
+    Расчет фрагментации по каждой скважине и PSD блока как смеси кривых Swebrec
+    отдельных скважин, взвешенных по взрываемому объему.
+    """
+    N_SIZE_POINTS = 500
+
+    def __init__(self, session_manager: SessionStateManager, logs_manager: LogsManager):
+        self.session_manager = session_manager
+        self.logs_manager = logs_manager
+
+    def get_hole_inputs(self, grid_data):
+        """
+        Входные параметры цепочки по скважинам.
+
+        Если в grid_data есть столбец с именем параметра (H, rho, Q, ...), используется
+        значение скважины, иначе — значение параметра блока из user_parameters.
+        """
+        params = st.session_state.get("user_parameters", {})
+        inputs = {}
+        missing = []
+        for name in kuzram_model.CHAIN_INPUTS:
+            if name in grid_data.columns:
+                inputs[name] = grid_data[name].to_numpy(dtype=float)
+            elif isinstance(params.get(name), (int, float)):
+                inputs[name] = np.full(len(grid_data), float(params[name]))
+            else:
+                missing.append(name)
+        return inputs, missing
+
+    def mixture_psd(self, x_values, x_50, x_max, b, weights, chunk_size=2000):
+        """
+        PSD блока: P(x) = Σ wᵢ·Pᵢ(x) / Σ wᵢ.
+
+        Кривые скважин вычисляются блоками по chunk_size скважин (матрица
+        скважины × размеры) и сразу сворачиваются с весами, поэтому память
+        ограничена размером блока.
+        """
+        total = np.zeros(len(x_values))
+        for start in range(0, len(x_50), chunk_size):
+            stop = start + chunk_size
+            p_x = psd_engine.psd_matrix(x_values, x_50[start:stop], x_max[start:stop], b[start:stop])
+            total += weights[start:stop] @ p_x
+        return total / weights.sum()
+
+    def run_calculations(self):
+        """
+        Расчет x_50, n, b по скважинам и PSD блока (смесь по объему).
+        """
+        try:
+            started = time.perf_counter()
+            grid_data = st.session_state.get("grid_data")
+            if grid_data is None or grid_data.empty:
+                st.sidebar.warning("Сетка скважин не сгенерирована. Сначала выполните генерацию сетки.")
+                self.logs_manager.add_log("per_hole_fragmentation", "Ошибка: сетка скважин отсутствует.", "ошибка")
+                return
+
+            x_50_ref = st.session_state.get("reference_parameters", {}).get("target_x_50")
+            if x_50_ref is None or not isinstance(x_50_ref, (int, float)):
+                st.sidebar.error("❌ Ошибка: отсутствует эталонное значение x_50. Утвердите эталонные параметры.")
+                self.logs_manager.add_log("per_hole_fragmentation", "Ошибка: отсутствует эталонное значение x_50.", "ошибка")
+                return
+
+            inputs, missing = self.get_hole_inputs(grid_data)
+            if missing:
+                st.sidebar.error(f"❌ Ошибка: отсутствуют параметры: {', '.join(missing)}.")
+                self.logs_manager.add_log("per_hole_fragmentation", f"Ошибка: отсутствуют параметры {missing}.", "ошибка")
+                return
+
+            factors = RockFactorCalibration.get_factors(st.session_state.get("user_parameters", {}).get("rock_domain"))
+            results = kuzram_model.run_chain(inputs, x_50_ref, **factors)
+
+            # Взрываемый объем, приходящийся на скважину
+            volume = inputs["S"] * inputs["B"] * inputs["H"]
+            valid = (np.isfinite(results["x_50"]) & np.isfinite(results["b"]) & (results["n"] > 0)
+                     & (results["x_50"] > 0) & (results["x_50"] < results["x_max"]) & (volume > 0))
+
+            per_hole = pd.DataFrame({
+                "ID": grid_data["ID"].to_numpy() if "ID" in grid_data.columns else np.arange(1, len(grid_data) + 1),
+                "X": grid_data["X"].to_numpy(),
+                "Y": grid_data["Y"].to_numpy(),
+                "H": inputs["H"],
+                "q": results["q"],
+                "x_max": results["x_max"],
+                "x_50": results["x_50"],
+                "n": results["n"],
+                "b": results["b"],
+                "V": volume,
+                "Корректный расчет": valid,
+            })
+            st.session_state["per_hole_results"] = per_hole
+
+            if not valid.any():
+                st.sidebar.error("❌ Ошибка: ни для одной скважины не получен корректный результат.")
+                self.logs_manager.add_log("per_hole_fragmentation", "Ошибка: нет корректных результатов по скважинам.", "ошибка")
+                return
+
+            x_max_block = float(results["x_max"][valid].max())
+            x_values = np.geomspace(ReferenceCalculations.STANDARD_X_VALUES[0], x_max_block, self.N_SIZE_POINTS)
+            p_block = self.mixture_psd(
+                x_values, results["x_50"][valid], results["x_max"][valid], results["b"][valid], volume[valid]
+            )
+
+            st.session_state["psd_table_block"] = pd.DataFrame({
+                "Размер фрагмента (x), мм": x_values,
+                "P(x) блока (смесь по скважинам), %": p_block,
+            })
+
+            elapsed = time.perf_counter() - started
+            n_invalid = int((~valid).sum())
+            self.logs_manager.add_log(
+                "per_hole_fragmentation",
+                f"✅ Фрагментация по скважинам рассчитана: {int(valid.sum())} скважин "
+                f"(некорректных: {n_invalid}) за {elapsed:.2f} с.",
+                "успех"
+            )
+            st.sidebar.success(f"✅ Фрагментация по {int(valid.sum())} скважинам рассчитана за {elapsed:.2f} с.")
+            if n_invalid:
+                st.sidebar.warning(f"⚠ Скважин с некорректными параметрами: {n_invalid}. Они исключены из PSD блока.")
+
+        except Exception as e:
+            st.sidebar.error(f"❌ Ошибка расчета фрагментации по скважинам: {e}")
+            self.logs_manager.add_log("per_hole_fragmentation", f"Ошибка расчета фрагментации по скважинам: {e}", "ошибка")
+
+    def visualize_per_hole_results(self):
+        """
+        Карта x_50 по скважинам и таблица результатов.
+        """
+        try:
+            per_hole = st.session_state.get("per_hole_results")
+            if not isinstance(per_hole, pd.DataFrame) or per_hole.empty:
+                st.sidebar.warning("Нет результатов расчета по скважинам.")
+                return
+
+            valid = per_hole[per_hole["Корректный расчет"]]
+            st.subheader("Фрагментация по скважинам")
+            st.write(
+                f"Скважин: {len(per_hole)}, x_50: мин {valid['x_50'].min():.1f} мм, "
+                f"средн. (по объему) {np.average(valid['x_50'], weights=valid['V']):.1f} мм, "
+                f"макс {valid['x_50'].max():.1f} мм"
+            )
+
+            fig = px.scatter(valid, x="X", y="Y", color="x_50", hover_data=["ID", "H", "n", "b"],
+                             color_continuous_scale="Viridis", title="Медианный размер фрагмента x_50 по скважинам, мм")
+            fig.update_yaxes(scaleanchor="x", scaleratio=1)
+            st.plotly_chart(fig)
+
+            st.dataframe(per_hole, use_container_width=True)
+
+        except Exception as e:
+            st.sidebar.error(f"Ошибка визуализации результатов по скважинам: {e}")
+            self.logs_manager.add_log("per_hole_fragmentation", f"Ошибка визуализации результатов по скважинам: {e}", "ошибка")
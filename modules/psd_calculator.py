@@ -1,8 +1,9 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
 
+from modules import psd_engine
 from utils.logs_manager import LogsManager
+from utils.result_cache import ResultCache
 from utils.session_state_manager import SessionStateManager
 
 class PSDCalculator:
@@ -12,6 +13,7 @@ class PSDCalculator:
     def __init__(self, session_manager: SessionStateManager, logs_manager: LogsManager):
         self.session_manager = session_manager
         self.logs_manager = logs_manager
+        self.result_cache = ResultCache(logs_manager)
 
     def run_calculations(self):
         """
@@ -38,12 +40,18 @@ class PSDCalculator:
             # Удаление старых данных перед записью новых
             st.session_state.pop("P_x_calculated", None)
 
-            p_x_calculated = [
-                (x, (1 / (1 + (np.log(x_max / x) / np.log(x_max / x_50)) ** b)) * 100)
-                for x in x_values if x <= x_max
-            ]
+            cache_params = {"x_values": list(x_values), "x_max": x_max, "x_50": x_50, "b": b}
+            df = self.result_cache.get("psd_calculator.P_x_calculated", cache_params)
+
+            if df is None:
+                df = psd_engine.psd_table(x_values, x_50, x_max, b, "P(x) рассчитанные, %")
+                if df.empty:
+                    st.sidebar.error("Ошибка: некорректные параметры кривой (x_50 должен быть в интервале (0, x_max), b > 0).")
+                    self.logs_manager.add_log("psd_calculator", "Пустой расчет P(x): некорректные x_50, x_max или b.", "ошибка")
+                    return
+
+                self.result_cache.set("psd_calculator.P_x_calculated", cache_params, df)
 
-            df = pd.DataFrame(p_x_calculated, columns=["Размер фрагмента (x), мм", "P(x) рассчитанные, %"])
             st.session_state["P_x_calculated"] = df
             st.sidebar.success("P(x) рассчитанные успешно вычислены.")
             self.logs_manager.add_log("psd_calculator", "P(x) рассчитанные успешно вычислены.", "успех")
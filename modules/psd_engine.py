@@ -0,0 +1,94 @@
+"""
+Векторизованный расчет кривых гранулометрического состава (PSD) по функции Swebrec.
+
+Единый движок для эталонной (ReferenceCalculations) и рассчитанной (PSDCalculator)
+таблиц PSD, а также для пакетных расчетов: кривая вычисляется одним выражением
+над массивом размеров, пограничные случаи обрабатываются масками.
+"""
+
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+SIZE_COLUMN = "Размер фрагмента (x), мм"
+FINE_SCALE_MIN = 0.07       # мм, нижняя граница шкалы (как в STANDARD_X_VALUES)
+FINE_SCALE_POINTS = 4000
+
+
+def psd_matrix(x_values, x_50, x_max, b):
+    """
+    Матрица P(x), % (число наборов параметров × число размеров).
+
+    P(x) = 100 / (1 + (ln(x_max/x) / ln(x_max/x_50))^b).
+    x_50, x_max, b — скаляры или одномерные массивы одной длины.
+    Маски: x >= x_max → 100 %; x <= 0 → 0 %; набор с x_50 вне (0, x_max)
+    или b <= 0 (в том числе x_50 = x_max) → NaN по всей строке.
+    """
+    x_values = np.asarray(x_values, dtype=float)
+    x_50, x_max, b = (np.atleast_1d(np.asarray(v, dtype=float))[:, None] for v in (x_50, x_max, b))
+
+    valid = (x_50 > 0) & (x_50 < x_max) & (b > 0)
+    inside = (x_values > 0) & (x_values < x_max) & valid
+
+    # Для точек вне области подставляем безопасные значения, чтобы не возникало делений на 0
+    safe_x = np.where(inside, x_values, 1.0)
+    safe_x_max = np.where(valid, x_max, 2.0)
+    safe_x_50 = np.where(valid, x_50, 1.0)
+    with np.errstate(over="ignore"):
+        ratio = np.log(safe_x_max / safe_x) / np.log(safe_x_max / safe_x_50)
+        p_x = 100 / (1 + ratio ** b)
+
+    p_x = np.where(x_values >= x_max, 100.0, np.where(x_values <= 0, 0.0, p_x))
+    return np.where(valid, p_x, np.nan)
+
+
+def psd_table(x_values, x_50, x_max, b, column):
+    """
+    Таблица PSD для одного набора параметров: размеры x <= x_max по возрастанию
+    и P(x), %. Точки с неопределенным P(x) исключаются.
+    """
+    x_values = np.sort(np.asarray(x_values, dtype=float))
+    x_values = x_values[x_values <= x_max]
+    p_x = psd_matrix(x_values, x_50, x_max, b)[0]
+    defined = np.isfinite(p_x)
+    return pd.DataFrame({SIZE_COLUMN: x_values[defined], column: p_x[defined]})
+
+
+@lru_cache(maxsize=32)
+def _fine_scale(x_max, n_points):
+    scale = np.geomspace(FINE_SCALE_MIN, x_max, n_points)
+    scale.flags.writeable = False  # Общий для всех вызовов массив защищен от изменения
+    return scale
+
+
+def fine_scale(x_max, n_points=FINE_SCALE_POINTS):
+    """
+    Логарифмическая шкала размеров высокого разрешения от 0.07 мм до x_max.
+    Вычисляется один раз для каждого x_max (кэш в памяти процесса).
+    """
+    return _fine_scale(float(x_max), int(n_points))
+
+
+def swebrec_inverse(percentiles, x_50, x_max, b):
+    """
+    Размер x_P, мм, при котором проход равен P %, в замкнутой форме (обратная функция Swebrec):
+    x_P = x_max · exp(−ln(x_max/x_50) · (100/P − 1)^(1/b)).
+
+    Возвращает матрицу (число наборов параметров × число процентилей).
+    P >= 100 → x_max, P <= 0 → 0, некорректный набор параметров → NaN.
+    """
+    percentiles = np.asarray(percentiles, dtype=float)
+    x_50, x_max, b = (np.atleast_1d(np.asarray(v, dtype=float))[:, None] for v in (x_50, x_max, b))
+
+    valid = (x_50 > 0) & (x_50 < x_max) & (b > 0)
+    inside = (percentiles > 0) & (percentiles < 100)
+
+    safe_p = np.where(inside, percentiles, 50.0)
+    safe_x_max = np.where(valid, x_max, 2.0)
+    safe_x_50 = np.where(valid, x_50, 1.0)
+    with np.errstate(over="ignore"):
+        x_p = safe_x_max * np.exp(-np.log(safe_x_max / safe_x_50) * (100 / safe_p - 1) ** (1 / np.where(valid, b, 1.0)))
+
+    x_p = np.where(percentiles >= 100, x_max, np.where(percentiles <= 0, 0.0, x_p))
+    return np.where(valid, x_p, np.nan)
@@ -0,0 +1,282 @@
+import time
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from modules import psd_engine
+from utils.logs_manager import LogsManager
+from utils.session_state_manager import SessionStateManager
+
+
+BLAST_COLUMN = "Взрыв"
+MEASURED_COLUMN = "P(x) измеренные, %"
+
+
+def swebrec_with_jacobian(theta, x):
+    """
+    Swebrec и его аналитический якобиан по параметрам θ = (ln x_max, ln ln(x_max/x_50), ln b).
+
+    Такая параметризация автоматически обеспечивает x_50 < x_max и b > 0.
+    theta — (K, 3), x — (K, M). Возвращает P(x) (K, M) и якобиан (K, M, 3).
+    """
+    u, v, w = theta[:, 0:1], theta[:, 1:2], theta[:, 2:3]
+    b = np.exp(w)
+    log_ratio = u - np.log(x)       # ln(x_max / x)
+    inside = log_ratio > 0          # x < x_max
+
+    safe_log_ratio = np.where(inside, log_ratio, 1.0)
+    r = safe_log_ratio / np.exp(v)
+    with np.errstate(over="ignore"):
+        t = r ** b
+    f = np.where(inside, 100 / (1 + t), 100.0)
+
+    common = np.where(inside, -(f ** 2) / 100 * b * t, 0.0)
+    common = np.nan_to_num(common)
+    jacobian = np.stack([common / safe_log_ratio, -common, common * np.log(r)], axis=-1)
+    return f, jacobian
+
+
+def rosin_rammler_with_jacobian(theta, x):
+    """
+    Розин–Раммлер P(x) = 100·(1 − exp(−ln2·(x/x_50)^n)) и якобиан по θ = (ln x_50, ln n).
+    """
+    a, c = theta[:, 0:1], theta[:, 1:2]
+    n = np.exp(c)
+    log_scaled = np.log(x) - a      # ln(x / x_50)
+    with np.errstate(over="ignore"):
+        z = np.log(2) * np.exp(n * log_scaled)
+    decay = np.exp(-z)
+    f = 100 * (1 - decay)
+
+    common = np.nan_to_num(100 * decay * z * n)
+    jacobian = np.stack([-common, common * log_scaled], axis=-1)
+    return f, jacobian
+
+
+def levenberg_marquardt(model, theta, x, y, mask, max_iterations=200, tolerance=1e-10):
+    """
+    Пакетный метод Левенберга–Марквардта: K независимых задач наименьших квадратов
+    решаются одновременно (нормальные уравнения K × p × p), у каждой задачи
+    свой коэффициент демпфирования. Точки вне mask не учитываются.
+    """
+    theta = theta.copy()
+    n_params = theta.shape[1]
+
+    def evaluate(values):
+        f, jacobian = model(values, x)
+        residuals = np.where(mask, y - f, 0.0)
+        jacobian = np.where(mask[..., None], jacobian, 0.0)
+        return residuals, jacobian, np.sum(residuals ** 2, axis=1)
+
+    residuals, jacobian, sse = evaluate(theta)
+    damping = np.full(len(theta), 1e-2)
+    active = np.isfinite(sse)
+
+    for _ in range(max_iterations):
+        if not active.any():
+            break
+
+        jtj = np.einsum("kmi,kmj->kij", jacobian, jacobian)
+        gradient = np.einsum("kmi,km->ki", jacobian, residuals)
+        diagonal = np.einsum("kii->ki", jtj) + 1e-12
+        system = jtj + (damping[:, None] * diagonal)[:, :, None] * np.eye(n_params)
+        step = np.linalg.solve(system, gradient[..., None])[..., 0]
+
+        candidate = np.where(active[:, None], theta + step, theta)
+        new_residuals, new_jacobian, new_sse = evaluate(candidate)
+        improved = active & np.isfinite(new_sse) & (new_sse < sse)
+
+        converged = improved & ((sse - new_sse) <= tolerance * np.maximum(sse, 1e-12))
+        theta = np.where(improved[:, None], candidate, theta)
+        residuals = np.where(improved[:, None], new_residuals, residuals)
+        jacobian = np.where(improved[:, None, None], new_jacobian, jacobian)
+        sse = np.where(improved, new_sse, sse)
+        damping = np.where(improved, damping / 3, damping * 2)
+
+        active &= ~converged & (damping < 1e10)
+
+    return theta, sse
+
+
+class PSDFitting:
+    """
+    Импорт измеренных кривых PSD (ситовый анализ, анализ изображений) и подбор
+    параметров Swebrec (x_50, x_max, b) и Розина–Раммлера (x_50, n) методом
+    наименьших квадратов сразу для многих взрывов.
+    """
+    MIN_POINTS = 3
+
+    def __init__(self, session_manager: SessionStateManager, logs_manager: LogsManager):
+        self.session_manager = session_manager
+        self.logs_manager = logs_manager
+
+    def load_measured_psd(self, uploaded_file):
+        """
+        Загрузка измеренных кривых из .csv/.txt.
+
+        Три столбца — взрыв, размер (мм), проход (%); два столбца — размер и проход
+        одного взрыва (имя взрыва — имя файла).
+        """
+        if uploaded_file is None:
+            st.sidebar.warning("Выберите файл с измеренными кривыми PSD.")
+            return
+
+        file_extension = uploaded_file.name.split(".")[-1].lower()
+        try:
+            if file_extension not in ["csv", "txt"]:
+                st.sidebar.warning("Неподдерживаемый формат файла. Разрешены только .csv и .txt")
+                return
+
+            df = pd.read_csv(uploaded_file, delimiter=",", header=0)
+            if df.shape[1] >= 3:
+                df = df.iloc[:, :3]
+                df.columns = [BLAST_COLUMN, psd_engine.SIZE_COLUMN, MEASURED_COLUMN]
+                df[BLAST_COLUMN] = df[BLAST_COLUMN].astype(str)
+            else:
+                df = df.iloc[:, :2]
+                df.columns = [psd_engine.SIZE_COLUMN, MEASURED_COLUMN]
+                df.insert(0, BLAST_COLUMN, uploaded_file.name)
+
+            # Приведение к числовому формату и удаление строк с ошибками
+            df[psd_engine.SIZE_COLUMN] = pd.to_numeric(df[psd_engine.SIZE_COLUMN], errors='coerce')
+            df[MEASURED_COLUMN] = pd.to_numeric(df[MEASURED_COLUMN], errors='coerce')
+            df = df.dropna()
+            df = df[(df[psd_engine.SIZE_COLUMN] > 0) & df[MEASURED_COLUMN].between(0, 100)]
+            df = df.sort_values([BLAST_COLUMN, psd_engine.SIZE_COLUMN]).reset_index(drop=True)
+
+            if df.empty:
+                st.sidebar.error("Ошибка: файл не содержит корректных точек кривой PSD.")
+                self.logs_manager.add_log("psd_fitting", "Ошибка: нет корректных точек измеренной PSD.", "ошибка")
+                return
+
+            st.session_state["measured_psd"] = df
+            st.session_state.pop("psd_fit_results", None)
+
+            n_blasts = df[BLAST_COLUMN].nunique()
+            st.sidebar.success(f"Файл {uploaded_file.name} загружен: взрывов {n_blasts}, точек {len(df)}.")
+            self.logs_manager.add_log(
+                "psd_fitting", f"Загружены измеренные PSD: {uploaded_file.name}, взрывов {n_blasts}.", "успех"
+            )
+
+        except Exception as e:
+            st.sidebar.error(f"Ошибка загрузки измеренных PSD: {e}")
+            self.logs_manager.add_log("psd_fitting", f"Ошибка загрузки измеренных PSD: {e}", "ошибка")
+
+    @staticmethod
+    def pad_curves(df):
+        """
+        Преобразование таблицы в матрицы (взрывы × точки), дополненные NaN, и маску точек.
+        """
+        df = df.sort_values([BLAST_COLUMN, psd_engine.SIZE_COLUMN])
+        blast_codes, blasts = pd.factorize(df[BLAST_COLUMN], sort=True)
+        counts = np.bincount(blast_codes, minlength=len(blasts))
+        order = np.argsort(blast_codes, kind="stable")
+        codes = blast_codes[order]
+        positions = np.arange(len(codes)) - np.repeat(np.cumsum(counts) - counts, counts)
+
+        x = np.full((len(blasts), counts.max()), np.nan)
+        p = np.full_like(x, np.nan)
+        x[codes, positions] = df[psd_engine.SIZE_COLUMN].to_numpy(dtype=float)[order]
+        p[codes, positions] = df[MEASURED_COLUMN].to_numpy(dtype=float)[order]
+        return np.asarray(blasts), x, p, np.isfinite(x) & np.isfinite(p)
+
+    @staticmethod
+    def initial_x_50(x, p, mask):
+        """
+        Начальное приближение x_50: логарифмическая интерполяция между соседними точками,
+        где измеренный проход пересекает 50 %.
+        """
+        below = np.where(mask, p < 50, False).sum(axis=1)
+        n_points = mask.sum(axis=1)
+        upper = np.clip(below, 1, np.maximum(n_points - 1, 1))[:, None]
+        lower = upper - 1
+
+        x_lo, x_hi = np.take_along_axis(x, lower, 1)[:, 0], np.take_along_axis(x, upper, 1)[:, 0]
+        p_lo, p_hi = np.take_along_axis(p, lower, 1)[:, 0], np.take_along_axis(p, upper, 1)[:, 0]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            weight = np.clip((50 - p_lo) / (p_hi - p_lo), -1, 2)
+        x_50 = np.exp(np.log(x_lo) + np.nan_to_num(weight, nan=0.5) * (np.log(x_hi) - np.log(x_lo)))
+        return np.where(np.isfinite(x_50) & (x_50 > 0), x_50, np.nanmedian(np.where(mask, x, np.nan), axis=1))
+
+    @staticmethod
+    def goodness_of_fit(sse, p, mask):
+        """
+        RMSE (п.п. прохода) и коэффициент детерминации R² по каждому взрыву.
+        """
+        n_points = mask.sum(axis=1)
+        mean = np.nanmean(np.where(mask, p, np.nan), axis=1)
+        sst = np.sum(np.where(mask, (p - mean[:, None]) ** 2, 0.0), axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.sqrt(sse / n_points), 1 - sse / sst
+
+    def fit_curves(self, df):
+        """
+        Подбор параметров Swebrec и Розина–Раммлера по всем взрывам таблицы df.
+        """
+        blasts, x, p, mask = self.pad_curves(df)
+        safe_x = np.where(mask, x, 1.0)
+        x_50 = self.initial_x_50(x, p, mask)
+        x_top = np.nanmax(np.where(mask, x, np.nan), axis=1)
+
+        # Swebrec: x_max начально — чуть больше наибольшего измеренного размера
+        x_max = np.maximum(x_top * 1.2, x_50 * 2)
+        theta = np.column_stack([np.log(x_max), np.log(np.log(x_max / x_50)), np.full(len(blasts), np.log(2.0))])
+        theta, sse_swebrec = levenberg_marquardt(swebrec_with_jacobian, theta, safe_x, p, mask)
+        swebrec_x_max = np.exp(theta[:, 0])
+        swebrec_x_50 = swebrec_x_max * np.exp(-np.exp(theta[:, 1]))
+        swebrec_b = np.exp(theta[:, 2])
+        rmse_swebrec, r2_swebrec = self.goodness_of_fit(sse_swebrec, p, mask)
+
+        theta = np.column_stack([np.log(x_50), np.zeros(len(blasts))])
+        theta, sse_rr = levenberg_marquardt(rosin_rammler_with_jacobian, theta, safe_x, p, mask)
+        rmse_rr, r2_rr = self.goodness_of_fit(sse_rr, p, mask)
+
+        return pd.DataFrame({
+            BLAST_COLUMN: blasts,
+            "Точек": mask.sum(axis=1),
+            "Swebrec x_50, мм": swebrec_x_50,
+            "Swebrec x_max, мм": swebrec_x_max,
+            "Swebrec b": swebrec_b,
+            "Swebrec RMSE, %": rmse_swebrec,
+            "Swebrec R²": r2_swebrec,
+            "Р–Р x_50, мм": np.exp(theta[:, 0]),
+            "Р–Р n": np.exp(theta[:, 1]),
+            "Р–Р RMSE, %": rmse_rr,
+            "Р–Р R²": r2_rr,
+        })
+
+    def run_fitting(self):
+        """
+        Подбор параметров по загруженным измеренным кривым.
+        """
+        try:
+            started = time.perf_counter()
+            df = st.session_state.get("measured_psd")
+            if not isinstance(df, pd.DataFrame) or df.empty:
+                st.sidebar.warning("Нет измеренных кривых PSD. Загрузите файл.")
+                self.logs_manager.add_log("psd_fitting", "Ошибка: измеренные PSD отсутствуют.", "ошибка")
+                return
+
+            counts = df.groupby(BLAST_COLUMN)[psd_engine.SIZE_COLUMN].transform("size")
+            usable = df[counts >= self.MIN_POINTS]
+            skipped = df[BLAST_COLUMN].nunique() - usable[BLAST_COLUMN].nunique()
+            if usable.empty:
+                st.sidebar.error(f"❌ Ошибка: для подбора нужно не менее {self.MIN_POINTS} точек на взрыв.")
+                self.logs_manager.add_log("psd_fitting", "Ошибка: недостаточно точек для подбора.", "ошибка")
+                return
+
+            results = self.fit_curves(usable)
+            st.session_state["psd_fit_results"] = results
+
+            elapsed = time.perf_counter() - started
+            self.logs_manager.add_log(
+                "psd_fitting", f"✅ Подобраны параметры кривых для {len(results)} взрывов за {elapsed:.2f} с.", "успех"
+            )
+            st.sidebar.success(f"✅ Параметры кривых подобраны для {len(results)} взрывов за {elapsed:.2f} с.")
+            if skipped:
+                st.sidebar.warning(f"⚠ Взрывов с числом точек меньше {self.MIN_POINTS}: {skipped}. Они пропущены.")
+
+        except Exception as e:
+            st.sidebar.error(f"❌ Ошибка подбора параметров кривых: {e}")
+            self.logs_manager.add_log("psd_fitting", f"Ошибка подбора параметров кривых: {e}", "ошибка")
@@ -1,8 +1,12 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 
+from modules import psd_engine
+from modules.curve_comparison import CurveComparison
+from modules.fragmentation_models import rosin_rammler_passing
 from utils.session_state_manager import SessionStateManager
 from utils.logs_manager import LogsManager
 
@@ -12,6 +16,8 @@ class PSDVisualization:
     кумулятивной кривой распределения рассчитанных значений.
     """
 
+    SUMMARY_PERCENTILES = (20, 50, 80)
+
     def __init__(self, session_manager: SessionStateManager, logs_manager: LogsManager):
         self.session_manager = session_manager
         self.logs_manager = logs_manager
@@ -133,11 +139,19 @@ class PSDVisualization:
                                      name='Рассчитанная кривая', 
                                      line=dict(color='blue')))
 
+            # Измеренные кривые и подобранные по ним Swebrec / Розин–Раммлер
+            self.add_measured_fit_traces(fig)
+
             fig.update_layout(title="Сравнение эталонной и рассчитанной кумулятивных кривых распределения",
                               xaxis_title="Размер фрагмента (мм)",
                               yaxis_title="Кумулятивное распределение (%)")
 
             st.plotly_chart(fig)
+
+            # Количественное сравнение рассчитанной кривой с эталонной
+            metrics = CurveComparison(self.session_manager, self.logs_manager).calculated_vs_reference()
+            if metrics is not None:
+                st.table(metrics.round(3))
         except Exception as e:
             st.sidebar.error(f"Ошибка визуализации кривых: {e}")
             self.logs_manager.add_log("psd_visualization", f"Ошибка визуализации кривых: {e}", "ошибка")
@@ -146,3 +160,174 @@ class PSDVisualization:
         except Exception as e:
             st.sidebar.error(f"Ошибка визуализации кривых: {e}")
             self.logs_manager.add_log("psd_visualization", f"Ошибка визуализации кривых: {e}", "ошибка")
+
+    def add_measured_fit_traces(self, fig):
+        """
+        Добавление на график измеренных точек и подобранных кривых выбранных взрывов.
+        """
+        measured = st.session_state.get("measured_psd")
+        fits = st.session_state.get("psd_fit_results")
+        if not isinstance(measured, pd.DataFrame) or not isinstance(fits, pd.DataFrame) or fits.empty:
+            return
+
+        blasts = st.session_state.get("psd_fit_overlay_blasts") or list(fits["Взрыв"].head(1))
+        for _, fit in fits[fits["Взрыв"].isin(blasts)].iterrows():
+            points = measured[measured["Взрыв"] == fit["Взрыв"]]
+            fig.add_trace(go.Scatter(x=points["Размер фрагмента (x), мм"],
+                                     y=points["P(x) измеренные, %"],
+                                     mode='markers',
+                                     name=f'Измеренная: {fit["Взрыв"]}'))
+
+            scale = psd_engine.fine_scale(fit["Swebrec x_max, мм"])
+            fig.add_trace(go.Scatter(x=scale,
+                                     y=psd_engine.psd_matrix(scale, fit["Swebrec x_50, мм"],
+                                                             fit["Swebrec x_max, мм"], fit["Swebrec b"])[0],
+                                     mode='lines',
+                                     name=f'Swebrec (подбор): {fit["Взрыв"]}',
+                                     line=dict(dash='dot')))
+            fig.add_trace(go.Scatter(x=scale,
+                                     y=rosin_rammler_passing(scale, fit["Р–Р x_50, мм"], fit["Р–Р n"]),
+                                     mode='lines',
+                                     name=f'Розин–Раммлер (подбор): {fit["Взрыв"]}',
+                                     line=dict(dash='dash')))
+
+    def visualize_block_mixture_curve(self):
+        """
+        Визуализация PSD блока (смесь кривых по скважинам) в сравнении с кривой,
+        рассчитанной по параметрам блока.
+        """
+        try:
+            df_block = st.session_state.get("psd_table_block")
+            df_calculated = st.session_state.get("P_x_calculated")
+
+            if not isinstance(df_block, pd.DataFrame) or df_block.empty:
+                st.sidebar.warning("Нет данных PSD блока по скважинам.")
+                return
+
+            fig = go.Figure()
+
+            # Смесь кривых по скважинам (зеленого цвета)
+            fig.add_trace(go.Scatter(x=df_block["Размер фрагмента (x), мм"],
+                                     y=df_block["P(x) блока (смесь по скважинам), %"],
+                                     mode='lines',
+                                     name='PSD блока (по скважинам)',
+                                     line=dict(color='green')))
+
+            # Рассчитанная кривая по параметрам блока (синего цвета)
+            if isinstance(df_calculated, pd.DataFrame) and not df_calculated.empty:
+                fig.add_trace(go.Scatter(x=df_calculated["Размер фрагмента (x), мм"],
+                                         y=df_calculated["P(x) рассчитанные, %"],
+                                         mode='lines+markers',
+                                         name='Рассчитанная кривая (блок)',
+                                         line=dict(color='blue')))
+
+            fig.update_layout(title="PSD блока: смесь кривых по скважинам",
+                              xaxis_title="Размер фрагмента (мм)",
+                              yaxis_title="Кумулятивное распределение (%)",
+                              xaxis_type="log")
+
+            st.plotly_chart(fig)
+            self.logs_manager.add_log("psd_visualization", "PSD блока по скважинам успешно визуализирована.", "успех")
+
+        except Exception as e:
+            st.sidebar.error(f"Ошибка визуализации PSD блока: {e}")
+            self.logs_manager.add_log("psd_visualization", f"Ошибка визуализации PSD блока: {e}", "ошибка")
+
+    def visualize_model_comparison(self):
+        """
+        Наложение кривых PSD всех зарегистрированных моделей фрагментации.
+        """
+        try:
+            comparison = st.session_state.get("model_comparison")
+            if not comparison or not comparison.get("curves"):
+                st.sidebar.warning("Нет результатов сравнения моделей фрагментации.")
+                return
+
+            fig = go.Figure()
+            for label, p_x in comparison["curves"].items():
+                fig.add_trace(go.Scatter(x=comparison["x_values"],
+                                         y=p_x,
+                                         mode='lines',
+                                         name=label))
+
+            # Эталонная кривая для сравнения (красного цвета)
+            df_reference = st.session_state.get("P_x_data")
+            if isinstance(df_reference, pd.DataFrame) and not df_reference.empty:
+                fig.add_trace(go.Scatter(x=df_reference["Размер фрагмента (x), мм"],
+                                         y=df_reference["Эталонные P(x), %"],
+                                         mode='markers',
+                                         name='Эталонная кривая',
+                                         line=dict(color='red')))
+
+            fig.update_layout(title="Сравнение моделей фрагментации",
+                              xaxis_title="Размер фрагмента (мм)",
+                              yaxis_title="Кумулятивное распределение (%)",
+                              xaxis_type="log")
+
+            st.plotly_chart(fig)
+            st.dataframe(comparison["summary"], use_container_width=True)
+            self.logs_manager.add_log("psd_visualization", "Сравнение моделей фрагментации успешно визуализировано.", "успех")
+
+        except Exception as e:
+            st.sidebar.error(f"Ошибка визуализации сравнения моделей: {e}")
+            self.logs_manager.add_log("psd_visualization", f"Ошибка визуализации сравнения моделей: {e}", "ошибка")
+
+    def show_psd_summary(self):
+        """
+        Сводка PSD: размеры P20/P50/P80 и проход через щель дробилки.
+
+        Значения вычисляются непосредственно по параметрам кривых (обратная функция
+        Swebrec в замкнутой форме), без интерполяции по таблице PSD.
+        """
+        try:
+            reference = st.session_state.get("reference_parameters", {})
+            calculated = st.session_state.get("calculation_results", {})
+            crusher_gap = st.session_state.get("user_parameters", {}).get("crusher_gap")
+
+            curves = {}
+            if all(isinstance(reference.get(key), (int, float)) for key in ("target_x_50", "target_x_max", "target_b")):
+                curves["Эталонная"] = (reference["target_x_50"], reference["target_x_max"], reference["target_b"])
+            if all(isinstance(calculated.get(key), (int, float)) for key in ("x_50", "x_max", "b")):
+                curves["Рассчитанная"] = (calculated["x_50"], calculated["x_max"], calculated["b"])
+
+            if not curves:
+                st.sidebar.warning("Нет параметров кривых для сводки PSD.")
+                return
+
+            x_50, x_max, b = (np.array(values, dtype=float) for values in zip(*curves.values()))
+            sizes = psd_engine.swebrec_inverse(self.SUMMARY_PERCENTILES, x_50, x_max, b)
+
+            summary = pd.DataFrame(sizes, columns=[f"P{p}, мм" for p in self.SUMMARY_PERCENTILES])
+            summary.insert(0, "Кривая", list(curves))
+            if isinstance(crusher_gap, (int, float)) and crusher_gap > 0:
+                passing = psd_engine.psd_matrix([crusher_gap], x_50, x_max, b)[:, 0]
+                summary[f"Проход через щель {crusher_gap:g} мм, %"] = passing
+
+            st.subheader("Сводка PSD")
+            st.dataframe(summary.round(2), use_container_width=True)
+
+            # Кривые на шкале высокого разрешения с отметками P20/P50/P80
+            fig = go.Figure()
+            for i, (label, (curve_x_50, curve_x_max, curve_b)) in enumerate(curves.items()):
+                scale = psd_engine.fine_scale(curve_x_max)
+                fig.add_trace(go.Scatter(x=scale,
+                                         y=psd_engine.psd_matrix(scale, curve_x_50, curve_x_max, curve_b)[0],
+                                         mode='lines',
+                                         name=f'{label} кривая'))
+                fig.add_trace(go.Scatter(x=sizes[i],
+                                         y=self.SUMMARY_PERCENTILES,
+                                         mode='markers',
+                                         name=f'{label}: P20/P50/P80'))
+
+            if isinstance(crusher_gap, (int, float)) and crusher_gap > 0:
+                fig.add_vline(x=crusher_gap, line_dash="dash", annotation_text="Щель дробилки")
+
+            fig.update_layout(title="Кумулятивные кривые (высокое разрешение)",
+                              xaxis_title="Размер фрагмента (мм)",
+                              yaxis_title="Кумулятивное распределение (%)",
+                              xaxis_type="log")
+            st.plotly_chart(fig)
+
+        except Exception as e:
+            st.sidebar.error(f"Ошибка формирования сводки PSD: {e}")
+            self.logs_manager.add_log("psd_visualization", f"Ошибка формирования сводки PSD: {e}", "ошибка")
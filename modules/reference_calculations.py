@@ -1,10 +1,11 @@
 import streamlit as st
-import numpy as np
 import pandas as pd
 import plotly.express as px
 
+from modules import psd_engine
 from utils.session_state_manager import SessionStateManager
 from utils.logs_manager import LogsManager
+from utils.result_cache import ResultCache
 
 class ReferenceCalculations:
     """
@@ -18,6 +19,7 @@ class ReferenceCalculations:
         self.session_manager = session_manager
         self.logs_manager = logs_manager
         self.ref_table = None  # Таблица эталонных значений
+        self.result_cache = ResultCache(logs_manager)
 
         # Устанавливаем стандартные параметры
         st.session_state.setdefault("P_x_data", {})
@@ -27,7 +29,7 @@ class ReferenceCalculations:
         """
         Округление значения до ближайшего кратного 100.
         """
-        return min(round(value / 100) * 100, 1000)  # Ограничиваем x_max 1000 мм
+        return min(round(value / 100) * 100, self.STANDARD_X_VALUES[-1])  # Ограничиваем x_max последним стандартным размером
 
     def generate_scale(self):
         """
@@ -79,33 +81,23 @@ class ReferenceCalculations:
                 self.logs_manager.add_log("reference_calculations", "Некорректные параметры: target_x_max, target_x_50, target_b.", "ошибка")
                 return
 
-            # Расчет P(x) по формуле для каждого x из x_values
-            p_x_values = []
-            for x in x_values:
-                if x > x_max_ref:  # Пропускаем значения, превышающие заданный x_max
-                    continue
-                try:
-                    num = np.log(x_max_ref / x)
-                    den = np.log(x_max_ref / x_50)
-                    if den == 0:  # Пропуск деления на 0
-                        continue
-                    p_x = 1 / (1 + (num / den) ** b)
-                    p_x_values.append((x, p_x * 100))  # Переводим в проценты
-                except Exception as calc_e:
-                    self.logs_manager.add_log("reference_calculations", f"Ошибка при расчете P(x) для x={x}: {calc_e}", "ошибка")
-
-            if len(p_x_values) == 0:
-                st.sidebar.error("Ошибка: после расчета не осталось допустимых значений P(x).")
-                self.logs_manager.add_log("reference_calculations", "Пустой расчет P(x) после фильтрации.", "ошибка")
-                return
+            cache_params = {"x_values": list(x_values), "x_max": x_max_ref, "x_50": x_50, "b": b}
+            df = self.result_cache.get("reference_calculations.P_x_data", cache_params)
+
+            if df is None:
+                # Расчет P(x) для всей шкалы x <= x_max одним векторным выражением
+                df = psd_engine.psd_table(x_values, x_50, x_max_ref, b, "Эталонные P(x), %")
+
+                if df.empty:
+                    st.sidebar.error("Ошибка: после расчета не осталось допустимых значений P(x).")
+                    self.logs_manager.add_log("reference_calculations", "Пустой расчет P(x) после фильтрации.", "ошибка")
+                    return
+
+                self.result_cache.set("reference_calculations.P_x_data", cache_params, df)
 
             # Удаляем текущее значение P_x_data перед записью нового
             st.session_state.pop("P_x_data", None)
 
-            # Создаем DataFrame и записываем
-            df = pd.DataFrame(p_x_values, columns=["Размер фрагмента (x), мм", "Эталонные P(x), %"])
-            df = df.sort_values(by="Размер фрагмента (x), мм", ascending=True)
-
             st.session_state["P_x_data"] = df
             self.logs_manager.add_log("reference_calculations", "Расчеты эталонных P(x) выполнены успешно.", "успех")
 
@@ -0,0 +1,201 @@
+import json
+import os
+import time
+
+import numpy as np
+import streamlit as st
+from scipy.interpolate import RegularGridInterpolator
+
+from modules import kuzram_model
+from modules.rock_factor_calibration import RockFactorCalibration
+from utils.hashing import canonical_hash
+from utils.logs_manager import LogsManager
+from utils.result_cache import ResultCache
+from utils.session_state_manager import SessionStateManager
+
+
+class RockDomains:
+    """
+    Библиотека доменов пород (config/rock_domains.json) с заранее рассчитанными откликами модели.
+
+    Для домена один раз считаются составляющие цепочки, зависящие только от породы
+    (RDI, HF, A), и таблицы x_50, n, b на плотной сетке S × B × Q при остальных
+    параметрах текущего проекта. Оценки «что если» для S, B, Q — интерполяция по
+    таблице вместо пересчета цепочки. Таблица перестраивается при правке домена и
+    при изменении прочих входных параметров (ключ кэша), хранится в кэше результатов.
+    """
+    DOMAINS_FILE = "config/rock_domains.json"
+    DEFAULT_DOMAINS_FILE = "config/rock_domains.default.json"
+    PROPERTIES = ["rho", "sigma_c", "E", "RMD"]
+    TABLE_AXES = ["S", "B", "Q"]
+    GRID_POINTS = {"S": 49, "B": 49, "Q": 61}
+    TABLE_OUTPUTS = ["x_50", "n", "b"]
+
+    def __init__(self, session_manager: SessionStateManager, logs_manager: LogsManager):
+        self.session_manager = session_manager
+        self.logs_manager = logs_manager
+        self.result_cache = ResultCache(logs_manager)
+
+        st.session_state.setdefault("rock_domain_tables", {})
+
+    @classmethod
+    def load_domains(cls):
+        """
+        Домены пород: {название: {"description", "rho", "sigma_c", "E", "RMD"}}.
+        Пока библиотека не сохранялась, используются домены из DEFAULT_DOMAINS_FILE.
+        """
+        path = cls.DOMAINS_FILE if os.path.exists(cls.DOMAINS_FILE) else cls.DEFAULT_DOMAINS_FILE
+        if not os.path.exists(path):
+            return {}
+        with open(path, "r", encoding="utf-8") as file:
+            return json.load(file).get("domains", {})
+
+    def write_domains(self, domains):
+        with open(self.DOMAINS_FILE, "w", encoding="utf-8") as file:
+            json.dump({"domains": domains}, file, ensure_ascii=False, indent=2)
+
+    def save_domain(self, name, properties, description=""):
+        """
+        Добавление или правка домена; таблица откликов перестраивается сразу.
+        """
+        try:
+            if not name:
+                st.sidebar.warning("Укажите название домена.")
+                return
+            domains = self.load_domains()
+            domains[name] = {"description": description, **{key: float(properties[key]) for key in self.PROPERTIES}}
+            self.write_domains(domains)
+            self.logs_manager.add_log("rock_domains", f"Домен «{name}» сохранен.", "успех")
+            st.sidebar.success(f"✅ Домен «{name}» сохранен.")
+            self.get_table(name, rebuild=True)
+
+        except Exception as e:
+            st.sidebar.error(f"❌ Ошибка сохранения домена: {e}")
+            self.logs_manager.add_log("rock_domains", f"Ошибка сохранения домена: {e}", "ошибка")
+
+    def delete_domain(self, name):
+        try:
+            domains = self.load_domains()
+            domains.pop(name, None)
+            self.write_domains(domains)
+            self.logs_manager.add_log("rock_domains", f"Домен «{name}» удален.", "успех")
+            st.sidebar.success(f"✅ Домен «{name}» удален.")
+
+        except Exception as e:
+            st.sidebar.error(f"❌ Ошибка удаления домена: {e}")
+            self.logs_manager.add_log("rock_domains", f"Ошибка удаления домена: {e}", "ошибка")
+
+    def apply_domain(self, name):
+        """
+        Подстановка свойств домена в параметры текущего блока.
+        """
+        domain = self.load_domains()[name]
+        user_params = st.session_state.get("user_parameters", {})
+        user_params.update({key: domain[key] for key in self.PROPERTIES})
+        user_params["rock_domain"] = name
+        st.session_state["user_parameters"] = user_params
+        self.logs_manager.add_log("rock_domains", f"Свойства домена «{name}» применены к блоку.", "успех")
+        st.sidebar.success(f"✅ Свойства домена «{name}» применены к блоку.")
+
+    def rock_factors(self, name):
+        """
+        RDI, HF и A домена (с калибровочным k_A домена).
+        """
+        domain = self.load_domains()[name]
+        rdi = float(kuzram_model.calculate_rdi(domain["rho"]))
+        hf = float(kuzram_model.calculate_hf(domain["E"], domain["sigma_c"]))
+        k_A = RockFactorCalibration.get_factors(name)["k_A"]
+        return {"RDI": rdi, "HF": hf, "A": float(kuzram_model.calculate_a(domain["RMD"], rdi, hf, k_A))}
+
+    def grid_axes(self):
+        """
+        Узлы таблицы по S, B (равномерно) и Q (равномерно по логарифму) в пределах допустимых значений параметров.
+        """
+        parameters = st.session_state.get("parameters", {})
+        axes = {}
+        for name in self.TABLE_AXES:
+            low, high = float(parameters[name]["min_value"]), float(parameters[name]["max_value"])
+            axes[name] = np.geomspace(low, high, self.GRID_POINTS[name]) if name == "Q" \
+                else np.linspace(low, high, self.GRID_POINTS[name])
+        return axes
+
+    def table_inputs(self, name):
+        """
+        Входные данные таблицы домена (они же — ключ кэша): свойства породы, фиксированные
+        параметры проекта, эталонный x_50, калибровочные коэффициенты и узлы сетки.
+        """
+        params = st.session_state.get("user_parameters", {})
+        domain = self.load_domains()[name]
+        fixed = [key for key in kuzram_model.CHAIN_INPUTS if key not in self.PROPERTIES + self.TABLE_AXES]
+        missing = [key for key in fixed if not isinstance(params.get(key), (int, float))]
+        x_50_ref = st.session_state.get("reference_parameters", {}).get("target_x_50")
+        if missing or not isinstance(x_50_ref, (int, float)):
+            raise ValueError(f"отсутствуют параметры: {', '.join(missing + ([] if isinstance(x_50_ref, (int, float)) else ['target_x_50']))}")
+
+        return {
+            "rock": {key: float(domain[key]) for key in self.PROPERTIES},
+            "fixed": {key: float(params[key]) for key in fixed},
+            "x_50_ref": float(x_50_ref),
+            "factors": RockFactorCalibration.get_factors(name),
+            "axes": self.grid_axes(),
+        }
+
+    def build_table(self, inputs):
+        """
+        x_50, n, b цепочки на сетке S × B × Q (одним векторизованным расчетом).
+        """
+        axes = inputs["axes"]
+        S, B, Q = np.meshgrid(axes["S"], axes["B"], axes["Q"], indexing="ij")
+        chain_params = {**inputs["rock"], **inputs["fixed"], "S": S, "B": B, "Q": Q}
+        with np.errstate(all="ignore"):
+            results = kuzram_model.run_chain(chain_params, inputs["x_50_ref"], **inputs["factors"])
+
+        # Узлы с некорректным результатом (как в расчете по скважинам) исключаются из интерполяции
+        valid = ((results["n"] > 0) & (results["x_50"] > 0) & (results["x_50"] < results["x_max"])
+                 & np.isfinite(results["b"]))
+        return {output: np.where(valid, results[output], np.nan).astype(np.float32) for output in self.TABLE_OUTPUTS}
+
+    def get_table(self, name, rebuild=False):
+        """
+        Таблица откликов домена: {"axes", "x_50", "n", "b"}; None, если построить не удалось.
+        """
+        try:
+            started = time.perf_counter()
+            inputs = self.table_inputs(name)
+            key = canonical_hash(inputs)
+            session_tables = st.session_state["rock_domain_tables"]
+            if not rebuild and session_tables.get(name, {}).get("key") == key:
+                return session_tables[name]
+
+            table = None if rebuild else self.result_cache.get("rock_domain_table", inputs)
+            if table is None:
+                table = self.build_table(inputs)
+                self.result_cache.set("rock_domain_table", inputs, table)
+                elapsed = time.perf_counter() - started
+                self.logs_manager.add_log(
+                    "rock_domains",
+                    f"Таблица откликов домена «{name}» построена: {table['x_50'].size} узлов за {elapsed:.2f} с.",
+                    "успех"
+                )
+
+            session_tables[name] = {**table, "axes": inputs["axes"], "key": key}
+            return session_tables[name]
+
+        except Exception as e:
+            st.sidebar.error(f"❌ Ошибка построения таблицы откликов домена: {e}")
+            self.logs_manager.add_log("rock_domains", f"Ошибка построения таблицы откликов домена: {e}", "ошибка")
+            return None
+
+    def interpolate(self, table, S, B, Q):
+        """
+        x_50, n, b в точках (S, B, Q) линейной интерполяцией по таблице (Q — по логарифму).
+        """
+        axes = table["axes"]
+        grid = (axes["S"], axes["B"], np.log(axes["Q"]))
+        points = np.column_stack(np.broadcast_arrays(
+            np.asarray(S, dtype=float), np.asarray(B, dtype=float), np.log(np.asarray(Q, dtype=float))
+        ))
+        return {
+            output: RegularGridInterpolator(grid, table[output], bounds_error=False, fill_value=np.nan)(points)
+            for output in self.TABLE_OUTPUTS
+        }
@@ -0,0 +1,225 @@
+import json
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from modules import kuzram_model
+from modules.psd_fitting import levenberg_marquardt
+from utils.logs_manager import LogsManager
+from utils.session_state_manager import SessionStateManager
+
+
+class RockFactorCalibration:
+    """
+    Калибровка фактора породы A = 0.06·(RMD + RDI + HF) по результатам прошлых взрывов.
+
+    Для каждого домена породы подбираются коэффициенты k_A (и, при наличии измеренного b,
+    k_n) так, чтобы x_50 (и b) цепочки Кузнецова–Рамлера совпадали с измеренными.
+    Коэффициенты сохраняются в config/rock_factor_calibration.json и применяются
+    в Calculations для домена rock_domain.
+    """
+    CALIBRATION_FILE = "config/rock_factor_calibration.json"
+    DEFAULT_DOMAIN = "Основной"
+    DOMAIN_COLUMN = "rock_domain"
+    X_50_COLUMN = "x_50_measured"
+    B_COLUMN = "b_measured"
+    FINITE_DIFFERENCE_STEP = 1e-5
+
+    # Коэффициенты файла калибровки в памяти процесса: {"stamp": (mtime, размер), "domains": {...}}
+    _calibration_cache = {}
+
+    def __init__(self, session_manager: SessionStateManager, logs_manager: LogsManager):
+        self.session_manager = session_manager
+        self.logs_manager = logs_manager
+
+    @classmethod
+    def load_calibration(cls):
+        """
+        Сохраненные коэффициенты по доменам: {домен: {"k_A": ..., "k_n": ..., ...}}.
+        Файл читается заново только после записи или изменения на диске.
+        """
+        if not os.path.exists(cls.CALIBRATION_FILE):
+            return {}
+        stat = os.stat(cls.CALIBRATION_FILE)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        if cls._calibration_cache.get("stamp") != stamp:
+            with open(cls.CALIBRATION_FILE, "r", encoding="utf-8") as file:
+                cls._calibration_cache = {"stamp": stamp, "domains": json.load(file).get("domains", {})}
+        return cls._calibration_cache["domains"]
+
+    @classmethod
+    def get_factors(cls, domain):
+        """
+        Коэффициенты k_A, k_n домена породы (1.0, если домен не откалиброван).
+        """
+        entry = cls.load_calibration().get(domain or cls.DEFAULT_DOMAIN, {})
+        return {"k_A": float(entry.get("k_A", 1.0)), "k_n": float(entry.get("k_n", 1.0))}
+
+    def save_calibration(self, results):
+        """
+        Запись коэффициентов из таблицы результатов калибровки (остальные домены сохраняются).
+        """
+        try:
+            domains = dict(self.load_calibration())
+            calibrated_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            for _, row in results.iterrows():
+                domains[str(row["Домен"])] = {
+                    "k_A": float(row["k_A"]),
+                    "k_n": float(row["k_n"]),
+                    "n_blasts": int(row["Взрывов"]),
+                    "rmse_x_50": float(row["Ошибка x_50 после, %"]),
+                    "calibrated_at": calibrated_at,
+                }
+
+            os.makedirs(os.path.dirname(self.CALIBRATION_FILE), exist_ok=True)
+            with open(self.CALIBRATION_FILE, "w", encoding="utf-8") as file:
+                json.dump({"domains": domains}, file, ensure_ascii=False, indent=2)
+            RockFactorCalibration._calibration_cache = {}
+
+            st.sidebar.success(f"✅ Калибровка сохранена для доменов: {len(results)}.")
+            self.logs_manager.add_log("rock_factor_calibration", f"Калибровка сохранена: {list(results['Домен'])}.", "успех")
+
+        except Exception as e:
+            st.sidebar.error(f"❌ Ошибка сохранения калибровки: {e}")
+            self.logs_manager.add_log("rock_factor_calibration", f"Ошибка сохранения калибровки: {e}", "ошибка")
+
+    def load_history(self, uploaded_file):
+        """
+        Загрузка истории взрывов (.csv): параметры проекта (имена из CHAIN_INPUTS),
+        измеренный x_50_measured, необязательные b_measured и rock_domain.
+        Недостающие параметры проекта берутся из user_parameters.
+        """
+        try:
+            df = pd.read_csv(uploaded_file)
+            if self.X_50_COLUMN not in df.columns:
+                st.sidebar.error(f"❌ Ошибка: в файле нет столбца {self.X_50_COLUMN}.")
+                self.logs_manager.add_log("rock_factor_calibration", f"Ошибка: нет столбца {self.X_50_COLUMN}.", "ошибка")
+                return
+
+            params = st.session_state.get("user_parameters", {})
+            for name in kuzram_model.CHAIN_INPUTS:
+                if name not in df.columns:
+                    df[name] = params.get(name, np.nan)
+            if self.DOMAIN_COLUMN not in df.columns:
+                df[self.DOMAIN_COLUMN] = self.DEFAULT_DOMAIN
+            df[self.DOMAIN_COLUMN] = df[self.DOMAIN_COLUMN].astype(str)
+
+            numeric = kuzram_model.CHAIN_INPUTS + [self.X_50_COLUMN] + ([self.B_COLUMN] if self.B_COLUMN in df.columns else [])
+            df[numeric] = df[numeric].apply(pd.to_numeric, errors="coerce")
+            df = df.dropna(subset=kuzram_model.CHAIN_INPUTS + [self.X_50_COLUMN])
+            df = df[df[self.X_50_COLUMN] > 0].reset_index(drop=True)
+
+            st.session_state["calibration_history"] = df
+            st.sidebar.success(f"Загружено взрывов: {len(df)}, доменов: {df[self.DOMAIN_COLUMN].nunique()}.")
+            self.logs_manager.add_log("rock_factor_calibration", f"Загружена история взрывов: {len(df)}.", "успех")
+
+        except Exception as e:
+            st.sidebar.error(f"❌ Ошибка загрузки истории взрывов: {e}")
+            self.logs_manager.add_log("rock_factor_calibration", f"Ошибка загрузки истории взрывов: {e}", "ошибка")
+
+    def predict(self, history, k_A, k_n):
+        """
+        ln x_50 и ln b цепочки для всех взрывов истории при коэффициентах k_A, k_n (массивы по взрывам).
+        Итерации n начинаются с измеренного x_50.
+        """
+        inputs = {name: history[name].to_numpy(dtype=float) for name in kuzram_model.CHAIN_INPUTS}
+        results = kuzram_model.run_chain(inputs, history[self.X_50_COLUMN].to_numpy(dtype=float), k_A=k_A, k_n=k_n)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.log(results["x_50"]), np.log(results["b"])
+
+    def fit(self, history, fit_n=False):
+        """
+        Подбор коэффициентов для всех доменов одновременно (пакетный метод Левенберга–Марквардта).
+
+        Параметры домена θ = (ln k_A[, ln k_n]); невязки — ln x_50 (и ln b) расчетные минус
+        измеренные. Взрывы раскладываются в матрицу домены × взрывы, якобиан — конечными
+        разностями по векторизованной цепочке (одно вычисление цепочки на параметр).
+        """
+        fit_n = fit_n and self.B_COLUMN in history.columns and history[self.B_COLUMN].notna().any()
+        codes, domains = pd.factorize(history[self.DOMAIN_COLUMN], sort=True)
+        counts = np.bincount(codes, minlength=len(domains))
+        order = np.argsort(codes, kind="stable")
+        positions = np.empty(len(codes), dtype=int)
+        positions[order] = np.arange(len(codes)) - np.repeat(np.cumsum(counts) - counts, counts)
+
+        n_domains, width = len(domains), counts.max()
+        index = np.full((n_domains, width), -1)
+        index[codes, positions] = np.arange(len(codes))
+
+        log_x_50 = np.log(history[self.X_50_COLUMN].to_numpy(dtype=float))
+        y = np.full((n_domains, width), np.nan)
+        y[codes, positions] = log_x_50
+        mask = index >= 0
+        if fit_n:
+            log_b = np.log(history[self.B_COLUMN].to_numpy(dtype=float))
+            y_b = np.full((n_domains, width), np.nan)
+            y_b[codes, positions] = log_b
+            y = np.concatenate([y, y_b], axis=1)
+            mask = np.concatenate([mask, (index >= 0) & np.isfinite(y_b)], axis=1)
+        y = np.where(mask, y, 0.0)
+
+        def evaluate(theta):
+            k_A = np.exp(theta[codes, 0])
+            k_n = np.exp(theta[codes, 1]) if fit_n else 1.0
+            predicted_x_50, predicted_b = self.predict(history, k_A, k_n)
+            f = np.zeros((n_domains, width * (2 if fit_n else 1)))
+            f[codes, positions] = predicted_x_50
+            if fit_n:
+                f[codes, width + positions] = predicted_b
+            return f
+
+        def model(theta, _):
+            f = evaluate(theta)
+            jacobian = np.empty(f.shape + (theta.shape[1],))
+            for j in range(theta.shape[1]):
+                shifted = theta.copy()
+                shifted[:, j] += self.FINITE_DIFFERENCE_STEP
+                jacobian[..., j] = (evaluate(shifted) - f) / self.FINITE_DIFFERENCE_STEP
+            return np.nan_to_num(f), np.nan_to_num(jacobian)
+
+        theta0 = np.zeros((n_domains, 2 if fit_n else 1))
+        theta, _ = levenberg_marquardt(model, theta0, None, y, mask)
+
+        def rmse_x_50(values):
+            residual = np.where(mask[:, :width], evaluate(values)[:, :width] - y[:, :width], 0.0)
+            return np.sqrt(np.sum(residual ** 2, axis=1) / counts) * 100
+
+        return pd.DataFrame({
+            "Домен": np.asarray(domains),
+            "Взрывов": counts,
+            "k_A": np.exp(theta[:, 0]),
+            "k_n": np.exp(theta[:, 1]) if fit_n else np.ones(n_domains),
+            "Ошибка x_50 до, %": rmse_x_50(theta0),
+            "Ошибка x_50 после, %": rmse_x_50(theta),
+        })
+
+    def run_calibration(self, fit_n=False):
+        """
+        Калибровка по загруженной истории взрывов.
+        """
+        try:
+            started = time.perf_counter()
+            history = st.session_state.get("calibration_history")
+            if not isinstance(history, pd.DataFrame) or history.empty:
+                st.sidebar.warning("Нет истории взрывов для калибровки. Загрузите файл.")
+                self.logs_manager.add_log("rock_factor_calibration", "Ошибка: история взрывов отсутствует.", "ошибка")
+                return
+
+            results = self.fit(history, fit_n=fit_n)
+            st.session_state["rock_factor_calibration_results"] = results
+
+            elapsed = time.perf_counter() - started
+            self.logs_manager.add_log(
+                "rock_factor_calibration",
+                f"✅ Калибровка выполнена: {len(history)} взрывов, {len(results)} доменов за {elapsed:.2f} с.",
+                "успех"
+            )
+            st.sidebar.success(f"✅ Калибровка выполнена по {len(history)} взрывам за {elapsed:.2f} с.")
+
+        except Exception as e:
+            st.sidebar.error(f"❌ Ошибка калибровки фактора породы: {e}")
+            self.logs_manager.add_log("rock_factor_calibration", f"Ошибка калибровки фактора породы: {e}", "ошибка")
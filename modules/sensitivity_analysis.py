@@ -0,0 +1,255 @@
+import time
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+import plotly.graph_objects as go
+from scipy.stats import qmc
+
+from modules import kuzram_model
+from modules.rock_factor_calibration import RockFactorCalibration
+from utils.logs_manager import LogsManager
+from utils.session_state_manager import SessionStateManager
+
+
+class SensitivityAnalysis:
+    """
+    Глобальный анализ чувствительности цепочки Кузнецова–Рамлера (индексы Соболя).
+    """
+    OUTPUTS = ["x_50", "b"]
+
+    def __init__(self, session_manager: SessionStateManager, logs_manager: LogsManager):
+        self.session_manager = session_manager
+        self.logs_manager = logs_manager
+
+    def get_parameter_ranges(self, names, relative_range=None):
+        """
+        Диапазоны варьирования параметров.
+
+        По умолчанию берутся min_value/max_value из full_parameter_list.json;
+        при заданном relative_range (%) — текущее значение ± relative_range,
+        ограниченное допустимым диапазоном.
+        """
+        definitions = st.session_state.get("parameters", {})
+        user_params = st.session_state.get("user_parameters", {})
+
+        ranges = {}
+        for name in names:
+            meta = definitions.get(name, {})
+            low, high = float(meta["min_value"]), float(meta["max_value"])
+            if relative_range is not None:
+                value = float(user_params.get(name, meta["default_value"]))
+                low = max(low, value * (1 - relative_range / 100))
+                high = min(high, value * (1 + relative_range / 100))
+            ranges[name] = (low, high)
+        return ranges
+
+    def evaluate_model(self, samples, names, fixed, x_50_ref, factors=None):
+        """
+        Вычисление выходов модели для матрицы входов (строки — реализации).
+        factors — калибровочные коэффициенты домена {"k_A", "k_n"}.
+
+        Физически некорректные реализации (n <= 0 или x_50 вне (0, x_max))
+        помечаются NaN и исключаются из оценки индексов.
+        """
+        params = dict(fixed)
+        for j, name in enumerate(names):
+            params[name] = samples[:, j]
+        results = kuzram_model.run_chain(params, x_50_ref, **(factors or {}))
+
+        valid = (results["n"] > 0) & (results["x_50"] > 0) & (results["x_50"] < results["x_max"])
+        outputs = np.column_stack([results[output] for output in self.OUTPUTS])
+        outputs[~valid] = np.nan
+        return outputs
+
+    def run_sobol_analysis(self, names, n_base=8192, chunk_size=4096, n_bootstrap=200,
+                           relative_range=None, seed=None):
+        """
+        Расчет индексов Соболя первого порядка (S1) и полных (ST) с доверительными
+        интервалами 95 % (бутстреп).
+
+        Схема Сальтелли: матрицы A, B и A_B(i) из последовательности Соболя, всего
+        n_base · (k + 2) запусков модели. Выборка генерируется и вычисляется блоками
+        по chunk_size строк, каждый блок — один векторизованный вызов модели.
+        Оценки: S1 — Saltelli (2010), ST — Jansen (1999).
+        """
+        try:
+            started = time.perf_counter()
+            params = st.session_state.get("user_parameters", {})
+            x_50_ref = st.session_state.get("reference_parameters", {}).get("target_x_50")
+
+            if x_50_ref is None or not isinstance(x_50_ref, (int, float)):
+                st.sidebar.error("❌ Ошибка: отсутствует эталонное значение x_50. Утвердите эталонные параметры.")
+                self.logs_manager.add_log("sensitivity_analysis", "Ошибка: отсутствует эталонное значение x_50.", "ошибка")
+                return
+
+            if not names:
+                st.sidebar.warning("Выберите хотя бы один варьируемый параметр.")
+                return
+
+            missing = [name for name in kuzram_model.CHAIN_INPUTS if not isinstance(params.get(name), (int, float))]
+            if missing:
+                st.sidebar.error(f"❌ Ошибка: отсутствуют параметры: {', '.join(missing)}.")
+                self.logs_manager.add_log("sensitivity_analysis", f"Ошибка: отсутствуют параметры {missing}.", "ошибка")
+                return
+
+            k = len(names)
+            fixed = {name: float(params[name]) for name in kuzram_model.CHAIN_INPUTS}
+            factors = RockFactorCalibration.get_factors(params.get("rock_domain"))
+            ranges = self.get_parameter_ranges(names, relative_range)
+            low = np.array([ranges[name][0] for name in names])
+            high = np.array([ranges[name][1] for name in names])
+
+            sampler = qmc.Sobol(d=2 * k, scramble=True, seed=seed)
+            f_a = np.empty((n_base, len(self.OUTPUTS)))
+            f_b = np.empty((n_base, len(self.OUTPUTS)))
+            f_ab = np.empty((n_base, k, len(self.OUTPUTS)))
+
+            for start in range(0, n_base, chunk_size):
+                size = min(chunk_size, n_base - start)
+                base = low + sampler.random(size).reshape(size, 2, k) * (high - low)
+                a, b = base[:, 0, :], base[:, 1, :]
+
+                # A_B(i): матрица A, в которой i-й столбец взят из B
+                ab = np.repeat(a[None, :, :], k, axis=0)
+                ab[np.arange(k), :, np.arange(k)] = b.T
+
+                batch = np.concatenate([a, b, ab.reshape(k * size, k)])
+                outputs = self.evaluate_model(batch, names, fixed, x_50_ref, factors)
+
+                f_a[start:start + size] = outputs[:size]
+                f_b[start:start + size] = outputs[size:2 * size]
+                f_ab[start:start + size] = outputs[2 * size:].reshape(k, size, -1).transpose(1, 0, 2)
+
+            valid = (np.isfinite(f_a).all(axis=1) & np.isfinite(f_b).all(axis=1)
+                     & np.isfinite(f_ab).all(axis=(1, 2)))
+            n_valid = int(valid.sum())
+            if n_valid < 2:
+                st.sidebar.error("❌ Ошибка: недостаточно корректных реализаций. Сузьте диапазоны параметров.")
+                self.logs_manager.add_log("sensitivity_analysis", "Ошибка: недостаточно корректных реализаций.", "ошибка")
+                return
+
+            indices = self._sobol_indices(f_a[valid], f_b[valid], f_ab[valid], n_bootstrap,
+                                          np.random.default_rng(seed))
+
+            tables = {}
+            for o, output in enumerate(self.OUTPUTS):
+                df = pd.DataFrame({
+                    "Параметр": names,
+                    "S1": indices["S1"][:, o],
+                    "S1 нижн.": indices["S1_low"][:, o],
+                    "S1 верхн.": indices["S1_high"][:, o],
+                    "ST": indices["ST"][:, o],
+                    "ST нижн.": indices["ST_low"][:, o],
+                    "ST верхн.": indices["ST_high"][:, o],
+                })
+                tables[output] = df.sort_values("ST", ascending=False).reset_index(drop=True)
+
+            elapsed = time.perf_counter() - started
+            st.session_state["sensitivity_results"] = {
+                "tables": tables,
+                "ranges": ranges,
+                "n_runs": n_base * (k + 2),
+                "n_valid": n_valid,
+                "n_base": n_base,
+                "elapsed": elapsed,
+            }
+
+            self.logs_manager.add_log(
+                "sensitivity_analysis",
+                f"✅ Индексы Соболя рассчитаны: {n_base * (k + 2)} запусков модели за {elapsed:.2f} с.",
+                "успех",
+            )
+            st.sidebar.success(f"✅ Анализ чувствительности выполнен за {elapsed:.2f} с.")
+
+        except Exception as e:
+            st.sidebar.error(f"❌ Ошибка анализа чувствительности: {e}")
+            self.logs_manager.add_log("sensitivity_analysis", f"Ошибка анализа чувствительности: {e}", "ошибка")
+
+    def _sobol_indices(self, f_a, f_b, f_ab, n_bootstrap, rng, bootstrap_chunk=50):
+        """
+        Оценки S1/ST и бутстреп-интервалы.
+
+        Все оценки — средние по строкам, поэтому бутстреп сводится к умножению
+        матрицы весов (кратности строк в повторной выборке) на матрицу слагаемых.
+        """
+        n, k, m = f_ab.shape
+        terms = np.concatenate([
+            (f_b[:, None, :] * (f_ab - f_a[:, None, :])).reshape(n, k * m),   # S1 · V
+            (0.5 * (f_a[:, None, :] - f_ab) ** 2).reshape(n, k * m),          # ST · V
+            0.5 * (f_a + f_b),                                                 # E[f]
+            0.5 * (f_a ** 2 + f_b ** 2),                                       # E[f²]
+        ], axis=1)
+
+        def estimate(means):
+            mean_f = means[..., 2 * k * m:2 * k * m + m]
+            variance = means[..., 2 * k * m + m:] - mean_f ** 2
+            variance = np.where(variance > 0, variance, np.nan)[..., None, :]
+            s1 = means[..., :k * m].reshape(*means.shape[:-1], k, m) / variance
+            st_ = means[..., k * m:2 * k * m].reshape(*means.shape[:-1], k, m) / variance
+            return s1, st_
+
+        s1, st_total = estimate(terms.mean(axis=0))
+
+        boot_s1, boot_st = [], []
+        for start in range(0, n_bootstrap, bootstrap_chunk):
+            size = min(bootstrap_chunk, n_bootstrap - start)
+            weights = np.stack([np.bincount(rng.integers(0, n, n), minlength=n) for _ in range(size)]) / n
+            b_s1, b_st = estimate(weights @ terms)
+            boot_s1.append(b_s1)
+            boot_st.append(b_st)
+        boot_s1 = np.concatenate(boot_s1)
+        boot_st = np.concatenate(boot_st)
+
+        return {
+            "S1": s1,
+            "S1_low": np.nanpercentile(boot_s1, 2.5, axis=0),
+            "S1_high": np.nanpercentile(boot_s1, 97.5, axis=0),
+            "ST": st_total,
+            "ST_low": np.nanpercentile(boot_st, 2.5, axis=0),
+            "ST_high": np.nanpercentile(boot_st, 97.5, axis=0),
+        }
+
+    def visualize_sensitivity(self):
+        """
+        Ранжированные столбчатые диаграммы индексов Соболя для x_50 и b.
+        """
+        try:
+            results = st.session_state.get("sensitivity_results")
+            if not results:
+                st.sidebar.warning("Нет результатов анализа чувствительности.")
+                return
+
+            st.write(
+                f"Запусков модели: {results['n_runs']} (базовая выборка {results['n_base']}, "
+                f"корректных строк: {results['n_valid']}), время расчета: {results['elapsed']:.2f} с"
+            )
+
+            for output, df in results["tables"].items():
+                ranked = df.iloc[::-1]
+                fig = go.Figure()
+                fig.add_trace(go.Bar(
+                    y=ranked["Параметр"], x=ranked["ST"], orientation="h", name="ST (полный)",
+                    error_x=dict(type="data", symmetric=False,
+                                 array=ranked["ST верхн."] - ranked["ST"],
+                                 arrayminus=ranked["ST"] - ranked["ST нижн."]),
+                    marker_color="indianred"
+                ))
+                fig.add_trace(go.Bar(
+                    y=ranked["Параметр"], x=ranked["S1"], orientation="h", name="S1 (первого порядка)",
+                    error_x=dict(type="data", symmetric=False,
+                                 array=ranked["S1 верхн."] - ranked["S1"],
+                                 arrayminus=ranked["S1"] - ranked["S1 нижн."]),
+                    marker_color="steelblue"
+                ))
+                fig.update_layout(barmode="group",
+                                  title=f"Индексы Соболя для {output}",
+                                  xaxis_title="Индекс чувствительности",
+                                  yaxis_title="Параметр",
+                                  height=max(400, 40 * len(df)))
+                st.plotly_chart(fig)
+                st.dataframe(df.round(4), use_container_width=True)
+
+        except Exception as e:
+            st.sidebar.error(f"Ошибка визуализации чувствительности: {e}")
+            self.logs_manager.add_log("sensitivity_analysis", f"Ошибка визуализации чувствительности: {e}", "ошибка")
@@ -0,0 +1,234 @@
+import hashlib
+import io
+import json
+import os
+import time
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from scipy.interpolate import LinearNDInterpolator
+
+from utils.logs_manager import LogsManager
+from utils.session_state_manager import SessionStateManager
+
+
+SURFACE_ROLES = {"top": "Кровля уступа", "floor": "Подошва уступа"}
+
+
+@lru_cache(maxsize=4)
+def tin_interpolator(data_path):
+    """
+    Линейный интерполятор по триангуляции точек TIN (триангуляция строится один раз на файл).
+    """
+    xyz = np.load(data_path)
+    return LinearNDInterpolator(xyz[:, :2], xyz[:, 2])
+
+
+def sample_surface(surface, x, y):
+    """
+    Отметки поверхности (описание из session_state["surfaces"]) в точках (x, y):
+    билинейная интерполяция по ЦМР или линейная по треугольникам TIN. Вне поверхности — NaN.
+    Не обращается к session_state и может вызываться из рабочих потоков.
+    """
+    x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+
+    if surface["type"] == "tin":
+        return tin_interpolator(surface["data_path"])(x, y)
+
+    grid = np.load(surface["data_path"], mmap_mode="r").reshape(surface["nrows"], surface["ncols"])
+    column = (x - surface["x0"]) / surface["cell"]
+    row = (surface["y0"] - y) / surface["cell"]
+    inside = (column >= 0) & (column <= surface["ncols"] - 1) & (row >= 0) & (row <= surface["nrows"] - 1)
+
+    j = np.clip(np.floor(column).astype(int), 0, max(surface["ncols"] - 2, 0))
+    i = np.clip(np.floor(row).astype(int), 0, max(surface["nrows"] - 2, 0))
+    fx, fy = column - j, row - i
+    j1 = np.minimum(j + 1, surface["ncols"] - 1)
+    i1 = np.minimum(i + 1, surface["nrows"] - 1)
+
+    # Чтение только нужных ячеек; сортировка по строкам улучшает локальность обращений к диску
+    order = np.argsort(i, kind="stable")
+    values = np.empty((4, len(x)))
+    for k, (rows, columns) in enumerate([(i, j), (i, j1), (i1, j), (i1, j1)]):
+        values[k, order] = grid[rows[order], columns[order]]
+
+    z = (values[0] * (1 - fx) * (1 - fy) + values[1] * fx * (1 - fy)
+         + values[2] * (1 - fx) * fy + values[3] * fx * fy)
+    return np.where(inside, z, np.nan)
+
+
+class SurfaceModel:
+    """
+    Поверхности уступа: регулярная ЦМР (ESRI ASCII Grid, .asc) или триангуляция
+    по точкам съемки (.csv X, Y, Z).
+
+    ЦМР один раз построчно переписывается в дисковый кэш .npy (float32) и далее
+    открывается отображением в память, поэтому растр 10 000 × 10 000 не загружается
+    в ОЗУ: при билинейной интерполяции читаются только ячейки вокруг скважин.
+    В session_state хранятся только описания поверхностей (пути и привязка).
+    """
+    CACHE_DIR = "cache/surfaces"
+    HEADER_KEYS = ["ncols", "nrows", "xllcorner", "yllcorner", "xllcenter", "yllcenter", "cellsize", "nodata_value"]
+
+    def __init__(self, session_manager: SessionStateManager, logs_manager: LogsManager):
+        self.session_manager = session_manager
+        self.logs_manager = logs_manager
+
+        st.session_state.setdefault("surfaces", {})
+
+    def source_key(self, source, file_name):
+        """
+        Ключ кэша: для файла на сервере — путь, размер и время изменения, для загруженного — хэш содержимого.
+        """
+        if isinstance(source, str):
+            stat = os.stat(source)
+            payload = f"{os.path.abspath(source)}|{stat.st_size}|{stat.st_mtime_ns}".encode("utf-8")
+        else:
+            payload = source.getvalue()
+        return hashlib.sha256(payload + file_name.encode("utf-8")).hexdigest()[:24]
+
+    def open_text(self, source):
+        if isinstance(source, str):
+            return open(source, "r", encoding="utf-8", errors="replace")
+        return io.TextIOWrapper(io.BytesIO(source.getvalue()), encoding="utf-8", errors="replace")
+
+    def convert_ascii_grid(self, source, data_path):
+        """
+        Построчное чтение ESRI ASCII Grid в .npy (float32, NaN вместо NODATA). Возвращает привязку растра.
+        """
+        header = {}
+        with self.open_text(source) as text:
+            line = text.readline()
+            while line.strip() and line.split()[0].lower() in self.HEADER_KEYS:
+                key, value = line.split()[:2]
+                header[key.lower()] = float(value)
+                line = text.readline()
+
+            ncols, nrows, cell = int(header["ncols"]), int(header["nrows"]), header["cellsize"]
+            # Центр ячейки левого верхнего угла (строка 0 — северная)
+            x0 = header["xllcenter"] if "xllcenter" in header else header["xllcorner"] + cell / 2
+            y_bottom = header["yllcenter"] if "yllcenter" in header else header["yllcorner"] + cell / 2
+            meta = {"x0": x0, "y0": y_bottom + (nrows - 1) * cell, "cell": cell, "nrows": nrows, "ncols": ncols}
+
+            data = np.lib.format.open_memmap(data_path + ".tmp", mode="w+", dtype=np.float32, shape=(nrows * ncols,))
+            position = 0
+            while line and position < data.size:
+                values = np.array(line.split(), dtype=np.float32)
+                data[position:position + len(values)] = values[:data.size - position]
+                position += len(values)
+                line = text.readline()
+
+            if "nodata_value" in header:
+                for start in range(0, data.size, 10_000_000):
+                    chunk = data[start:start + 10_000_000]
+                    chunk[chunk == np.float32(header["nodata_value"])] = np.nan
+            data.flush()
+            del data
+
+        if position < nrows * ncols:
+            os.remove(data_path + ".tmp")
+            raise ValueError(f"в файле {position} значений вместо {nrows * ncols}")
+        os.replace(data_path + ".tmp", data_path)
+        return meta
+
+    def load_surface(self, source, file_name, role):
+        """
+        Загрузка поверхности role ("top"/"floor") из .asc (ЦМР) или .csv (точки X, Y, Z для TIN).
+        """
+        try:
+            started = time.perf_counter()
+            file_extension = file_name.split(".")[-1].lower()
+            if file_extension not in ["asc", "csv", "txt"]:
+                st.sidebar.warning("Неподдерживаемый формат файла. Разрешены только .asc, .csv и .txt")
+                return
+
+            os.makedirs(self.CACHE_DIR, exist_ok=True)
+            key = self.source_key(source, file_name)
+            data_path = os.path.join(self.CACHE_DIR, f"{key}.npy")
+            meta_path = os.path.join(self.CACHE_DIR, f"{key}.json")
+
+            if os.path.exists(data_path) and os.path.exists(meta_path):
+                with open(meta_path, "r", encoding="utf-8") as file:
+                    meta = json.load(file)
+            elif file_extension == "asc":
+                meta = {"type": "grid", **self.convert_ascii_grid(source, data_path)}
+            else:
+                points = pd.read_csv(source if isinstance(source, str) else io.BytesIO(source.getvalue()), engine="pyarrow")
+                points.columns = [str(col).strip().upper() for col in points.columns]
+                xyz = points[["X", "Y", "Z"]].apply(pd.to_numeric, errors="coerce").dropna().to_numpy(dtype=float)
+                np.save(data_path, xyz)
+                meta = {"type": "tin", "n_points": len(xyz)}
+
+            if not os.path.exists(meta_path):
+                with open(meta_path, "w", encoding="utf-8") as file:
+                    json.dump(meta, file)
+
+            st.session_state["surfaces"][role] = {**meta, "data_path": data_path, "file_name": os.path.basename(file_name)}
+            elapsed = time.perf_counter() - started
+            size = f"{meta['nrows']}×{meta['ncols']}" if meta["type"] == "grid" else f"{meta['n_points']} точек"
+            self.logs_manager.add_log("surface_model", f"✅ Загружена поверхность «{SURFACE_ROLES[role]}» ({size}) за {elapsed:.2f} с.", "успех")
+            st.sidebar.success(f"✅ Поверхность «{SURFACE_ROLES[role]}» загружена ({size}).")
+
+        except Exception as e:
+            st.sidebar.error(f"❌ Ошибка загрузки поверхности: {e}")
+            self.logs_manager.add_log("surface_model", f"Ошибка загрузки поверхности: {e}", "ошибка")
+
+    def open_grid(self, surface):
+        """
+        Растр поверхности, отображенный в память (nrows × ncols).
+        """
+        return np.load(surface["data_path"], mmap_mode="r").reshape(surface["nrows"], surface["ncols"])
+
+    def sample(self, role, x, y):
+        """
+        Отметки поверхности role в точках (x, y); None, если поверхность не загружена.
+        """
+        surface = st.session_state["surfaces"].get(role)
+        if surface is None:
+            return None
+        return sample_surface(surface, x, y)
+
+    def apply_to_grid(self):
+        """
+        Отметки устьев скважин по кровле и H = устье − подошва (поверхность подошвы или floor_elevation).
+        """
+        try:
+            started = time.perf_counter()
+            grid_data = st.session_state.get("grid_data")
+            if grid_data is None or grid_data.empty:
+                st.sidebar.warning("Сетка скважин не сгенерирована. Сначала выполните генерацию сетки.")
+                self.logs_manager.add_log("surface_model", "Ошибка: сетка скважин отсутствует.", "ошибка")
+                return
+            if "top" not in st.session_state["surfaces"]:
+                st.sidebar.warning("Загрузите поверхность кровли уступа.")
+                return
+
+            params = st.session_state.get("user_parameters", {})
+            x, y = grid_data["X"].to_numpy(dtype=float), grid_data["Y"].to_numpy(dtype=float)
+            collar = self.sample("top", x, y)
+            floor = self.sample("floor", x, y)
+            if floor is None:
+                floor = np.full(len(grid_data), float(params.get("floor_elevation", 0.0)))
+
+            heights = collar - floor
+            valid = np.isfinite(heights) & (heights > 0)
+            grid_data = grid_data.copy()
+            grid_data["Z"] = np.where(np.isfinite(collar), collar, grid_data["Z"] if "Z" in grid_data.columns else np.nan)
+            grid_data["H"] = np.where(valid, heights, grid_data["H"])
+            st.session_state["grid_data"] = grid_data
+
+            elapsed = time.perf_counter() - started
+            self.logs_manager.add_log(
+                "surface_model",
+                f"✅ Отметки устьев и H рассчитаны для {int(valid.sum())} из {len(grid_data)} скважин за {elapsed:.2f} с.",
+                "успех"
+            )
+            st.sidebar.success(f"✅ H скважин рассчитана по поверхностям: {int(valid.sum())} из {len(grid_data)}.")
+            if not valid.all():
+                st.sidebar.warning(f"⚠ Скважин вне поверхностей или с H ≤ 0: {int((~valid).sum())}; для них сохранена прежняя H.")
+
+        except Exception as e:
+            st.sidebar.error(f"❌ Ошибка расчета отметок устьев: {e}")
+            self.logs_manager.add_log("surface_model", f"Ошибка расчета отметок устьев: {e}", "ошибка")
@@ -0,0 +1,224 @@
+import time
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+import plotly.graph_objects as go
+
+from modules import kuzram_model, psd_engine
+from modules.reference_calculations import ReferenceCalculations
+from modules.rock_factor_calibration import RockFactorCalibration
+from utils.logs_manager import LogsManager
+from utils.session_state_manager import SessionStateManager
+
+
+class UncertaintyAnalysis:
+    """
+    Класс для распространения неопределенности свойств породы (метод Монте-Карло)
+    через цепочку расчетов БВР и функцию Swebrec P(x).
+    """
+    UNCERTAIN_PARAMETERS = ["rho", "sigma_c", "E", "RMD"]
+
+    DISTRIBUTIONS = {
+        "fixed": "Детерминированное",
+        "normal": "Нормальное",
+        "lognormal": "Логнормальное",
+        "uniform": "Равномерное",
+        "triangular": "Треугольное",
+    }
+
+    PERCENTILES = (10, 50, 90)
+    HISTOGRAM_BINS = 1000  # Разрешение 0.1 % для полос P(x)
+    # Логарифмические гистограммы x_50 (мм) и b: 10 000 интервалов, разрешение около 0.2 %
+    OUTPUT_BINS = 10_000
+    OUTPUT_RANGES = {"x_50": (1e-3, 1e5), "b": (1e-3, 1e3)}
+
+    def __init__(self, session_manager: SessionStateManager, logs_manager: LogsManager):
+        self.session_manager = session_manager
+        self.logs_manager = logs_manager
+
+        st.session_state.setdefault("uncertainty_distributions", {})
+
+    def sample_parameter(self, spec, size, rng, bounds=(None, None)):
+        """
+        Генерация выборки одного параметра по описанию распределения.
+
+        spec: {"dist": ..., "value": ..., "cv": ... (%), "low": ..., "high": ...}
+        Значения ограничиваются допустимым диапазоном параметра (bounds).
+        """
+        dist = spec.get("dist", "fixed")
+        value = float(spec["value"])
+
+        if dist == "normal":
+            samples = rng.normal(value, value * spec.get("cv", 10) / 100, size)
+        elif dist == "lognormal":
+            sigma = np.sqrt(np.log(1 + (spec.get("cv", 10) / 100) ** 2))
+            samples = rng.lognormal(np.log(value) - sigma ** 2 / 2, sigma, size)
+        elif dist == "uniform":
+            samples = rng.uniform(spec["low"], spec["high"], size)
+        elif dist == "triangular":
+            samples = rng.triangular(spec["low"], min(max(value, spec["low"]), spec["high"]), spec["high"], size)
+        else:
+            samples = np.full(size, value)
+
+        low, high = bounds
+        return np.clip(samples, low, high)
+
+    def run_monte_carlo(self, distributions, n_samples=100_000, chunk_size=20_000, seed=None):
+        """
+        Расчет полос P10/P50/P90 для x_50, b и кривой P(x).
+
+        Выборка обрабатывается блоками по chunk_size реализаций: для x_50, b и для
+        кривой P(x) по каждому размеру накапливаются гистограммы значений, поэтому
+        объем памяти не зависит от числа реализаций.
+        """
+        try:
+            started = time.perf_counter()
+            params = st.session_state.get("user_parameters", {})
+            definitions = st.session_state.get("parameters", {})
+            x_50_ref = st.session_state.get("reference_parameters", {}).get("target_x_50")
+
+            if x_50_ref is None or not isinstance(x_50_ref, (int, float)):
+                st.sidebar.error("❌ Ошибка: отсутствует эталонное значение x_50. Утвердите эталонные параметры.")
+                self.logs_manager.add_log("uncertainty_analysis", "Ошибка: отсутствует эталонное значение x_50.", "ошибка")
+                return
+
+            missing = [name for name in kuzram_model.CHAIN_INPUTS if not isinstance(params.get(name), (int, float))]
+            if missing:
+                st.sidebar.error(f"❌ Ошибка: отсутствуют параметры: {', '.join(missing)}.")
+                self.logs_manager.add_log("uncertainty_analysis", f"Ошибка: отсутствуют параметры {missing}.", "ошибка")
+                return
+
+            fixed = {name: float(params[name]) for name in kuzram_model.CHAIN_INPUTS}
+            x_max = float(kuzram_model.calculate_x_max(fixed["in_situ_block_size"], fixed["S"], fixed["B"]))
+            x_values = np.array([x for x in ReferenceCalculations.STANDARD_X_VALUES if x <= x_max])
+
+            rng = np.random.default_rng(seed)
+            edges = np.linspace(0, 100, self.HISTOGRAM_BINS + 1)
+            histogram = np.zeros((len(x_values), self.HISTOGRAM_BINS), dtype=np.int64)
+            column_offsets = np.arange(len(x_values)) * self.HISTOGRAM_BINS
+            output_edges = {name: np.geomspace(*bounds, self.OUTPUT_BINS + 1) for name, bounds in self.OUTPUT_RANGES.items()}
+            output_histograms = {name: np.zeros(self.OUTPUT_BINS, dtype=np.int64) for name in self.OUTPUT_RANGES}
+            n_valid = 0
+
+            factors = RockFactorCalibration.get_factors(params.get("rock_domain"))
+            for start in range(0, n_samples, chunk_size):
+                size = min(chunk_size, n_samples - start)
+                chunk_params = dict(fixed)
+                for name in self.UNCERTAIN_PARAMETERS:
+                    meta = definitions.get(name, {})
+                    spec = {"value": fixed[name], **distributions.get(name, {})}
+                    chunk_params[name] = self.sample_parameter(
+                        spec, size, rng, (meta.get("min_value"), meta.get("max_value"))
+                    )
+
+                results = kuzram_model.run_chain(chunk_params, x_50_ref, **factors)
+                valid_samples = np.isfinite(results["x_50"]) & np.isfinite(results["b"])
+                n_valid += int(valid_samples.sum())
+                for name, edges_out in output_edges.items():
+                    # Значения вне диапазона относятся к крайним интервалам
+                    bins = np.clip(np.searchsorted(edges_out, results[name][valid_samples], side="right") - 1,
+                                   0, self.OUTPUT_BINS - 1)
+                    output_histograms[name] += np.bincount(bins, minlength=self.OUTPUT_BINS)
+
+                p_x = psd_engine.psd_matrix(x_values, results["x_50"], results["x_max"], results["b"])
+                valid = np.isfinite(p_x)
+                bins = np.clip(np.searchsorted(edges, p_x[valid], side="right") - 1, 0, self.HISTOGRAM_BINS - 1)
+                flat_index = np.broadcast_to(column_offsets, p_x.shape)[valid] + bins
+                histogram += np.bincount(flat_index, minlength=histogram.size).reshape(histogram.shape)
+
+            if n_valid == 0:
+                st.sidebar.error("❌ Ошибка: ни одна реализация не дала корректного результата.")
+                self.logs_manager.add_log("uncertainty_analysis", "Ошибка: все реализации Монте-Карло некорректны.", "ошибка")
+                return
+
+            summary = pd.DataFrame(
+                {
+                    f"P{p}": [self._histogram_percentile(output_histograms[name][None, :], output_edges[name], p)[0]
+                               for name in ("x_50", "b")]
+                    for p in self.PERCENTILES
+                },
+                index=["x_50, мм", "b"],
+            )
+
+            bands = pd.DataFrame({"Размер фрагмента (x), мм": x_values})
+            for p in self.PERCENTILES:
+                bands[f"P{p} P(x), %"] = self._histogram_percentile(histogram, edges, p)
+
+            elapsed = time.perf_counter() - started
+            st.session_state["uncertainty_results"] = {
+                "summary": summary,
+                "bands": bands,
+                "n_samples": n_samples,
+                "n_valid": n_valid,
+                "elapsed": elapsed,
+            }
+
+            self.logs_manager.add_log(
+                "uncertainty_analysis",
+                f"✅ Анализ неопределенности выполнен: {n_samples} реализаций за {elapsed:.2f} с.",
+                "успех",
+            )
+            st.sidebar.success(f"✅ Анализ неопределенности выполнен за {elapsed:.2f} с.")
+
+        except Exception as e:
+            st.sidebar.error(f"❌ Ошибка анализа неопределенности: {e}")
+            self.logs_manager.add_log("uncertainty_analysis", f"Ошибка анализа неопределенности: {e}", "ошибка")
+
+    def _histogram_percentile(self, histogram, edges, percentile):
+        """
+        Перцентиль по накопленным гистограммам (по строке на каждый размер x); edges — границы интервалов.
+        """
+        counts = histogram.astype(float)
+        cumulative = np.cumsum(counts, axis=1)
+        total = cumulative[:, -1]
+        target = total * percentile / 100
+
+        index = np.argmax(cumulative >= target[:, None], axis=1)
+        rows = np.arange(len(histogram))
+        previous = np.where(index > 0, cumulative[rows, np.maximum(index - 1, 0)], 0.0)
+        in_bin = counts[rows, index]
+        fraction = np.divide(target - previous, in_bin, out=np.zeros_like(target), where=in_bin > 0)
+
+        width = np.diff(edges)[index]
+        return np.where(total > 0, edges[index] + fraction * width, np.nan)
+
+    def visualize_uncertainty(self):
+        """
+        Визуализация результатов анализа неопределенности: таблица P10/P50/P90 и полосы P(x).
+        """
+        try:
+            results = st.session_state.get("uncertainty_results")
+            if not results:
+                st.sidebar.warning("Нет результатов анализа неопределенности.")
+                return
+
+            st.subheader("Разброс x_50 и b (P10 / P50 / P90)")
+            st.write(
+                f"Реализаций: {results['n_samples']} (корректных: {results['n_valid']}), "
+                f"время расчета: {results['elapsed']:.2f} с"
+            )
+            st.dataframe(results["summary"].round(4), use_container_width=True)
+
+            bands = results["bands"]
+            x = bands["Размер фрагмента (x), мм"]
+
+            fig = go.Figure()
+            fig.add_trace(go.Scatter(x=x, y=bands["P90 P(x), %"], mode="lines",
+                                     line=dict(color="rgba(0, 0, 255, 0.3)"), name="P90"))
+            fig.add_trace(go.Scatter(x=x, y=bands["P10 P(x), %"], mode="lines", fill="tonexty",
+                                     fillcolor="rgba(0, 0, 255, 0.15)",
+                                     line=dict(color="rgba(0, 0, 255, 0.3)"), name="P10"))
+            fig.add_trace(go.Scatter(x=x, y=bands["P50 P(x), %"], mode="lines+markers",
+                                     line=dict(color="blue"), name="P50"))
+
+            fig.update_layout(title="Полоса неопределенности кумулятивной кривой P(x)",
+                              xaxis_title="Размер фрагмента (мм)",
+                              yaxis_title="Кумулятивное распределение (%)")
+            st.plotly_chart(fig)
+
+            st.dataframe(bands.round(2), use_container_width=True)
+
+        except Exception as e:
+            st.sidebar.error(f"Ошибка визуализации неопределенности: {e}")
+            self.logs_manager.add_log("uncertainty_analysis", f"Ошибка визуализации неопределенности: {e}", "ошибка")
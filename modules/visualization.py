@@ -1,6 +1,7 @@
 import pandas as pd
 import streamlit as st
 import matplotlib.pyplot as plt
+from modules.flyrock_zone import FlyrockZone
 from utils.logs_manager import LogsManager
 from utils.session_state_manager import SessionStateManager
 
@@ -96,6 +97,7 @@ class Visualization:
         fig, ax = plt.subplots(figsize=(8, 6))
         ax.plot(contour["X"], contour["Y"], linewidth=2, label="Контур блока")
         ax.fill(contour["X"], contour["Y"], alpha=0.2)
+        self.plot_flyrock_zone(ax)
         ax.scatter(grid_data["X"], grid_data["Y"], marker='o', c='r', label="Скважины")
         ax.plot(grid_data["X"], grid_data["Y"], linestyle='-', color='gray', alpha=0.5, label="Связи между скважинами")
 
@@ -113,6 +115,25 @@ class Visualization:
         st.sidebar.success("Комбинированная визуализация успешно отображена.")
         self.logs_manager.add_log("visualization", "Комбинированная визуализация успешно отображена.")
 
+    def plot_flyrock_zone(self, ax):
+        """
+        Наложение опасной зоны разлета кусков породы (кэшируется по сетке и параметрам).
+        """
+        try:
+            flyrock = FlyrockZone(self.session_manager, self.logs_manager).get_zone()
+            if flyrock is None or flyrock["zone"].is_empty:
+                return
+
+            label = f"Опасная зона разлета (до {flyrock['max_radius']:.0f} м)"
+            for polygon in getattr(flyrock["zone"], "geoms", [flyrock["zone"]]):
+                x, y = polygon.exterior.xy
+                ax.fill(x, y, color="orange", alpha=0.15, label=label)
+                ax.plot(x, y, color="orange", linewidth=1.5, linestyle="--")
+                label = None
+
+        except Exception as e:
+            self.logs_manager.add_log("visualization", f"Ошибка наложения опасной зоны разлета: {e}", "warning")
+
     def clear_visualization(self):
         keys = ["grid_updated", "grid_data", "block_contour", "grid_metrics"]
         for key in keys:
@@ -0,0 +1,140 @@
+import streamlit as st
+import pandas as pd
+
+from modules.energy_raster import EnergyRaster
+from modules.charge_design import ChargeDesign
+from modules.initiation_timing import InitiationTiming
+from modules.ground_vibration import GroundVibration
+from modules.flyrock_zone import FlyrockZone
+
+from utils.session_state_manager import SessionStateManager
+from utils.logs_manager import LogsManager
+
+
+class BlastDesign:
+    """
+    Экран проекта взрыва по сетке скважин: паспорт заряжания, распределение энергии ВВ,
+    схема замедлений, сейсмическое действие и опасная зона разлета.
+    """
+    def __init__(self, session_manager: SessionStateManager, logs_manager: LogsManager):
+        self.session_manager = session_manager
+        self.logs_manager = logs_manager
+        self.energy_raster = EnergyRaster(session_manager, logs_manager)
+        self.charge_design = ChargeDesign(session_manager, logs_manager)
+        self.initiation_timing = InitiationTiming(session_manager, logs_manager)
+        self.ground_vibration = GroundVibration(session_manager, logs_manager)
+        self.flyrock_zone = FlyrockZone(session_manager, logs_manager)
+
+    def show_blast_design(self):
+        st.title("Проект взрыва")
+
+        block_name = st.session_state.get("block_name", "Неизвестный блок")
+
+        if not block_name or block_name == "Неизвестный блок":
+            st.warning("Блок не импортирован. Импортируйте блок на вкладке 'Импорт данных блока'.")
+        else:
+            st.info(f"Импортированный блок: **{block_name}**")
+
+        self.render_charge_section()
+        self.render_energy_section()
+        self.render_timing_section()
+        self.render_vibration_section()
+        self.render_flyrock_section()
+
+    def render_charge_section(self):
+        """
+        Паспорт заряжания по скважинам с выгрузкой для бригады заряжания.
+        """
+        st.subheader("Паспорт заряжания скважин")
+
+        if st.button("Рассчитать паспорт заряжания"):
+            self.charge_design.run()
+
+        table = st.session_state.get("charge_design")
+        if isinstance(table, pd.DataFrame) and not table.empty:
+            totals = st.session_state.get("charge_design_totals", {})
+            st.table(pd.DataFrame({"Показатель": list(totals), "Значение": list(totals.values())}))
+            st.dataframe(table.head(1000).round(3), use_container_width=True)
+            if len(table) > 1000:
+                st.caption(f"Показаны первые 1000 из {len(table)} скважин; полная таблица — в выгрузке.")
+
+            block_name = st.session_state.get("block_name") or "block"
+            col1, col2 = st.columns(2)
+            col1.download_button("Скачать .csv", self.charge_design.export_table(table, "csv"),
+                                 file_name=f"{block_name}_заряжание.csv", mime="text/csv")
+            col2.download_button("Скачать .parquet", self.charge_design.export_table(table, "parquet"),
+                                 file_name=f"{block_name}_заряжание.parquet", mime="application/octet-stream")
+
+    def render_energy_section(self):
+        """
+        Растр плотности энергии ВВ и зоны недозаряда.
+        """
+        st.subheader("Плотность энергии ВВ")
+        n_cells = st.number_input("Ячеек растра по большей стороне блока", min_value=100, max_value=2000,
+                                  value=EnergyRaster.N_CELLS, step=100)
+
+        if st.button("Рассчитать растр плотности энергии"):
+            self.energy_raster.run(int(n_cells))
+
+        if st.session_state.get("energy_raster"):
+            self.energy_raster.visualize()
+
+    def render_timing_section(self):
+        """
+        Схема замедлений: точка инициирования и времена срабатывания скважин.
+        """
+        st.subheader("Схема инициирования")
+        grid_data = st.session_state.get("grid_data")
+        if grid_data is None or grid_data.empty:
+            st.info("Сгенерируйте сетку скважин, чтобы задать схему инициирования.")
+            return
+
+        params = st.session_state.get("user_parameters", {})
+        st.caption(
+            f"Замедления: между скважинами {params.get('delay_hole')} мс, между рядами {params.get('delay_row')} мс, "
+            f"окно одновременного взрывания {params.get('delay_window')} мс (вкладка «Ввод параметров»)."
+        )
+        start_id = st.selectbox("Скважина инициирования (ID)", options=list(grid_data["ID"]),
+                                index=0, key="initiation_start_select")
+
+        if st.button("Рассчитать времена инициирования"):
+            self.initiation_timing.run(start_id)
+
+        timing = st.session_state.get("initiation_timing")
+        if isinstance(timing, pd.DataFrame) and not timing.empty:
+            self.initiation_timing.visualize()
+            st.dataframe(timing.head(1000).round(1), use_container_width=True)
+
+    def render_vibration_section(self):
+        """
+        Прогноз PPV по приведенному расстоянию на растре вокруг блока и в точках наблюдения.
+        """
+        st.subheader("Сейсмическое действие взрыва")
+        st.caption("Масса ВВ в окне замедления берется из схемы инициирования; параметры K, β и допустимая PPV — "
+                   "в категории «Безопасность взрывных работ».")
+
+        uploaded_file = st.file_uploader("Точки наблюдения (.csv: Название, X, Y)", type=["csv", "txt"],
+                                         key="monitoring_points_file")
+        if uploaded_file is not None and st.button("Загрузить точки наблюдения"):
+            self.ground_vibration.load_points(uploaded_file)
+
+        n_cells = st.number_input("Ячеек растра PPV по большей стороне", min_value=100, max_value=2000,
+                                  value=GroundVibration.N_CELLS, step=100)
+        if st.button("Рассчитать прогноз PPV"):
+            self.ground_vibration.run(int(n_cells))
+
+        if st.session_state.get("ground_vibration"):
+            self.ground_vibration.visualize()
+
+    def render_flyrock_section(self):
+        """
+        Опасная зона разлета кусков породы (наложение — на комбинированной визуализации блока).
+        """
+        st.subheader("Опасная зона разлета кусков породы")
+        if st.button("Рассчитать опасную зону разлета"):
+            self.flyrock_zone.run()
+
+        flyrock = st.session_state.get("flyrock_zone")
+        if flyrock:
+            st.write(f"Наибольший радиус: {flyrock['max_radius']:.1f} м, площадь зоны: {flyrock['area']:.0f} м².")
+            st.caption("Зона отображается на вкладке «Визуализация блока» (комбинированная визуализация).")
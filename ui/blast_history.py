@@ -0,0 +1,81 @@
+import streamlit as st
+
+from utils.history_store import HistoryStore
+from utils.session_state_manager import SessionStateManager
+from utils.logs_manager import LogsManager
+
+
+class BlastHistory:
+    """
+    Экран истории взрывов: сохранение текущего блока, поиск по блоку, карьеру,
+    горизонту и дате, открытие сохраненного блока без повторного импорта и расчетов.
+    """
+    def __init__(self, session_manager: SessionStateManager, logs_manager: LogsManager):
+        self.session_manager = session_manager
+        self.logs_manager = logs_manager
+        self.history_store = HistoryStore(logs_manager)
+
+    def show_blast_history(self):
+        st.title("История взрывов")
+
+        block_name = st.session_state.get("block_name", "Неизвестный блок")
+
+        if not block_name or block_name == "Неизвестный блок":
+            st.warning("Блок не импортирован. Импортируйте блок на вкладке 'Импорт данных блока' или откройте блок из истории.")
+        else:
+            st.info(f"Импортированный блок: **{block_name}**")
+
+        self.render_save_section()
+        self.render_search_section()
+
+    def render_save_section(self):
+        """
+        Сохранение контура, сетки, параметров, результатов и таблиц PSD текущего блока.
+        """
+        st.subheader("Сохранение блока")
+        params = st.session_state.get("user_parameters", {})
+        st.caption(f"Карьер: **{params.get('pit') or '—'}**, горизонт: **{params.get('bench') or '—'}** "
+                   "(задаются на вкладке 'Ввод параметров').")
+
+        comment = st.text_input("Комментарий", value="", key="history_comment")
+        if st.button("Сохранить блок в историю"):
+            self.history_store.save_block(comment)
+
+    def render_search_section(self):
+        """
+        Фильтры по индексированным полям и открытие записи.
+        """
+        st.subheader("Сохраненные блоки")
+
+        col1, col2, col3 = st.columns(3)
+        block_filter = col1.text_input("Блок (начало названия)", value="", key="history_block_filter")
+        pit = col2.selectbox("Карьер", options=[""] + self.history_store.distinct_values("pit"),
+                             format_func=lambda value: value or "Все", key="history_pit_filter")
+        bench = col3.selectbox("Горизонт", options=[""] + self.history_store.distinct_values("bench"),
+                               format_func=lambda value: value or "Все", key="history_bench_filter")
+
+        col1, col2, col3 = st.columns(3)
+        date_from = col1.date_input("Дата с", value=None, key="history_date_from")
+        date_to = col2.date_input("Дата по", value=None, key="history_date_to")
+        limit = col3.number_input("Показывать записей", min_value=10, max_value=5000, value=200, step=10)
+
+        filters = (block_filter.strip(), pit, bench, date_from, date_to, limit)
+        blasts = self.history_store.list_blasts(*filters)
+        if blasts.empty:
+            st.info("Записей в истории нет.")
+            return
+        # Таблица выводится после обработки кнопок, чтобы удаление сразу отражалось в списке
+        table_placeholder = st.empty()
+
+        blast_id = st.selectbox(
+            "Запись", options=blasts["ID"].tolist(),
+            format_func=lambda value: " | ".join(str(v) for v in blasts.loc[blasts["ID"] == value, ["ID", "Блок", "Дата сохранения"]].iloc[0]),
+            key="history_blast_id"
+        )
+        col1, col2 = st.columns(2)
+        if col1.button("Открыть блок"):
+            self.history_store.load_block(blast_id)
+        if col2.button("Удалить запись"):
+            self.history_store.delete_block(blast_id)
+            blasts = self.history_store.list_blasts(*filters)
+        table_placeholder.dataframe(blasts, use_container_width=True, hide_index=True)
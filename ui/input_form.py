@@ -26,7 +26,9 @@ class InputForm:
         categories_order = [
             "Геометрические параметры блока",
             "Физико-механические свойства породы",
-            "Параметры буровзрывных работ"
+            "Параметры буровзрывных работ",
+            "Параметры переработки",
+            "Безопасность взрывных работ"
             # "ЛСК" На будущее, возможсность работы с локальной системой координат
         ]
     
@@ -0,0 +1,89 @@
+import streamlit as st
+import pandas as pd
+
+from modules.fragment_histogram import FragmentHistogram
+from modules.psd_fitting import PSDFitting
+from modules.psdvisualization import PSDVisualization
+
+from utils.session_state_manager import SessionStateManager
+from utils.logs_manager import LogsManager
+from utils.server_files import DATA_DIR, resolve_data_path
+
+
+class MeasuredPSD:
+    """
+    Экран измеренной фрагментации: импорт кривых PSD после взрывов и подбор параметров.
+    """
+    def __init__(self, session_manager: SessionStateManager, logs_manager: LogsManager):
+        self.session_manager = session_manager
+        self.logs_manager = logs_manager
+        self.psd_fitting = PSDFitting(session_manager, logs_manager)
+        self.fragment_histogram = FragmentHistogram(session_manager, logs_manager)
+        self.psdvisualization = PSDVisualization(session_manager, logs_manager)
+
+    def show_measured_psd(self):
+        st.title("Измеренная фрагментация")
+
+        self.render_fragments_section()
+        self.render_fitting_section()
+
+    def render_fragments_section(self):
+        """
+        Построение PSD по списку размеров фрагментов (выгрузка анализа изображений).
+        """
+        st.subheader("PSD по размерам отдельных фрагментов")
+        st.caption(
+            "Столбцы: size (мм) и, при наличии, mass. Без массы она принимается пропорциональной x³. "
+            "Большие файлы укажите путем на сервере: они читаются пакетами без загрузки целиком."
+        )
+
+        uploaded_file = st.file_uploader(
+            "Выберите файл фрагментов", type=["csv", "txt", "parquet", "npy"], key="fragments_file"
+        )
+        server_path = st.text_input(f"или путь к файлу фрагментов в каталоге данных сервера ({DATA_DIR})", value="")
+
+        if st.button("Построить PSD по фрагментам"):
+            if server_path:
+                data_path = resolve_data_path(server_path)
+                if data_path is None:
+                    st.sidebar.error(f"❌ Файл {server_path} не найден в каталоге данных сервера ({DATA_DIR}).")
+                else:
+                    self.fragment_histogram.run(data_path, data_path)
+            elif uploaded_file is not None:
+                self.fragment_histogram.run(uploaded_file, uploaded_file.name)
+            else:
+                st.sidebar.warning("Выберите файл фрагментов или укажите путь.")
+
+        table = st.session_state.get("psd_table_measured")
+        if isinstance(table, pd.DataFrame) and not table.empty:
+            st.dataframe(table, use_container_width=True)
+
+    def render_fitting_section(self):
+        """
+        Импорт измеренных кривых PSD и подбор Swebrec / Розина–Раммлера.
+        """
+        st.subheader("Измеренные кривые PSD")
+        st.caption("Формат .csv: взрыв, размер фрагмента (мм), проход (%) — или только размер и проход для одного взрыва.")
+
+        uploaded_file = st.file_uploader("Выберите файл с измеренными кривыми PSD", type=["csv", "txt"], key="measured_psd_file")
+        if uploaded_file is not None and st.button("Загрузить измеренные кривые"):
+            self.psd_fitting.load_measured_psd(uploaded_file)
+
+        measured = st.session_state.get("measured_psd")
+        if isinstance(measured, pd.DataFrame) and not measured.empty:
+            st.write(f"Взрывов: {measured['Взрыв'].nunique()}, точек: {len(measured)}")
+
+            if st.button("Подобрать параметры кривых"):
+                self.psd_fitting.run_fitting()
+
+        fits = st.session_state.get("psd_fit_results")
+        if isinstance(fits, pd.DataFrame) and not fits.empty:
+            st.dataframe(fits.round(4), use_container_width=True)
+
+            st.multiselect(
+                "Взрывы для наложения на график сравнения кривых",
+                options=list(fits["Взрыв"]),
+                default=list(fits["Взрыв"].head(1)),
+                key="psd_fit_overlay_blasts"
+            )
+            self.psdvisualization.visualize_dual_cumulative_curves()
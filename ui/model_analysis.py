@@ -0,0 +1,281 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from modules import kuzram_model
+from modules.uncertainty_analysis import UncertaintyAnalysis
+from modules.sensitivity_analysis import SensitivityAnalysis
+from modules.curve_comparison import CurveComparison, METRICS
+from modules.rock_factor_calibration import RockFactorCalibration
+from modules.rock_domains import RockDomains
+from modules.comminution import Comminution
+
+from utils.session_state_manager import SessionStateManager
+from utils.logs_manager import LogsManager
+
+
+class ModelAnalysis:
+    """
+    Экран анализа модели фрагментации: неопределенность и чувствительность.
+    """
+    def __init__(self, session_manager: SessionStateManager, logs_manager: LogsManager):
+        self.session_manager = session_manager
+        self.logs_manager = logs_manager
+        self.uncertainty_analysis = UncertaintyAnalysis(session_manager, logs_manager)
+        self.sensitivity_analysis = SensitivityAnalysis(session_manager, logs_manager)
+        self.curve_comparison = CurveComparison(session_manager, logs_manager)
+        self.rock_factor_calibration = RockFactorCalibration(session_manager, logs_manager)
+        self.rock_domains = RockDomains(session_manager, logs_manager)
+        self.comminution = Comminution(session_manager, logs_manager)
+
+    def show_model_analysis(self):
+        st.title("Анализ модели фрагментации")
+
+        # Отображаем имя текущего блока
+        block_name = st.session_state.get("block_name", "Неизвестный блок")
+
+        if not block_name or block_name == "Неизвестный блок":
+            st.warning("Блок не импортирован. Импортируйте блок на вкладке 'Импорт данных блока'.")
+        else:
+            st.info(f"Импортированный блок: **{block_name}**")
+
+        self.render_uncertainty_section()
+        self.render_sensitivity_section()
+        self.render_comparison_section()
+        self.render_calibration_section()
+        self.render_domains_section()
+
+    def render_uncertainty_section(self):
+        """
+        Интерфейс задания распределений свойств породы и запуска расчета Монте-Карло.
+        """
+        st.subheader("Неопределенность свойств породы (Монте-Карло)")
+
+        params = st.session_state.get("parameters", {})
+        user_params = st.session_state.get("user_parameters", {})
+        distributions = st.session_state["uncertainty_distributions"]
+
+        with st.expander("Распределения входных параметров", expanded=False):
+            for name in UncertaintyAnalysis.UNCERTAIN_PARAMETERS:
+                meta = params.get(name, {})
+                value = float(user_params.get(name, meta.get("default_value", 0.0)))
+                spec = distributions.get(name, {"dist": "fixed"})
+
+                st.markdown(f"**{meta.get('description', name)} ({name}), {meta.get('unit', '')}** — текущее значение: {value}")
+                col_dist, col_a, col_b = st.columns(3)
+
+                dist_options = list(UncertaintyAnalysis.DISTRIBUTIONS.keys())
+                dist = col_dist.selectbox(
+                    "Распределение",
+                    options=dist_options,
+                    index=dist_options.index(spec.get("dist", "fixed")),
+                    format_func=lambda key: UncertaintyAnalysis.DISTRIBUTIONS[key],
+                    key=f"uncertainty_dist_{name}"
+                )
+                spec = {"dist": dist}
+
+                if dist in ("normal", "lognormal"):
+                    spec["cv"] = col_a.number_input(
+                        "Коэффициент вариации, %", value=10.0, min_value=0.1, max_value=100.0,
+                        step=1.0, key=f"uncertainty_cv_{name}"
+                    )
+                elif dist in ("uniform", "triangular"):
+                    spec["low"] = col_a.number_input(
+                        "Минимум", value=float(value * 0.9), step=0.1, key=f"uncertainty_low_{name}"
+                    )
+                    spec["high"] = col_b.number_input(
+                        "Максимум", value=float(value * 1.1), step=0.1, key=f"uncertainty_high_{name}"
+                    )
+
+                distributions[name] = spec
+
+        n_samples = st.number_input(
+            "Число реализаций", value=100_000, min_value=1_000, max_value=2_000_000, step=10_000
+        )
+
+        if st.button("Запустить анализ неопределенности"):
+            self.uncertainty_analysis.run_monte_carlo(distributions, n_samples=int(n_samples))
+
+        if st.session_state.get("uncertainty_results"):
+            self.uncertainty_analysis.visualize_uncertainty()
+
+    def render_sensitivity_section(self):
+        """
+        Интерфейс глобального анализа чувствительности (индексы Соболя).
+        """
+        st.subheader("Чувствительность x_50 и b (индексы Соболя)")
+        st.caption(
+            "Для анализа по домену породы исключите свойства породы (rho, sigma_c, E, RMD) "
+            "из варьируемых: они будут зафиксированы на значениях текущего блока."
+        )
+
+        params = st.session_state.get("parameters", {})
+        names = st.multiselect(
+            "Варьируемые параметры",
+            options=kuzram_model.CHAIN_INPUTS,
+            default=kuzram_model.CHAIN_INPUTS,
+            format_func=lambda name: f"{params.get(name, {}).get('description', name)} ({name})",
+            key="sensitivity_parameters"
+        )
+
+        use_relative = st.checkbox("Варьировать вокруг текущих значений (вместо диапазонов из справочника)")
+        relative_range = None
+        if use_relative:
+            relative_range = st.number_input("Диапазон варьирования, ± %", value=20.0, min_value=1.0, max_value=100.0)
+
+        n_base = st.selectbox(
+            "Базовая выборка (число запусков = N · (k + 2))",
+            options=[2 ** 12, 2 ** 14, 2 ** 16],
+            index=1
+        )
+
+        if st.button("Запустить анализ чувствительности"):
+            self.sensitivity_analysis.run_sobol_analysis(names, n_base=n_base, relative_range=relative_range)
+
+        if st.session_state.get("sensitivity_results"):
+            self.sensitivity_analysis.visualize_sensitivity()
+
+    def render_comparison_section(self):
+        """
+        Ранжирование вариантов параметров БВР и измеренных взрывов по близости к эталонной кривой.
+        """
+        st.subheader("Сравнение вариантов с эталонной кривой")
+
+        params = st.session_state.get("parameters", {})
+        user_params = st.session_state.get("user_parameters", {})
+        names = st.multiselect(
+            "Варьируемые параметры (до двух)",
+            options=kuzram_model.CHAIN_INPUTS,
+            default=["B"],
+            max_selections=2,
+            format_func=lambda name: f"{params.get(name, {}).get('description', name)} ({name})",
+            key="comparison_parameters"
+        )
+
+        sweep = {}
+        for name in names:
+            meta = params.get(name, {})
+            col_low, col_high, col_count = st.columns(3)
+            low = col_low.number_input(f"{name}: от", value=float(meta.get("min_value", user_params.get(name, 0.0))), key=f"comparison_low_{name}")
+            high = col_high.number_input(f"{name}: до", value=float(meta.get("max_value", user_params.get(name, 1.0))), key=f"comparison_high_{name}")
+            count = col_count.number_input(f"{name}: точек", value=100, min_value=2, max_value=10_000, key=f"comparison_count_{name}")
+            sweep[name] = np.linspace(low, high, int(count))
+
+        sort_by = st.selectbox(
+            "Ранжировать по", options=list(METRICS), format_func=lambda key: METRICS[key], key="comparison_sort_by"
+        )
+
+        col_sweep, col_measured = st.columns(2)
+        if col_sweep.button("Сравнить варианты с эталоном") and sweep:
+            self.curve_comparison.run_sweep_comparison(sweep, sort_by=sort_by)
+        if col_measured.button("Ранжировать измеренные взрывы"):
+            self.curve_comparison.run_measured_comparison(sort_by=sort_by)
+
+        results = st.session_state.get("curve_comparison_results")
+        if results is not None and not results.empty:
+            st.write(f"Вариантов: {len(results)}. Показаны 50 лучших.")
+            st.dataframe(results.head(50).round(4), use_container_width=True)
+
+            if {"x_50, мм", "x_max, мм", "b"} <= set(results.columns):
+                n_top = st.number_input("Вариантов для оценки производительности", value=10, min_value=1, max_value=100)
+                if st.button("Оценить производительность лучших вариантов, т/ч"):
+                    try:
+                        throughput = self.comminution.evaluate_designs(results.head(int(n_top)))
+                        st.dataframe(throughput.round(3), use_container_width=True)
+                    except Exception as e:
+                        st.sidebar.error(f"❌ Ошибка оценки производительности вариантов: {e}")
+                        self.logs_manager.add_log("model_analysis", f"Ошибка оценки производительности вариантов: {e}", "ошибка")
+
+    def render_calibration_section(self):
+        """
+        Калибровка фактора породы A (и n) по истории взрывов.
+        """
+        st.subheader("Калибровка фактора породы по истории взрывов")
+        st.caption(
+            "Файл .csv: по строке на взрыв — rock_domain, параметры проекта (rho, sigma_c, E, RMD, Q, S, B, H, ...), "
+            "измеренный x_50_measured и, при наличии, b_measured. Недостающие параметры берутся из текущего проекта."
+        )
+
+        domain = st.session_state.get("user_parameters", {}).get("rock_domain")
+        factors = RockFactorCalibration.get_factors(domain)
+        st.info(f"Домен текущего блока: **{domain or RockFactorCalibration.DEFAULT_DOMAIN}** — k_A = {factors['k_A']:.4f}, k_n = {factors['k_n']:.4f}")
+
+        uploaded_file = st.file_uploader("Выберите файл истории взрывов", type=["csv"], key="calibration_history_file")
+        if uploaded_file is not None and st.button("Загрузить историю взрывов"):
+            self.rock_factor_calibration.load_history(uploaded_file)
+
+        fit_n = st.checkbox("Калибровать также коэффициент n (по измеренному b)")
+        if st.button("Выполнить калибровку"):
+            self.rock_factor_calibration.run_calibration(fit_n=fit_n)
+
+        results = st.session_state.get("rock_factor_calibration_results")
+        if results is not None and not results.empty:
+            st.dataframe(results.round(4), use_container_width=True)
+            if st.button("Сохранить калибровочные коэффициенты"):
+                self.rock_factor_calibration.save_calibration(results)
+
+    def render_domains_section(self):
+        """
+        Библиотека доменов пород: свойства, RDI/HF/A и оценки «что если» по таблице откликов.
+        """
+        st.subheader("Домены пород и быстрые оценки проекта")
+        st.caption("Таблица x_50, n, b по сетке S × B × Q строится для домена при остальных параметрах текущего проекта "
+                   "и перестраивается при правке домена или изменении этих параметров.")
+
+        domains = RockDomains.load_domains()
+        names = list(domains)
+        current = st.session_state.get("user_parameters", {}).get("rock_domain")
+        name = st.selectbox("Домен породы", options=names, index=names.index(current) if current in names else 0,
+                            key="rock_domain_select") if names else None
+
+        if name:
+            domain = domains[name]
+            factors = self.rock_domains.rock_factors(name)
+            st.write(f"{domain.get('description', '')}")
+            st.table({"Параметр": RockDomains.PROPERTIES + list(factors),
+                      "Значение": [round(float(domain[key]), 3) for key in RockDomains.PROPERTIES]
+                      + [round(value, 3) for value in factors.values()]})
+            if st.button("Применить свойства домена к блоку"):
+                self.rock_domains.apply_domain(name)
+
+        with st.expander("Добавить или изменить домен", expanded=not names):
+            source = domains.get(name, {}) if name else {}
+            parameters = st.session_state.get("parameters", {})
+            new_name = st.text_input("Название домена", value=name or "", key="rock_domain_name")
+            description = st.text_input("Описание", value=source.get("description", ""), key="rock_domain_description")
+            properties = {}
+            for key in RockDomains.PROPERTIES:
+                meta = parameters.get(key, {})
+                properties[key] = st.number_input(
+                    f"{meta.get('description', key)}, {meta.get('unit', '')}",
+                    value=float(source.get(key, meta.get("default_value", 0.0))),
+                    key=f"rock_domain_{key}"
+                )
+            col1, col2 = st.columns(2)
+            if col1.button("Сохранить домен"):
+                self.rock_domains.save_domain(new_name.strip(), properties, description)
+            if name and col2.button("Удалить домен"):
+                self.rock_domains.delete_domain(name)
+
+        if not name:
+            return
+        table = self.rock_domains.get_table(name)
+        if table is None:
+            return
+
+        user_params = st.session_state.get("user_parameters", {})
+        axes = table["axes"]
+        col1, col2, col3 = st.columns(3)
+        S = col1.slider("S, м", float(axes["S"][0]), float(axes["S"][-1]), float(user_params.get("S", axes["S"][0])), 0.1)
+        B = col2.slider("B, м", float(axes["B"][0]), float(axes["B"][-1]), float(user_params.get("B", axes["B"][0])), 0.1)
+        Q = col3.slider("Q, кг", float(axes["Q"][0]), float(axes["Q"][-1]), float(user_params.get("Q", axes["Q"][0])), 1.0)
+
+        estimate = self.rock_domains.interpolate(table, S, B, Q)
+        col1, col2, col3 = st.columns(3)
+        col1.metric("x_50, мм", f"{estimate['x_50'][0]:.1f}")
+        col2.metric("n", f"{estimate['n'][0]:.3f}")
+        col3.metric("b", f"{estimate['b'][0]:.3f}")
+
+        # Кривая x_50(Q) при выбранных S и B — тоже из таблицы
+        curve = self.rock_domains.interpolate(table, S, B, axes["Q"])
+        st.line_chart(pd.DataFrame({"Q, кг": axes["Q"], "x_50, мм": curve["x_50"]}), x="Q, кг", y="x_50, мм")
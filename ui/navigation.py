@@ -3,10 +3,16 @@ import streamlit as st
 from modules.data_initializer import DataInitializer
 from utils.session_state_manager import SessionStateManager
 from utils.logs_manager import LogsManager
+from utils.result_cache import ResultCache
 
 from ui.data_input import DataInput
 from ui.reference_values import RefValues
 from ui.results_summary import ResultsSummary
+from ui.model_analysis import ModelAnalysis
+from ui.measured_psd import MeasuredPSD
+from ui.blast_design import BlastDesign
+from ui.survey_data import SurveyData
+from ui.blast_history import BlastHistory
 
 
 # ✅ Инициализация менеджеров
@@ -37,6 +43,26 @@ def show_sidebar():
     Отображение боковой панели с кнопками и логами.
     """
     st.sidebar.button(" Перезагрузить параметры", on_click=reload_parameters)
+    show_cache_stats()
+
+
+def show_cache_stats():
+    """
+    Отображение доли попаданий в дисковый кэш результатов.
+    """
+    stats = ResultCache(logs_manager).get_stats()
+    session, total = stats["session"], stats["total"]
+
+    session_requests = session["hits"] + session["misses"]
+    total_requests = total["hits"] + total["misses"]
+    session_rate = session["hits"] / session_requests * 100 if session_requests else 0.0
+    total_rate = total["hits"] / total_requests * 100 if total_requests else 0.0
+
+    st.sidebar.caption(
+        f"Кэш результатов: попаданий в сессии {session['hits']}/{session_requests} ({session_rate:.0f}%), "
+        f"всего {total['hits']}/{total_requests} ({total_rate:.0f}%); "
+        f"записей {total['entries']}, {total['size'] / 1024 / 1024:.1f} МБ"
+    )
 
 
 def navigation():
@@ -50,14 +76,24 @@ def navigation():
     data_input = DataInput(session_manager, logs_manager)
     reference_values = RefValues(session_manager, logs_manager)
     results_summary = ResultsSummary(session_manager, logs_manager)
+    model_analysis = ModelAnalysis(session_manager, logs_manager)
+    measured_psd = MeasuredPSD(session_manager, logs_manager)
+    blast_design = BlastDesign(session_manager, logs_manager)
+    survey_data = SurveyData(session_manager, logs_manager)
+    blast_history = BlastHistory(session_manager, logs_manager)
 
     TAB_OPTIONS = {
         "📥 Импорт данных блока": data_input.show_import_block,
         "📋 Ввод параметров": data_input.show_input_form,
         "📊 Визуализация блока": data_input.show_visualization,
+        "🧨 Проект взрыва": blast_design.show_blast_design,
+        "📐 Маркшейдерские данные": survey_data.show_survey_data,
         "📌 Эталонные значения": reference_values.show_reference_values,
         "📜 Параметры блока": data_input.show_summary_screen,
-        "📈 Итоговые расчеты": results_summary.show_results_summary
+        "📈 Итоговые расчеты": results_summary.show_results_summary,
+        "🎲 Анализ модели": model_analysis.show_model_analysis,
+        "📏 Измеренная фрагментация": measured_psd.show_measured_psd,
+        "🗄 История взрывов": blast_history.show_blast_history
     }
 
     # ✅ Размещение вкладок
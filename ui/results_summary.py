@@ -4,6 +4,9 @@ from modules.calculations import Calculations
 from modules.psd_calculator import PSDCalculator
 from modules.results_display import ResultsDisplay
 from modules.psdvisualization import PSDVisualization
+from modules.per_hole_fragmentation import PerHoleFragmentation
+from modules.fragmentation_models import ModelComparison
+from modules.comminution import Comminution
 
 from utils.session_state_manager import SessionStateManager
 from utils.logs_manager import LogsManager
@@ -19,6 +22,9 @@ class ResultsSummary:
         self.psd_calculator = PSDCalculator(session_manager, logs_manager)
         self.results_display = ResultsDisplay(session_manager, logs_manager)
         self.psdvisualization = PSDVisualization(session_manager, logs_manager)
+        self.per_hole_fragmentation = PerHoleFragmentation(session_manager, logs_manager)
+        self.model_comparison = ModelComparison(session_manager, logs_manager)
+        self.comminution = Comminution(session_manager, logs_manager)
 
     def show_results_summary(self):
         st.title("Итоговые расчёты параметров БВР")
@@ -41,6 +47,23 @@ class ResultsSummary:
             self.psdvisualization.visualize_calculated_psd_table()
             self.psdvisualization.visualize_calculated_cumulative_curve()  
             self.psdvisualization.visualize_dual_cumulative_curves()
+            self.psdvisualization.show_psd_summary()
 
             # if "P_x_data" in st.session_state:
             #     st.write(st.session_state["P_x_data"].head())
+
+        # Кнопка запуска расчёта фрагментации по скважинам
+        if st.button("Рассчитать фрагментацию по скважинам и PSD блока"):
+            self.per_hole_fragmentation.run_calculations()
+            self.per_hole_fragmentation.visualize_per_hole_results()
+            self.psdvisualization.visualize_block_mixture_curve()
+
+        # Кнопка сравнения моделей фрагментации
+        if st.button("Сравнить модели фрагментации"):
+            self.model_comparison.run_comparison()
+            self.psdvisualization.visualize_model_comparison()
+
+        # Кнопка оценки производительности дробления и измельчения
+        if st.button("Оценить производительность дробления и измельчения"):
+            self.comminution.run()
+            self.comminution.visualize()
@@ -0,0 +1,198 @@
+import streamlit as st
+import pandas as pd
+
+from modules.block_model import BlockModel
+from modules.block_volume import BlockVolume
+from modules.drill_reconciliation import DrillReconciliation
+from modules.hole_trajectories import HoleTrajectories
+from modules.surface_model import SurfaceModel, SURFACE_ROLES
+
+from utils.session_state_manager import SessionStateManager
+from utils.logs_manager import LogsManager
+from utils.server_files import DATA_DIR, resolve_data_path
+
+
+class SurveyData:
+    """
+    Экран маркшейдерских данных: поверхности уступа, объемы блоков по поверхностям,
+    свойства пород из блочной модели, сверка фактического бурения с проектной сеткой
+    и пространственные траектории скважин.
+    """
+    def __init__(self, session_manager: SessionStateManager, logs_manager: LogsManager):
+        self.session_manager = session_manager
+        self.logs_manager = logs_manager
+        self.drill_reconciliation = DrillReconciliation(session_manager, logs_manager)
+        self.hole_trajectories = HoleTrajectories(session_manager, logs_manager)
+        self.surface_model = SurfaceModel(session_manager, logs_manager)
+        self.block_volume = BlockVolume(session_manager, logs_manager)
+        self.block_model = BlockModel(session_manager, logs_manager)
+
+    def show_survey_data(self):
+        st.title("Маркшейдерские данные")
+
+        block_name = st.session_state.get("block_name", "Неизвестный блок")
+
+        if not block_name or block_name == "Неизвестный блок":
+            st.warning("Блок не импортирован. Импортируйте блок на вкладке 'Импорт данных блока'.")
+        else:
+            st.info(f"Импортированный блок: **{block_name}**")
+
+        self.render_surfaces_section()
+        self.render_volume_section()
+        self.render_block_model_section()
+        self.render_reconciliation_section()
+        self.render_trajectories_section()
+
+    def render_surfaces_section(self):
+        """
+        Загрузка поверхностей кровли и подошвы уступа, расчет отметок устьев и H скважин.
+        """
+        st.subheader("Поверхности уступа")
+        st.caption("ЦМР в формате ESRI ASCII Grid (.asc) или точки съемки (.csv: X, Y, Z) для триангуляции. "
+                   "Большие растры укажите путем на сервере: они один раз переводятся в дисковый кэш.")
+
+        role = st.selectbox("Поверхность", options=list(SURFACE_ROLES), format_func=SURFACE_ROLES.get, key="surface_role")
+        uploaded_file = st.file_uploader("Выберите файл поверхности", type=["asc", "csv", "txt"], key="surface_file")
+        server_path = st.text_input(f"или путь к файлу поверхности в каталоге данных сервера ({DATA_DIR})", value="", key="surface_path")
+        if st.button("Загрузить поверхность"):
+            if server_path:
+                data_path = resolve_data_path(server_path)
+                if data_path is None:
+                    st.sidebar.error(f"❌ Файл {server_path} не найден в каталоге данных сервера ({DATA_DIR}).")
+                else:
+                    self.surface_model.load_surface(data_path, data_path, role)
+            elif uploaded_file is not None:
+                self.surface_model.load_surface(uploaded_file, uploaded_file.name, role)
+            else:
+                st.sidebar.warning("Выберите файл поверхности или укажите путь.")
+
+        surfaces = st.session_state.get("surfaces", {})
+        for surface_role, surface in surfaces.items():
+            size = f"растр {surface['nrows']}×{surface['ncols']}, ячейка {surface['cell']:g} м" if surface["type"] == "grid" \
+                else f"TIN, {surface['n_points']} точек"
+            st.write(f"**{SURFACE_ROLES[surface_role]}**: {surface['file_name']} ({size})")
+
+        if "top" in surfaces and st.button("Рассчитать отметки устьев и высоту H скважин"):
+            self.surface_model.apply_to_grid()
+
+    def render_volume_section(self):
+        """
+        Объем и масса горной массы текущего блока и блоков уступа по поверхностям кровли и подошвы.
+        """
+        st.subheader("Объем и масса блоков по поверхностям")
+        st.caption("Контуры блоков уступа (.csv: Блок, X, Y или .str с несколькими стрингами). "
+                   "Без поверхности подошвы используется отметка floor_elevation.")
+
+        uploaded_file = st.file_uploader("Выберите файл контуров блоков уступа", type=["csv", "txt", "str"], key="bench_contours_file")
+        if uploaded_file is not None and st.button("Загрузить контуры блоков"):
+            self.block_volume.load_bench_contours(uploaded_file)
+
+        if "top" not in st.session_state.get("surfaces", {}):
+            return
+        if st.button("Рассчитать объем и массу по поверхностям"):
+            self.block_volume.run()
+
+        results = st.session_state.get("block_volume_results")
+        if isinstance(results, pd.DataFrame) and not results.empty:
+            st.dataframe(results.round(2), use_container_width=True)
+            st.write(f"**Итого:** {results['Объем по поверхностям, м³'].sum():,.0f} м³, "
+                     f"{results['Масса горной массы, т'].sum():,.0f} т")
+
+    def render_block_model_section(self):
+        """
+        Загрузка геологической блочной модели и назначение свойств пород скважинам по заряженным интервалам.
+        """
+        st.subheader("Свойства пород из блочной модели")
+        st.caption("Регулярная блочная модель (.csv/.parquet): центры ячеек X, Y, Z и свойства rho, sigma_c, E, RMD. "
+                   "Модели на миллионы ячеек укажите путем на сервере: они один раз переводятся в дисковый кэш.")
+
+        uploaded_file = st.file_uploader("Выберите файл блочной модели", type=["csv", "txt", "parquet"], key="block_model_file")
+        server_path = st.text_input(f"или путь к файлу блочной модели в каталоге данных сервера ({DATA_DIR})", value="", key="block_model_path")
+        if st.button("Загрузить блочную модель"):
+            if server_path:
+                data_path = resolve_data_path(server_path)
+                if data_path is None:
+                    st.sidebar.error(f"❌ Файл {server_path} не найден в каталоге данных сервера ({DATA_DIR}).")
+                else:
+                    self.block_model.load_block_model(data_path, data_path)
+            elif uploaded_file is not None:
+                self.block_model.load_block_model(uploaded_file, uploaded_file.name)
+            else:
+                st.sidebar.warning("Выберите файл блочной модели или укажите путь.")
+
+        model = st.session_state.get("block_model")
+        if not model:
+            return
+        cells = " × ".join(f"{model['axes'][axis]['cell']:g}" for axis in BlockModel.COORDINATE_COLUMNS)
+        st.write(f"**Блочная модель**: {model['file_name']} ({model['n_cells']} ячеек {cells} м; свойства: {', '.join(model['properties'])})")
+
+        if st.button("Назначить свойства пород скважинам"):
+            self.block_model.run()
+
+        lookup = st.session_state.get("block_model_lookup")
+        if isinstance(lookup, pd.DataFrame) and not lookup.empty:
+            st.dataframe(lookup.head(1000).round(3), use_container_width=True)
+
+    def render_reconciliation_section(self):
+        """
+        Импорт съемки устьев фактических скважин и сверка с проектом.
+        """
+        st.subheader("Сверка фактического бурения")
+        st.caption("Столбцы: X, Y и, при наличии, ID, Z и блок (Блок). Большие файлы можно указать путем на сервере.")
+
+        uploaded_file = st.file_uploader("Выберите файл съемки скважин", type=["csv", "txt", "parquet"], key="as_drilled_file")
+        server_path = st.text_input(f"или путь к файлу съемки в каталоге данных сервера ({DATA_DIR})", value="", key="as_drilled_path")
+        if st.button("Загрузить съемку скважин"):
+            if server_path:
+                data_path = resolve_data_path(server_path)
+                if data_path is None:
+                    st.sidebar.error(f"❌ Файл {server_path} не найден в каталоге данных сервера ({DATA_DIR}).")
+                else:
+                    self.drill_reconciliation.load_as_drilled(data_path, data_path)
+            elif uploaded_file is not None:
+                self.drill_reconciliation.load_as_drilled(uploaded_file, uploaded_file.name)
+            else:
+                st.sidebar.warning("Выберите файл съемки или укажите путь.")
+
+        as_drilled = st.session_state.get("as_drilled")
+        if not isinstance(as_drilled, pd.DataFrame) or as_drilled.empty:
+            return
+
+        params = st.session_state.get("user_parameters", {})
+        default_distance = min(float(params.get("S", 5)), float(params.get("B", 6))) / 2
+        max_distance = st.number_input("Допуск сопоставления, м", min_value=0.1, value=default_distance, step=0.1)
+        scale = st.number_input("Масштаб векторов отклонений", min_value=1.0, value=5.0, step=1.0)
+
+        if st.button("Сверить с проектной сеткой"):
+            self.drill_reconciliation.run(max_distance)
+
+        results = st.session_state.get("drill_reconciliation")
+        if results:
+            summary = results["summary"]
+            st.table(pd.DataFrame({"Показатель": list(summary), "Значение": [str(v) if isinstance(v, str) else round(v, 3) for v in summary.values()]}))
+            self.drill_reconciliation.visualize(scale)
+            st.dataframe(results["table"].head(1000).round(3), use_container_width=True)
+            if not results["extra"].empty:
+                st.markdown("**Лишние скважины**")
+                st.dataframe(results["extra"].head(1000), use_container_width=True)
+
+    def render_trajectories_section(self):
+        """
+        Траектории скважин (проектные hole_dip/hole_azimuth или инклинометрия) и расстояние между зарядами на глубине.
+        """
+        st.subheader("Траектории скважин и расстояние между зарядами на глубине")
+        st.caption("Инклинометрия (.csv): ID, depth (глубина по стволу, м), dip (угол к горизонту), azimuth. "
+                   "Скважины без инклинометрии строятся по проектным углам.")
+
+        uploaded_file = st.file_uploader("Выберите файл инклинометрии", type=["csv", "txt"], key="deviation_survey_file")
+        if uploaded_file is not None and st.button("Загрузить инклинометрию"):
+            self.hole_trajectories.load_survey(uploaded_file)
+
+        threshold = st.slider("Порог сближения зарядов (доля проектного расстояния)", 0.3, 1.0, 0.8, 0.05)
+        if st.button("Рассчитать траектории и расстояния между зарядами"):
+            self.hole_trajectories.run()
+
+        results = st.session_state.get("hole_trajectories")
+        if results:
+            self.hole_trajectories.visualize(threshold)
+            st.dataframe(results["table"].head(1000).round(3), use_container_width=True)
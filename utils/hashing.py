@@ -0,0 +1,51 @@
+import hashlib
+import json
+
+import numpy as np
+import pandas as pd
+
+
+def _canonical(value):
+    """
+    Приведение значения к виду, пригодному для детерминированной JSON-сериализации.
+    """
+    if isinstance(value, dict):
+        return {str(key): _canonical(val) for key, val in sorted(value.items(), key=lambda item: str(item[0]))}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(val) for val in value]
+    if isinstance(value, pd.DataFrame):
+        digest = hashlib.sha256(pd.util.hash_pandas_object(value, index=True).values.tobytes())
+        digest.update(json.dumps([str(col) for col in value.columns]).encode("utf-8"))
+        return {"__dataframe__": digest.hexdigest()}
+    if isinstance(value, np.ndarray):
+        array = np.ascontiguousarray(value)
+        return {"__ndarray__": hashlib.sha256(array.tobytes()).hexdigest(), "shape": list(array.shape), "dtype": str(array.dtype)}
+    if isinstance(value, np.generic):
+        return _canonical(value.item())
+    if isinstance(value, float):
+        return repr(value)
+    if isinstance(value, (bool, int, str)) or value is None:
+        return value
+    return repr(value)
+
+
+def canonical_hash(value):
+    """
+    SHA-256 канонического представления значения (словари, списки, числа, массивы, DataFrame).
+
+    Результат не зависит от порядка ключей словарей: одинаковые наборы параметров
+    дают одинаковый хэш в разных сессиях и после перезапуска сервера.
+    """
+    payload = json.dumps(_canonical(value), ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+GRID_HASH_COLUMNS = ["ID", "X", "Y", "H"]
+
+
+def grid_hash(grid_data):
+    """
+    Хэш сетки скважин по столбцам ID, X, Y, H — признак того, что таблица рассчитана по текущей сетке.
+    """
+    columns = [col for col in GRID_HASH_COLUMNS if col in grid_data.columns]
+    return canonical_hash(grid_data[columns].reset_index(drop=True))
@@ -0,0 +1,272 @@
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+import streamlit as st
+
+from utils.session_state_manager import SessionStateManager
+
+
+class HistoryStore:
+    """
+    История блоков (взрывов) на SQLite.
+
+    Таблица blasts — по строке на сохранение блока с полями для поиска и списка
+    (блок, карьер, горизонт, дата, итоговые показатели) и индексами по ним,
+    поэтому список и фильтры не читают тяжелые данные. Контур, сетка, таблицы
+    результатов и PSD хранятся в artifacts отдельными записями: таблицы — в формате
+    Arrow IPC со сжатием zstd, словари параметров и результатов — в JSON.
+    Открытие блока — выборка его записей по первичному ключу.
+    """
+    TABLE_KEYS = [
+        "block_contour", "grid_data", "charge_design", "per_hole_results",
+        "psd_table", "P_x_data", "psd_table_calculated", "P_x_calculated", "psd_table_block", "psd_table_measured",
+    ]
+    JSON_KEYS = [
+        "user_parameters", "reference_parameters", "calculation_results",
+        "block_geometry", "grid_metrics", "charge_design_totals", "charge_design_grid_hash",
+    ]
+    COMPRESSION = "zstd"
+
+    _initialized_paths = set()
+    _init_lock = threading.Lock()
+
+    def __init__(self, logs_manager=None, db_path="config/history.sqlite"):
+        self.logs_manager = logs_manager
+        self.db_path = db_path
+
+    def _connect(self):
+        """
+        Новое соединение на каждую операцию: соединения SQLite не разделяются между потоками.
+        """
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        connection = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        connection.execute("PRAGMA busy_timeout = 30000")
+        connection.execute("PRAGMA foreign_keys = ON")
+
+        if self.db_path not in HistoryStore._initialized_paths:
+            with HistoryStore._init_lock:
+                if self.db_path not in HistoryStore._initialized_paths:
+                    connection.execute("PRAGMA journal_mode = WAL")
+                    connection.execute("""
+                        CREATE TABLE IF NOT EXISTS blasts (
+                            id INTEGER PRIMARY KEY AUTOINCREMENT,
+                            block_name TEXT NOT NULL,
+                            pit TEXT NOT NULL DEFAULT '',
+                            bench TEXT NOT NULL DEFAULT '',
+                            saved_at TEXT NOT NULL,
+                            n_holes INTEGER,
+                            volume REAL,
+                            x_50 REAL,
+                            comment TEXT NOT NULL DEFAULT '',
+                            size INTEGER NOT NULL DEFAULT 0
+                        )
+                    """)
+                    connection.execute("CREATE INDEX IF NOT EXISTS idx_blasts_block ON blasts (block_name, saved_at)")
+                    connection.execute("CREATE INDEX IF NOT EXISTS idx_blasts_saved_at ON blasts (saved_at)")
+                    connection.execute("CREATE INDEX IF NOT EXISTS idx_blasts_pit_bench ON blasts (pit, bench, saved_at)")
+                    connection.execute("""
+                        CREATE TABLE IF NOT EXISTS artifacts (
+                            blast_id INTEGER NOT NULL REFERENCES blasts (id) ON DELETE CASCADE,
+                            name TEXT NOT NULL,
+                            kind TEXT NOT NULL,
+                            payload BLOB NOT NULL,
+                            PRIMARY KEY (blast_id, name)
+                        ) WITHOUT ROWID
+                    """)
+                    HistoryStore._initialized_paths.add(self.db_path)
+        return connection
+
+    def encode_table(self, df):
+        """
+        DataFrame → сжатый поток Arrow IPC (индекс не сохраняется).
+        """
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        sink = pa.BufferOutputStream()
+        options = pa.ipc.IpcWriteOptions(compression=self.COMPRESSION)
+        with pa.ipc.new_stream(sink, table.schema, options=options) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+
+    def decode_table(self, payload):
+        return pa.ipc.open_stream(payload).read_all().to_pandas()
+
+    def json_default(self, value):
+        if isinstance(value, np.generic):
+            return value.item()
+        if isinstance(value, np.ndarray):
+            return value.tolist()
+        return str(value)
+
+    def snapshot(self):
+        """
+        Записи artifacts для текущего состояния блока: [(имя, вид, данные)].
+        """
+        artifacts = []
+        for name in self.TABLE_KEYS:
+            value = st.session_state.get(name)
+            if isinstance(value, pd.DataFrame) and not value.empty:
+                artifacts.append((name, "table", self.encode_table(value)))
+        for name in self.JSON_KEYS:
+            value = st.session_state.get(name)
+            if value:
+                artifacts.append((name, "json", json.dumps(value, ensure_ascii=False, default=self.json_default).encode("utf-8")))
+        return artifacts
+
+    def save_block(self, comment=""):
+        """
+        Сохранение текущего блока; возвращает id записи или None.
+        """
+        try:
+            block_name = st.session_state.get("block_name")
+            if not block_name:
+                st.sidebar.warning("Блок не импортирован: нечего сохранять в историю.")
+                return None
+
+            params = st.session_state.get("user_parameters", {})
+            grid_data = st.session_state.get("grid_data")
+            geometry = st.session_state.get("block_geometry") or {}
+            x_50 = st.session_state.get("calculation_results", {}).get("x_50")
+            artifacts = self.snapshot()
+
+            connection = self._connect()
+            try:
+                connection.execute("BEGIN IMMEDIATE")
+                cursor = connection.execute(
+                    "INSERT INTO blasts (block_name, pit, bench, saved_at, n_holes, volume, x_50, comment, size) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        str(block_name), str(params.get("pit", "") or ""), str(params.get("bench", "") or ""),
+                        datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                        len(grid_data) if isinstance(grid_data, pd.DataFrame) else None,
+                        float(geometry["volume"]) if geometry.get("volume") is not None else None,
+                        float(x_50) if isinstance(x_50, (int, float, np.generic)) else None,
+                        comment, sum(len(payload) for _, _, payload in artifacts),
+                    )
+                )
+                blast_id = cursor.lastrowid
+                connection.executemany(
+                    "INSERT INTO artifacts (blast_id, name, kind, payload) VALUES (?, ?, ?, ?)",
+                    [(blast_id, name, kind, payload) for name, kind, payload in artifacts]
+                )
+                connection.execute("COMMIT")
+            except Exception:
+                connection.execute("ROLLBACK")
+                raise
+            finally:
+                connection.close()
+
+            self._log(f"Блок «{block_name}» сохранен в историю (запись {blast_id}).", "успех")
+            st.sidebar.success(f"✅ Блок «{block_name}» сохранен в историю.")
+            return blast_id
+
+        except Exception as e:
+            st.sidebar.error(f"❌ Ошибка сохранения блока в историю: {e}")
+            self._log(f"Ошибка сохранения блока в историю: {e}", "ошибка")
+            return None
+
+    def list_blasts(self, block_name="", pit="", bench="", date_from=None, date_to=None, limit=200):
+        """
+        Список сохраненных блоков (без тяжелых данных), новые сверху. Фильтр по блоку — по началу названия.
+        """
+        conditions, values = [], []
+        if block_name:
+            # Диапазон по префиксу использует индекс по block_name (в отличие от LIKE)
+            conditions.append("block_name >= ? AND block_name < ?")
+            values += [block_name, block_name + "\U0010ffff"]
+        if pit:
+            conditions.append("pit = ?")
+            values.append(pit)
+        if bench:
+            conditions.append("bench = ?")
+            values.append(bench)
+        if date_from:
+            conditions.append("saved_at >= ?")
+            values.append(f"{date_from} 00:00:00")
+        if date_to:
+            conditions.append("saved_at <= ?")
+            values.append(f"{date_to} 23:59:59")
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        connection = self._connect()
+        try:
+            rows = connection.execute(
+                f"SELECT id, block_name, pit, bench, saved_at, n_holes, volume, x_50, comment, size "
+                f"FROM blasts {where} ORDER BY saved_at DESC, id DESC LIMIT ?",
+                (*values, int(limit))
+            ).fetchall()
+        finally:
+            connection.close()
+
+        return pd.DataFrame(rows, columns=[
+            "ID", "Блок", "Карьер", "Горизонт", "Дата сохранения", "Скважин", "Объем, м³", "x_50, мм", "Комментарий", "Размер, байт",
+        ])
+
+    def distinct_values(self, column):
+        """
+        Значения карьера или горизонта для фильтров (по индексу pit, bench).
+        """
+        if column not in ("pit", "bench"):
+            raise ValueError(f"недопустимый столбец {column}")
+        connection = self._connect()
+        try:
+            rows = connection.execute(f"SELECT DISTINCT {column} FROM blasts WHERE {column} != '' ORDER BY {column}").fetchall()
+        finally:
+            connection.close()
+        return [row[0] for row in rows]
+
+    def load_block(self, blast_id):
+        """
+        Восстановление сохраненного блока в session_state без повторного импорта и расчетов.
+        """
+        try:
+            connection = self._connect()
+            try:
+                blast = connection.execute("SELECT block_name FROM blasts WHERE id = ?", (int(blast_id),)).fetchone()
+                artifacts = connection.execute(
+                    "SELECT name, kind, payload FROM artifacts WHERE blast_id = ?", (int(blast_id),)
+                ).fetchall()
+            finally:
+                connection.close()
+
+            if blast is None:
+                st.sidebar.error(f"❌ Запись истории {blast_id} не найдена.")
+                return
+
+            # Данные и результаты другого блока не должны смешиваться с восстановленными
+            SessionStateManager().reset_block_state()
+            for name, kind, payload in artifacts:
+                st.session_state[name] = self.decode_table(payload) if kind == "table" else json.loads(payload.decode("utf-8"))
+
+            st.session_state["block_name"] = blast[0]
+            st.session_state["grid_generated"] = isinstance(st.session_state.get("grid_data"), pd.DataFrame)
+            self._log(f"Блок «{blast[0]}» загружен из истории (запись {blast_id}).", "успех")
+            st.sidebar.success(f"✅ Блок «{blast[0]}» загружен из истории.")
+
+        except Exception as e:
+            st.sidebar.error(f"❌ Ошибка загрузки блока из истории: {e}")
+            self._log(f"Ошибка загрузки блока из истории: {e}", "ошибка")
+
+    def delete_block(self, blast_id):
+        try:
+            connection = self._connect()
+            try:
+                connection.execute("DELETE FROM blasts WHERE id = ?", (int(blast_id),))
+            finally:
+                connection.close()
+            self._log(f"Запись истории {blast_id} удалена.", "успех")
+            st.sidebar.success(f"✅ Запись истории {blast_id} удалена.")
+
+        except Exception as e:
+            st.sidebar.error(f"❌ Ошибка удаления записи истории: {e}")
+            self._log(f"Ошибка удаления записи истории: {e}", "ошибка")
+
+    def _log(self, message, log_type):
+        if self.logs_manager is not None:
+            self.logs_manager.add_log("history_store", message, log_type)
@@ -0,0 +1,181 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import zlib
+
+import streamlit as st
+
+from utils.hashing import canonical_hash
+
+
+class ResultCache:
+    """
+    Постоянный (дисковый) кэш результатов расчетов на SQLite.
+
+    Ключ — канонический хэш параметров, пространства имен и версии модели.
+    Размер кэша ограничен: при превышении max_bytes вытесняются записи,
+    к которым дольше всего не обращались (LRU). Режим WAL и ожидание блокировки
+    позволяют одновременно работать нескольким сессиям Streamlit.
+    """
+    # Версия модели: увеличивается при изменении формул, чтобы старые записи не использовались
+    MODEL_VERSION = "3"
+
+    _initialized_paths = set()
+    _init_lock = threading.Lock()
+
+    def __init__(self, logs_manager=None, db_path="cache/results_cache.sqlite", max_bytes=256 * 1024 * 1024):
+        self.logs_manager = logs_manager
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+
+        st.session_state.setdefault("result_cache_stats", {"hits": 0, "misses": 0})
+
+    def _connect(self):
+        """
+        Новое соединение на каждую операцию: соединения SQLite не разделяются между потоками.
+        """
+        connection = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        connection.execute("PRAGMA busy_timeout = 30000")
+
+        if self.db_path not in ResultCache._initialized_paths:
+            with ResultCache._init_lock:
+                if self.db_path not in ResultCache._initialized_paths:
+                    connection.execute("PRAGMA journal_mode = WAL")
+                    connection.execute("""
+                        CREATE TABLE IF NOT EXISTS entries (
+                            key TEXT PRIMARY KEY,
+                            namespace TEXT NOT NULL,
+                            model_version TEXT NOT NULL,
+                            payload BLOB NOT NULL,
+                            size INTEGER NOT NULL,
+                            created_at REAL NOT NULL,
+                            last_access REAL NOT NULL
+                        )
+                    """)
+                    connection.execute("CREATE INDEX IF NOT EXISTS idx_entries_last_access ON entries (last_access)")
+                    connection.execute("""
+                        CREATE TABLE IF NOT EXISTS stats (
+                            namespace TEXT PRIMARY KEY,
+                            hits INTEGER NOT NULL DEFAULT 0,
+                            misses INTEGER NOT NULL DEFAULT 0
+                        )
+                    """)
+                    ResultCache._initialized_paths.add(self.db_path)
+
+        connection.execute("PRAGMA synchronous = NORMAL")
+        return connection
+
+    def make_key(self, namespace, params):
+        """
+        Ключ записи: хэш пространства имен, версии модели и параметров.
+        """
+        return canonical_hash({"namespace": namespace, "model_version": self.MODEL_VERSION, "params": params})
+
+    def get(self, namespace, params):
+        """
+        Возвращает сохраненный результат или None, если записи нет.
+        """
+        try:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            key = self.make_key(namespace, params)
+            connection = self._connect()
+            try:
+                row = connection.execute("SELECT payload FROM entries WHERE key = ?", (key,)).fetchone()
+                hit = row is not None
+                if hit:
+                    connection.execute("UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key))
+                connection.execute(
+                    "INSERT INTO stats (namespace, hits, misses) VALUES (?, ?, ?) "
+                    "ON CONFLICT(namespace) DO UPDATE SET hits = hits + excluded.hits, misses = misses + excluded.misses",
+                    (namespace, int(hit), int(not hit))
+                )
+            finally:
+                connection.close()
+
+            st.session_state["result_cache_stats"]["hits" if hit else "misses"] += 1
+            return pickle.loads(zlib.decompress(row[0])) if hit else None
+
+        except Exception as e:
+            self._log_error(f"Ошибка чтения кэша ({namespace}): {e}")
+            return None
+
+    def set(self, namespace, params, value):
+        """
+        Сохраняет результат и вытесняет давно не использовавшиеся записи сверх лимита.
+        """
+        try:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            key = self.make_key(namespace, params)
+            payload = zlib.compress(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+            now = time.time()
+
+            connection = self._connect()
+            try:
+                connection.execute("BEGIN IMMEDIATE")
+                connection.execute(
+                    "INSERT OR REPLACE INTO entries (key, namespace, model_version, payload, size, created_at, last_access) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (key, namespace, self.MODEL_VERSION, payload, len(payload), now, now)
+                )
+                connection.execute("""
+                    DELETE FROM entries WHERE key IN (
+                        SELECT key FROM (
+                            SELECT key, SUM(size) OVER (ORDER BY last_access DESC, key) AS running_size
+                            FROM entries
+                        ) WHERE running_size > ?
+                    )
+                """, (self.max_bytes,))
+                connection.execute("COMMIT")
+            except Exception:
+                connection.execute("ROLLBACK")
+                raise
+            finally:
+                connection.close()
+
+        except Exception as e:
+            self._log_error(f"Ошибка записи в кэш ({namespace}): {e}")
+
+    def get_stats(self):
+        """
+        Статистика попаданий: текущая сессия и все сессии (по данным файла кэша).
+        """
+        session = dict(st.session_state.get("result_cache_stats", {"hits": 0, "misses": 0}))
+        total = {"hits": 0, "misses": 0, "entries": 0, "size": 0}
+        try:
+            if os.path.exists(self.db_path):
+                connection = self._connect()
+                try:
+                    hits, misses = connection.execute(
+                        "SELECT COALESCE(SUM(hits), 0), COALESCE(SUM(misses), 0) FROM stats"
+                    ).fetchone()
+                    entries, size = connection.execute(
+                        "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+                    ).fetchone()
+                finally:
+                    connection.close()
+                total = {"hits": hits, "misses": misses, "entries": entries, "size": size}
+        except Exception as e:
+            self._log_error(f"Ошибка чтения статистики кэша: {e}")
+        return {"session": session, "total": total}
+
+    def clear(self):
+        """
+        Удаляет все записи и статистику кэша.
+        """
+        try:
+            if os.path.exists(self.db_path):
+                connection = self._connect()
+                try:
+                    connection.execute("DELETE FROM entries")
+                    connection.execute("DELETE FROM stats")
+                finally:
+                    connection.close()
+            st.session_state["result_cache_stats"] = {"hits": 0, "misses": 0}
+        except Exception as e:
+            self._log_error(f"Ошибка очистки кэша: {e}")
+
+    def _log_error(self, message):
+        if self.logs_manager is not None:
+            self.logs_manager.add_log("result_cache", message, "ошибка")
@@ -0,0 +1,17 @@
+import os
+
+
+# Каталог данных сервера: файлы, указанные путем, читаются только из него
+DATA_DIR = os.environ.get("BLAST_APP_DATA_DIR", "data")
+
+
+def resolve_data_path(path):
+    """
+    Полный путь к файлу внутри каталога данных DATA_DIR; None, если путь ведет
+    за пределы каталога (в том числе по символическим ссылкам) или файла нет.
+    """
+    root = os.path.realpath(DATA_DIR)
+    full_path = os.path.realpath(os.path.join(root, path.strip()))
+    if os.path.commonpath([root, full_path]) != root or not os.path.isfile(full_path):
+        return None
+    return full_path
@@ -1,9 +1,25 @@
 import streamlit as st
 
+from utils.hashing import grid_hash
+
 class SessionStateManager:
     """
     Управляет параметрами `st.session_state`
     """
+    # Данные и результаты расчетов, относящиеся к текущему блоку (сбрасываются при открытии другого блока)
+    BLOCK_SCOPED_KEYS = [
+        "block_contour", "block_geometry", "grid_data", "grid_metrics", "grid_generated", "grid_updated",
+        "calculation_results", "calculation_graph_report", "x_values",
+        "psd_table", "P_x_data", "psd_table_calculated", "P_x_calculated", "psd_table_block",
+        "measured_psd", "psd_table_measured", "psd_fit_results",
+        "per_hole_results", "model_comparison", "curve_comparison_results", "comminution_results",
+        "sensitivity_results", "uncertainty_results",
+        "charge_design", "charge_design_grid_hash", "charge_design_totals",
+        "initiation_timing", "initiation_timing_grid_hash", "initiation_start_id",
+        "energy_raster", "monitoring_points", "ground_vibration", "flyrock_zone",
+        "deviation_survey", "hole_trajectories", "as_drilled", "drill_reconciliation",
+        "block_model_lookup", "block_volume_results",
+    ]
 
     def __init__(self):
         """Инициализация параметров при старте."""
@@ -44,6 +60,32 @@ class SessionStateManager:
             if key not in st.session_state:
                 st.session_state[key] = value
 
+    def reset_block_state(self):
+        """
+        Удаляет данные и результаты текущего блока и восстанавливает значения по умолчанию.
+        """
+        for key in self.BLOCK_SCOPED_KEYS:
+            st.session_state.pop(key, None)
+        self._initialize_session_state()
+
+    @staticmethod
+    def set_grid_table(name, table, grid_data):
+        """
+        Сохраняет таблицу, рассчитанную по сетке скважин, вместе с хэшем этой сетки.
+        """
+        st.session_state[name] = table
+        st.session_state[f"{name}_grid_hash"] = grid_hash(grid_data)
+
+    @staticmethod
+    def get_grid_table(name, grid_data):
+        """
+        Таблица `name`, если она рассчитана по текущей сетке скважин, иначе None.
+        """
+        table = st.session_state.get(name)
+        if table is None or st.session_state.get(f"{name}_grid_hash") != grid_hash(grid_data):
+            return None
+        return table
+
     def update_status(self, message: str, level: str = "info"):
         """
         Обновляет статусное сообщение.